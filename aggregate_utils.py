@@ -0,0 +1,165 @@
+# aggregate_utils.py
+from collections import Counter
+from scan_utils import format_size
+
+# Níveis de agrupamento das linhas da tabela, com o rótulo usado na interface
+GROUP_LEVELS = {"Série": "series", "Estudo": "study", "Paciente": "patient"}
+
+# Campos descritivos copiados do primeiro registro de cada série
+INFO_FIELDS = ("Paciente", "Nascimento", "Sexo", "Idade", "Exame", "Descrição do Estudo", "Fabricante",
+               "Equipamento", "Tipo de Exame", "PatientID", "StudyInstanceUID")
+
+
+class SeriesAccumulator:
+    # Resumo dos arquivos de uma série dentro de uma pasta: custo O(1) por arquivo, sem guardar os registros
+    __slots__ = ("info", "count", "bytes", "min_position", "max_position", "thickness")
+
+    def __init__(self, info):
+        self.info = info
+        self.count = 0
+        self.bytes = 0
+        self.min_position = None  # posições extremas ao longo da normal (ver scan_utils.slice_position)
+        self.max_position = None
+        self.thickness = Counter()  # "1.00 mm" -> arquivos; poucas chaves por série
+
+    def add(self, record):
+        self.count += 1
+        self.bytes += record.get("Bytes", 0)
+        self.add_positions(record.get("Posição"), record.get("Posição"))
+        self.thickness[record["Espessura do Slice"]] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.bytes += other.bytes
+        self.add_positions(other.min_position, other.max_position)
+        self.thickness.update(other.thickness)
+
+    def add_positions(self, low, high):
+        if low is None:
+            return
+        if self.min_position is None:
+            self.min_position, self.max_position = low, high
+        else:
+            self.min_position = min(self.min_position, low)
+            self.max_position = max(self.max_position, high)
+
+    @property
+    def extent(self):
+        # Cobertura da série ao longo da normal, em mm
+        return None if self.min_position is None else self.max_position - self.min_position
+
+
+def group_key(uid, info, level):
+    patient_key = f"{info['Paciente']}_{info['PatientID']}"
+    if level == "patient":
+        return patient_key
+    if level == "study":
+        return info["StudyInstanceUID"] or f"{patient_key}_{info['Exame']}"
+    return uid
+
+
+class StudyAggregator:
+    # Agrega os registros da árvore inteira por SeriesInstanceUID, mesmo quando a série está espalhada
+    # por várias pastas. Cada pasta contribui com um SeriesAccumulator por série, e reanalisar uma pasta
+    # só troca a contribuição dela. As linhas saem por série, estudo ou paciente sem nova varredura.
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.folders = {}  # pasta -> {uid da série: SeriesAccumulator}
+        self.series = {}  # uid da série -> {pasta: SeriesAccumulator}
+        self.keys = {}  # uid da série -> {nível: chave do grupo}
+        self.members = {"study": {}, "patient": {}}  # nível -> chave do grupo -> {uids das séries}
+
+    def update_folder(self, folder, records, level="series"):
+        # Troca a contribuição da pasta pelos registros novos; devolve as chaves de level afetadas
+        parts = {}
+        for record in records:
+            # Sem SeriesInstanceUID, a pasta faz o papel de série
+            uid = record.get("SeriesInstanceUID") or folder
+            accumulator = parts.get(uid)
+            if accumulator is None:
+                accumulator = parts[uid] = SeriesAccumulator({name: record[name] for name in INFO_FIELDS})
+            accumulator.add(record)
+
+        old_parts = self.folders.pop(folder, {})
+        for uid in old_parts:
+            del self.series[uid][folder]
+            if not self.series[uid]:
+                del self.series[uid]
+        for uid, accumulator in parts.items():
+            self.series.setdefault(uid, {})[folder] = accumulator
+        if parts:
+            self.folders[folder] = parts
+
+        changed = set()
+        for uid in old_parts.keys() | parts.keys():
+            old_keys, new_keys = self.reindex(uid)
+            changed.update(keys[level] for keys in (old_keys, new_keys) if keys is not None)
+        return changed
+
+    def reindex(self, uid):
+        # Atualiza os grupos de estudo e paciente da série; devolve as chaves antigas e novas
+        old_keys = self.keys.pop(uid, None)
+        if old_keys is not None:
+            for level, groups in self.members.items():
+                groups[old_keys[level]].discard(uid)
+                if not groups[old_keys[level]]:
+                    del groups[old_keys[level]]
+        new_keys = None
+        if uid in self.series:
+            info = self.series_info(uid)
+            new_keys = self.keys[uid] = {level: group_key(uid, info, level) for level in ("series", "study", "patient")}
+            for level, groups in self.members.items():
+                groups.setdefault(new_keys[level], set()).add(uid)
+        return old_keys, new_keys
+
+    def series_info(self, uid):
+        # Informações da série vindas da pasta com mais arquivos dela
+        return max(self.series[uid].values(), key=lambda accumulator: accumulator.count).info
+
+    def groups(self, level):
+        if level == "series":
+            return {uid: (uid,) for uid in self.series}
+        return self.members[level]
+
+    def group_row(self, key, level):
+        # Linha da tabela para uma chave de level, ou None se o grupo não existe mais
+        if level == "series":
+            uids = (key,) if key in self.series else None
+        else:
+            uids = self.members[level].get(key)
+        return self.build_row(uids) if uids else None
+
+    def rows(self, level):
+        return {key: self.build_row(uids) for key, uids in self.groups(level).items()}
+
+    def build_row(self, uids):
+        total = SeriesAccumulator(None)
+        folder_counts = Counter()
+        modalities = []
+        largest = None
+        for uid in uids:
+            series_count = 0
+            for folder, accumulator in self.series[uid].items():
+                total.merge(accumulator)
+                folder_counts[folder] += accumulator.count
+                series_count += accumulator.count
+            info = self.series_info(uid)
+            if info["Tipo de Exame"] not in modalities:
+                modalities.append(info["Tipo de Exame"])
+            if largest is None or series_count > largest[0]:
+                largest = (series_count, info)
+
+        row = dict(largest[1])
+        row.update({
+            "Tipo de Exame": "/".join(sorted(modalities)),
+            "Quantidade de Slices": total.count,
+            # A espessura mais frequente, e não a do último arquivo lido
+            "Espessura do Slice": total.thickness.most_common(1)[0][0],
+            # Soma dos arquivos do grupo, não o tamanho das pastas onde estão
+            "Tamanho da Pasta": format_size(total.bytes),
+            # O visualizador abre a pasta com mais arquivos do grupo
+            "Pasta": folder_counts.most_common(1)[0][0],
+        })
+        return row
@@ -0,0 +1,123 @@
+# archive_utils.py
+import io
+import tarfile
+import zipfile
+from collections import namedtuple
+
+from sniff_utils import SNIFF_SIZE, looks_like_dicom
+
+# Arquivos compactados varridos como pastas virtuais, sem extração para o disco
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+
+# Caminho virtual de um membro: "<arquivo compactado>::<nome do membro>" (":" não aparece depois da unidade)
+ARCHIVE_SEPARATOR = "::"
+
+# Bloco lido de cada membro até encontrar o início do PixelData
+HEADER_CHUNK = 64 * 1024
+# Cabeçalhos maiores que isso não são guardados em memória (ver read_header_bytes)
+HEADER_LIMIT = 4 * 1024 * 1024
+# Tag (7FE0,0010) em little e em big endian
+PIXEL_DATA_TAGS = (b"\xe0\x7f\x10\x00", b"\x7f\xe0\x00\x10")
+TAG_SIZE = 4
+
+# O que scan_tree precisa do stat: st_size é a fração do arquivo compactado que cabe ao membro e
+# st_mtime_ns é o do arquivo compactado, então qualquer alteração nele invalida o ScanCache dos membros.
+# header traz o cabeçalho já lido na listagem (membros de .tar), ou None (membros de .zip e cabeçalhos
+# maiores que HEADER_LIMIT, que o processo do pool lê pelo nome).
+MemberStat = namedtuple("MemberStat", ["st_size", "st_mtime_ns", "header"], defaults=(None,))
+
+
+def is_archive(name):
+    return name.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def member_path(archive, name):
+    return f"{archive}{ARCHIVE_SEPARATOR}{name}"
+
+
+def split_member_path(path):
+    # (arquivo compactado, nome do membro), ou (None, path) para um arquivo comum
+    archive, separator, name = path.partition(ARCHIVE_SEPARATOR)
+    return (archive, name) if separator else (None, path)
+
+
+def list_members(archive, stat, accept):
+    # [(caminho virtual, MemberStat)] dos membros regulares aceitos por accept(nome). O tamanho do
+    # arquivo compactado é dividido entre eles proporcionalmente, e a soma dá o tamanho em disco.
+    # Num .tar os cabeçalhos são lidos nesta mesma passada: listar um .tar.gz já descompacta o
+    # arquivo inteiro, e assim ele não é descompactado de novo para a leitura (ver parse_archive).
+    try:
+        if archive.lower().endswith(".zip"):
+            with zipfile.ZipFile(archive) as zip_file:
+                members = [(info.filename, info.file_size, None) for info in zip_file.infolist()
+                           if not info.is_dir() and accept(info.filename)]
+        else:
+            with tarfile.open(archive) as tar:
+                members = []
+                for info in tar:
+                    if info.isfile() and accept(info.name):
+                        header = read_header_bytes(tar.extractfile(info))
+                        members.append((info.name, info.size, header.getvalue() if header is not None else None))
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError):
+        return []
+    total = sum(size for _, size, _ in members) or 1
+    return [(member_path(archive, name), MemberStat(stat.st_size * size // total, stat.st_mtime_ns, header))
+            for name, size, header in members]
+
+
+def read_header_bytes(stream, limit=HEADER_LIMIT):
+    # Lê o membro em blocos só até o início do PixelData (little ou big endian); o resto não é
+    # descompactado nem guardado. Um membro que não começa como DICOM devolve só os primeiros bytes
+    # (o sniff de parse_record o descarta), e um cabeçalho maior que limit devolve None.
+    head = stream.read(SNIFF_SIZE)
+    if not looks_like_dicom(head):
+        return io.BytesIO(head)
+    data = bytearray(head)
+    search_from = 0
+    while True:
+        positions = [position for position in (data.find(tag, search_from) for tag in PIXEL_DATA_TAGS)
+                     if position != -1]
+        if positions:
+            # Tag, VR e tamanho do elemento, para o dcmread reconhecer onde parar
+            end = min(positions) + 12
+            if end > len(data):
+                data += stream.read(end - len(data))
+            del data[end:]
+            break
+        if len(data) > limit:
+            return None
+        block = stream.read(HEADER_CHUNK)
+        if not block:
+            break
+        search_from = max(0, len(data) - TAG_SIZE + 1)
+        data += block
+    return io.BytesIO(bytes(data))
+
+
+def member_header(stream):
+    # Cabeçalho acima de HEADER_LIMIT: volta ao início e o dcmread lê do próprio membro
+    header = read_header_bytes(stream)
+    if header is None:
+        stream.seek(0)
+        return stream
+    return header
+
+
+def iter_member_headers(archive, names):
+    # Gera (nome, cabeçalho) abrindo o arquivo compactado uma única vez. Nos tar os membros vêm na
+    # ordem do arquivo, numa só passada (um .tar.gz não tem acesso aleatório barato). O cabeçalho é um
+    # BytesIO, ou o próprio membro quando passa de HEADER_LIMIT: o dcmread lê direto dele, sem buffer.
+    if archive.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive) as zip_file:
+            for name in names:
+                with zip_file.open(name) as stream:
+                    yield name, member_header(stream)
+        return
+    wanted = set(names)
+    with tarfile.open(archive) as tar:
+        for info in tar:
+            if info.name in wanted:
+                yield info.name, member_header(tar.extractfile(info))
+                wanted.discard(info.name)
+                if not wanted:
+                    break
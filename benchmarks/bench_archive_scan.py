@@ -0,0 +1,68 @@
+# bench_archive_scan.py - varredura direta dos membros de .zip/.tar.gz (só os cabeçalhos) x extrair para
+# uma pasta temporária e varrer a pasta extraída
+#
+# Uso: python benchmarks/bench_archive_scan.py [--series 4] [--slices 100] [--size 512] [--workers 1]
+import argparse
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scan_utils import scan_directory
+from synthetic import write_tree
+
+
+def scan_count(directory, workers):
+    return sum(len(records) for _, _, records, _ in scan_directory(directory, workers=workers))
+
+
+def extract(archive, target):
+    if archive.endswith(".zip"):
+        with zipfile.ZipFile(archive) as zip_file:
+            zip_file.extractall(target)
+    else:
+        with tarfile.open(archive) as tar:
+            tar.extractall(target)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--series", type=int, default=4)
+    parser.add_argument("--slices", type=int, default=100)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "origem")
+        write_tree(source, 1, args.series, args.slices, rows=args.size, columns=args.size)
+        for name, make in (("exame.zip", lambda path: shutil.make_archive(path[:-4], "zip", source)),
+                           ("exame.tar.gz", lambda path: shutil.make_archive(path[:-7], "gztar", source))):
+            folder = os.path.join(tmp, name.replace(".", "_"))
+            os.makedirs(folder)
+            archive = os.path.join(folder, name)
+            make(archive)
+            size = os.path.getsize(archive) / (1024 * 1024)
+
+            start = time.perf_counter()
+            files = scan_count(folder, args.workers)
+            direct = time.perf_counter() - start
+
+            extracted = os.path.join(tmp, "extraido")
+            start = time.perf_counter()
+            extract(archive, extracted)
+            extracted_files = scan_count(extracted, args.workers)
+            extract_then_scan = time.perf_counter() - start
+            shutil.rmtree(extracted)
+
+            print(f"{name:<13} {size:>7.1f} MB  direto {direct:>6.2f} s ({files} arquivos)  "
+                  f"extrair + varrer {extract_then_scan:>6.2f} s ({extracted_files} arquivos)")
+
+
+if __name__ == "__main__":
+    main()
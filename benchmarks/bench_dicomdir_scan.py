@@ -0,0 +1,59 @@
+# bench_dicomdir_scan.py - varredura de um "disco" com DICOMDIR (uma imagem lida por série) x a mesma
+# pasta sem o DICOMDIR, com todos os arquivos lidos
+#
+# Uso: python benchmarks/bench_dicomdir_scan.py [--series 10] [--slices 500] [--size 512] [--workers 1]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pydicom as dicom
+from pydicom.fileset import FileSet
+from scan_utils import scan_directory
+from stats_utils import ScanStats
+from synthetic import write_tree
+
+
+def scan(directory, workers, include):
+    stats = ScanStats(directory)
+    start = time.perf_counter()
+    files = sum(len(records) for _, _, records, _ in
+                scan_directory(directory, workers=workers, include=include, stats=stats))
+    return time.perf_counter() - start, files, stats.to_dict()["files"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--series", type=int, default=10)
+    parser.add_argument("--slices", type=int, default=500)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "origem")
+        disc = os.path.join(tmp, "disco")
+        paths = write_tree(source, 1, args.series, args.slices, rows=args.size, columns=args.size)
+        # Como num CD exportado: arquivos sem extensão em pastas geradas pelo FileSet
+        file_set = FileSet()
+        for path in paths:
+            ds = dicom.dcmread(path)
+            # Campos obrigatórios nos registros STUDY e SERIES que as séries sintéticas não têm
+            ds.StudyTime, ds.StudyID, ds.AccessionNumber = "120000", "1", ""
+            ds.SeriesNumber = 1
+            file_set.add(ds)
+        file_set.write(disc)
+
+        seconds, files, counts = scan(disc, args.workers, ("*.dcm",))
+        print(f"com DICOMDIR  {seconds:>7.2f} s  {files} arquivos  lidos {counts['parsed']}  "
+              f"do DICOMDIR {counts['dicomdir']}")
+        os.remove(os.path.join(disc, "DICOMDIR"))
+        seconds, files, counts = scan(disc, args.workers, ("*",))
+        print(f"sem DICOMDIR  {seconds:>7.2f} s  {files} arquivos  lidos {counts['parsed']}")
+
+
+if __name__ == "__main__":
+    main()
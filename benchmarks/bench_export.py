@@ -0,0 +1,65 @@
+# bench_export.py - exportação em lotes (export_utils) x montar a tabela inteira em listas antes de gravar
+# (o que get_table_data fazia para o PDF); o pico de memória deve ficar constante com o streaming
+#
+# Uso: python benchmarks/bench_export.py [--rows 100000 1000000] [--formats csv parquet] [--row-group-size 50000]
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store_utils import TABLE_COLUMNS
+from export_utils import export_to_file
+from bench_result_store import make_row
+
+
+def generated_rows(count):
+    for i in range(count):
+        row = make_row(i)
+        yield [row[column] for column in TABLE_COLUMNS]
+
+
+def export_materialized(count, filename, export_format, row_group_size):
+    # Caminho antigo: todas as linhas em memória e só depois a gravação
+    data = list(generated_rows(count))
+    if export_format == "csv":
+        with open(filename, "w", newline="", encoding="utf-8") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(TABLE_COLUMNS)
+            writer.writerows(data)
+    else:
+        export_to_file(iter(data), filename, TABLE_COLUMNS, export_format, row_group_size=len(data))
+
+
+def export_streaming(count, filename, export_format, row_group_size):
+    export_to_file(generated_rows(count), filename, TABLE_COLUMNS, export_format, row_group_size)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet"])
+    parser.add_argument("--row-group-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.rows:
+            for export_format in args.formats:
+                filename = os.path.join(tmp, f"export.{export_format}")
+                for name, function in (("listas", export_materialized), ("em lotes", export_streaming)):
+                    tracemalloc.start()
+                    start = time.perf_counter()
+                    function(count, filename, export_format, args.row_group_size)
+                    elapsed = time.perf_counter() - start
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    print(f"{count:>9} linhas  {export_format:<8} {name:<9} {elapsed:>7.2f} s  "
+                          f"pico {peak / (1024 * 1024):>8.1f} MB  arquivo {os.path.getsize(filename) / (1024 * 1024):>7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
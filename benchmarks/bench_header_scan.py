@@ -0,0 +1,77 @@
+# bench_header_scan.py - leitura completa (dcmread) x leitura só do cabeçalho
+#
+# Uso: python benchmarks/bench_header_scan.py [--slices 2000] [--size 512] [--dir PASTA]
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pydicom as dicom
+from scan_utils import SCAN_TAGS
+from synthetic import write_series
+
+
+class CountingFile(io.FileIO):
+    # Conta os bytes efetivamente lidos do disco
+    bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        CountingFile.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer):
+        n = super().readinto(buffer)
+        CountingFile.bytes_read += n or 0
+        return n
+
+
+def full_read(path):
+    with CountingFile(path) as fp:
+        ds = dicom.dcmread(fp, force=True)
+        # Acessar PixelData garante que os pixels foram carregados, como no caminho antigo
+        ds.PixelData
+
+
+def header_read(path):
+    with CountingFile(path) as fp:
+        dicom.dcmread(fp, force=True, stop_before_pixels=True, specific_tags=SCAN_TAGS)
+
+
+def run(name, reader, paths):
+    CountingFile.bytes_read = 0
+    start = time.perf_counter()
+    for path in paths:
+        reader(path)
+    elapsed = time.perf_counter() - start
+    total = CountingFile.bytes_read
+    print(f"{name:<12} {len(paths) / elapsed:>10.1f} arquivos/s  "
+          f"{total / (1024 * 1024):>10.1f} MB lidos  {total / len(paths):>12.0f} bytes/arquivo")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slices", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--dir", help="Pasta com arquivos .dcm existentes (em vez de gerar uma série sintética)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.dir:
+            paths = [os.path.join(args.dir, f) for f in os.listdir(args.dir) if f.lower().endswith('.dcm')]
+        else:
+            print(f"Gerando {args.slices} cortes {args.size}x{args.size} em {tmp}...")
+            paths = write_series(tmp, args.slices, rows=args.size, columns=args.size)
+
+        full = run("dcmread", full_read, paths)
+        header = run("cabeçalho", header_read, paths)
+        print(f"Aceleração: {full / header:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# bench_import_time.py - tempo de import dos módulos de entrada (python -X importtime), com orçamento
+# para pegar regressões: falha se o tempo passar do orçamento ou se matplotlib, vtk ou reportlab
+# voltarem a ser carregados na abertura
+#
+# Uso: python benchmarks/bench_import_time.py [--modules main scan_cli] [--budget-ms 800] [--repeat 5] [--top 10]
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Pacotes que só devem ser importados no primeiro uso do visualizador ou do relatório
+LAZY_PACKAGES = ("matplotlib", "mpl_toolkits", "vtk", "vtkmodules", "reportlab", "pyautogui", "pygetwindow")
+
+
+def import_times(module):
+    # [(self_us, cumulativo_us, nível, nome)] de um import em um processo novo
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        level = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(self_us), int(cumulative_us), level, name.strip()))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", nargs="+", default=["main", "scan_cli"])
+    parser.add_argument("--budget-ms", type=float, default=800, help="Tempo máximo de import por módulo")
+    parser.add_argument("--repeat", type=int, default=5, help="Processos por módulo; vale o menor tempo")
+    parser.add_argument("--top", type=int, default=10, help="Imports mais lentos listados (cumulativo)")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        try:
+            runs = [import_times(module) for _ in range(args.repeat)]
+        except RuntimeError as error:
+            print(f"{module:<12} não importou: {error}")
+            failed = True
+            continue
+        # O total é a soma dos imports de primeiro nível (inclui o que o interpretador não tinha carregado)
+        totals = [sum(cumulative for _, cumulative, level, _ in entries if level == 0) for entries in runs]
+        best = min(range(len(runs)), key=totals.__getitem__)
+        total_ms = totals[best] / 1000
+        lazy = sorted({name.split(".")[0] for _, _, _, name in runs[best]} & set(LAZY_PACKAGES))
+        over_budget = total_ms > args.budget_ms
+        failed = failed or over_budget or bool(lazy)
+
+        print(f"{module:<12} {total_ms:>8.1f} ms (orçamento {args.budget_ms:.0f} ms)"
+              f"{'  ACIMA DO ORÇAMENTO' if over_budget else ''}")
+        if lazy:
+            print(f"{'':<12} carregados na abertura: {', '.join(lazy)}")
+        packages = [entry for entry in runs[best] if entry[2] == 1 or (entry[2] == 0 and entry[3] != module)]
+        for _, cumulative, _, name in sorted(packages, reverse=True, key=lambda entry: entry[1])[:args.top]:
+            print(f"{'':<12} {cumulative / 1000:>8.1f} ms  {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# bench_parallel_decode.py - decodificação dos pixels de uma série com 1..N processos,
+# em séries sintéticas sem compressão e comprimidas (RLE Lossless)
+#
+# Uso: python benchmarks/bench_parallel_decode.py [--slices 300] [--size 512] [--workers 1 2 4 8]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from pydicom.uid import RLELossless
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volume_utils import decode_into
+from synthetic import write_series
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slices", type=int, default=300)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    for name, transfer_syntax in [("sem compressão", None), ("RLE Lossless", RLELossless)]:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_series(tmp, args.slices, args.size, args.size, transfer_syntax=transfer_syntax)
+            data = np.empty((len(paths), args.size, args.size), dtype=np.int16)
+            baseline = None
+            for workers in args.workers:
+                start = time.perf_counter()
+                decode_into(data, paths, workers)
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+                speedup = baseline / elapsed
+                print(f"{name:<15} {workers:>2} processos  {elapsed:>7.2f} s  {len(paths) / elapsed:>8.0f} fatias/s  "
+                      f"speed-up {speedup:>5.2f}x ({speedup / workers:.2f} por processo)")
+
+
+if __name__ == "__main__":
+    main()
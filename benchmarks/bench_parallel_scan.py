@@ -0,0 +1,60 @@
+# bench_parallel_scan.py - vazão de scan_directory com 1..N processos
+#
+# Uso: python benchmarks/bench_parallel_scan.py [--files 100000] [--per-folder 200] [--workers 1 2 4 8]
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scan_utils import scan_directory
+from synthetic import write_series
+
+
+def build_tree(root, files, per_folder):
+    # Gera uma série sem pixels e replica os bytes nas demais pastas (só o cabeçalho importa aqui)
+    template = write_series(os.path.join(root, "modelo"), per_folder, with_pixels=False)
+    contents = [open(path, "rb").read() for path in template]
+    written = len(template)
+    folder_index = 0
+    while written < files:
+        folder = os.path.join(root, f"PAC{folder_index // 10:05d}", f"SE{folder_index % 10:02d}")
+        os.makedirs(folder)
+        chunk = contents[:files - written]
+        for i, data in enumerate(chunk):
+            with open(os.path.join(folder, f"IM{i:05d}.dcm"), "wb") as f:
+                f.write(data)
+        written += len(chunk)
+        folder_index += 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--per-folder", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, 8, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        print(f"Gerando {args.files} arquivos em {root}...")
+        build_tree(root, args.files, args.per_folder)
+
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            total = sum(len(records) for _, _, records, _ in scan_directory(root, workers=workers))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"workers={workers:<3} {total / elapsed:>10.0f} arquivos/s  "
+                  f"{elapsed:>8.2f} s  aceleração {baseline / elapsed:.2f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
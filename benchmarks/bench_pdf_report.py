@@ -0,0 +1,74 @@
+# bench_pdf_report.py - relatório PDF de 50k linhas: Table única (caminho antigo) x uma Table por página
+#
+# Uso: python benchmarks/bench_pdf_report.py [--rows 50000] [--skip-single-table] [--memory]
+# Com --memory o pico de memória é medido com tracemalloc, o que deixa os tempos bem mais lentos
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+from report_utils import generate_pdf_report, REPORT_COLUMNS
+from store_utils import ResultStore
+from bench_result_store import make_row
+
+
+def single_table_report(store, row_ids, filename):
+    # Caminho antigo: todas as linhas numa só Table, medida e quebrada pelo SimpleDocTemplate
+    data = [[header for _, header, _ in REPORT_COLUMNS]]
+    data += [[str(store.get(row_id, column)) for column, _, _ in REPORT_COLUMNS] for row_id in row_ids]
+    table = Table(data)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONT', (0, 0), (-1, -1), 'Helvetica', 9),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    SimpleDocTemplate(filename, pagesize=landscape(letter)).build([table])
+
+
+def measure(function, memory, *args):
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if memory else 0
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--skip-single-table", action="store_true", help="Não roda o caminho antigo (lento)")
+    parser.add_argument("--memory", action="store_true", help="Mede o pico de memória com tracemalloc")
+    args = parser.parse_args()
+
+    store = ResultStore()
+    for i in range(args.rows):
+        store.append(make_row(i))
+    row_ids = store.row_ids()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [("uma Table por página", generate_pdf_report, os.path.join(tmp, "paginado.pdf"))]
+        if not args.skip_single_table:
+            runs.insert(0, ("Table única", single_table_report, os.path.join(tmp, "unico.pdf")))
+        for name, function, filename in runs:
+            elapsed, peak = measure(function, args.memory, store, row_ids, filename)
+            memory = f"  pico {peak / (1024 * 1024):>8.1f} MB" if args.memory else ""
+            print(f"{name:<22} {elapsed:>8.2f} s{memory}  arquivo {os.path.getsize(filename) / (1024 * 1024):>6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
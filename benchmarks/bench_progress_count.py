@@ -0,0 +1,66 @@
+# bench_progress_count.py - custo da contagem prévia (count_files) que a janela de progresso roda em
+# paralelo com a varredura: contagem sozinha x varredura sozinha x as duas juntas, como em main.py
+#
+# Uso: python benchmarks/bench_progress_count.py [--patients 200] [--series 4] [--slices 50] [--workers 1]
+#                                               [--repeat 3]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from threading import Thread
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scan_utils import count_files, scan_directory
+from stats_utils import ScanStats
+from synthetic import write_tree
+
+
+def scan(folder, workers, with_count):
+    stats = ScanStats(folder)
+    known = []
+    start = time.perf_counter()
+    if with_count:
+        def count():
+            stats.set_total(count_files(folder))
+            known.append(time.perf_counter() - start)
+        Thread(target=count, daemon=True).start()
+    for _ in scan_directory(folder, workers=workers, stats=stats):
+        pass
+    return time.perf_counter() - start, known[0] if known else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--series", type=int, default=4)
+    parser.add_argument("--slices", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_tree(tmp, args.patients, args.series, args.slices, rows=16, columns=16)
+        print(f"{len(paths)} arquivos em {args.patients * args.series} pastas")
+
+        start = time.perf_counter()
+        total = count_files(tmp)
+        counting = time.perf_counter() - start
+        print(f"count_files sozinha    {counting:>7.3f} s  {total} arquivos")
+
+        # Com o cache de diretórios do sistema já aquecido pela contagem acima; as duas variantes se
+        # alternam e fica o melhor tempo de cada uma, para o ruído não dominar a diferença
+        alone, together = [], []
+        for _ in range(args.repeat):
+            alone.append(scan(tmp, args.workers, with_count=False)[0])
+            together.append(scan(tmp, args.workers, with_count=True))
+        alone = min(alone)
+        together, known = min(together)
+        print(f"varredura sozinha      {alone:>7.3f} s  (a contagem custa {counting / alone:.1%} dela)")
+        print(f"varredura + contagem   {together:>7.3f} s  total conhecido em {known:.3f} s  "
+              f"({(together - alone) / alone:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# bench_result_store.py - memória do ResultStore e custo de materializar a janela visível
+#
+# Uso: python benchmarks/bench_result_store.py [--rows 10000 100000 500000] [--window 50]
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store_utils import ResultStore
+
+MANUFACTURERS = ["SIEMENS", "GE MEDICAL SYSTEMS", "PHILIPS", "TOSHIBA", "CANON"]
+MODALITIES = ["CT", "MR", "CR", "DX", "US"]
+
+
+def make_row(i):
+    return {
+        "Paciente": f"PACIENTE {i}",
+        "Nascimento": f"{1 + i % 28:02d}/{1 + i % 12:02d}/{1930 + i % 90}",
+        "Sexo": "MF"[i % 2],
+        "Idade": 1 + i % 95,
+        "Exame": f"{1 + i % 28:02d}/{1 + i % 12:02d}/2024",
+        "Descrição do Estudo": f"TC {['TORAX', 'CRANIO', 'ABDOME'][i % 3]}",
+        "Fabricante": MANUFACTURERS[i % len(MANUFACTURERS)],
+        "Equipamento": f"MODELO {i % 20}",
+        "Tipo de Exame": MODALITIES[i % len(MODALITIES)],
+        "Quantidade de Slices": 100 + i % 900,
+        "Espessura do Slice": f"{0.5 + i % 5 * 0.5:.2f} mm",
+        "Tamanho da Pasta": f"{i % 500} MB",
+        "Pasta": f"/dados/PAC{i:07d}/SE001",
+        "PatientID": f"{i:08d}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--window", type=int, default=50, help="Linhas visíveis materializadas por rolagem")
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        tracemalloc.start()
+        store = ResultStore()
+        for i in range(rows):
+            store.append(make_row(i))
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        order = store.row_ids()
+        samples = []
+        for _ in range(200):
+            first = random.randrange(max(1, rows - args.window))
+            start = time.perf_counter()
+            for row_id in order[first:first + args.window]:
+                store.row(row_id)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        print(f"{rows:>8} linhas  {memory / (1024 * 1024):>8.1f} MB  {memory / rows:>6.0f} bytes/linha  "
+              f"janela de {args.window}: mediana {samples[len(samples) // 2] * 1e3:.3f} ms, "
+              f"p99 {samples[int(len(samples) * 0.99)] * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
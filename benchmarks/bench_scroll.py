@@ -0,0 +1,97 @@
+# bench_scroll.py - custo por tick de rolagem no MPR: redesenho da figura inteira (caminho antigo)
+# x blit só do eixo rolado, em resolução original e nos níveis 2x / 4x da pirâmide, com o corte
+# em float (normalizado pelo matplotlib) ou já em uint8 pela WindowLUT
+#
+# Roda no backend Agg (sem janela), então mede o desenho e não a cópia para a tela.
+# Uso: python benchmarks/bench_scroll.py [--slices 1500] [--size 512] [--ticks 100]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.transforms import Bbox
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volume_utils import Volume, WindowLUT
+
+
+def build_figure(volume, lut=None):
+    fig, axs = plt.subplots(2, 2, figsize=(15, 12))
+    views = [(axs[0, 0], volume.axial, len(volume)), (axs[0, 1], volume.sagittal, volume.shape[2]),
+             (axs[1, 0], volume.coronal, volume.shape[1])]
+    if lut is not None:
+        views = [(ax, lambda index, factor=1, cut=cut: lut.apply(*volume.cut(cut, index, factor)), count)
+                 for (ax, _, count), cut in zip(views, ('axial', 'sagittal', 'coronal'))]
+    for ax, view, count in views:
+        ax.imshow(view(count // 2), cmap='gray', aspect='auto', **({"vmin": 0, "vmax": 255} if lut else {}))
+        ax.set_title(f"Slice {count // 2}")
+    return fig, views
+
+
+def run_full_redraw(volume, ticks):
+    fig, views = build_figure(volume)
+    fig.canvas.draw()
+    ax, view, count = views[0]
+    start = time.perf_counter()
+    for tick in range(ticks):
+        ax.images[0].set_array(view(tick % count))
+        ax.set_title(f"Slice {tick % count}")
+        fig.canvas.draw()
+    plt.close(fig)
+    return (time.perf_counter() - start) / ticks
+
+
+def run_blit(volume, ticks, factor, lut=None):
+    fig, views = build_figure(volume, lut)
+    ax, view, count = views[0]
+    image = ax.images[0]
+    image.set_animated(True)
+    ax.title.set_animated(True)
+    fig.canvas.draw()
+    renderer = fig.canvas.get_renderer()
+    title_box = ax.title.get_window_extent(renderer)
+    box = Bbox.from_extents(ax.bbox.x0, ax.bbox.y0, ax.bbox.x1, max(ax.bbox.y1, title_box.y1))
+    background = fig.canvas.copy_from_bbox(box)
+    start = time.perf_counter()
+    for tick in range(ticks):
+        image.set_array(view(tick % count, factor))
+        ax.set_title(f"Slice {tick % count}")
+        fig.canvas.restore_region(background)
+        ax.draw_artist(image)
+        ax.draw_artist(ax.title)
+        fig.canvas.blit(box)
+    plt.close(fig)
+    return (time.perf_counter() - start) / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slices", type=int, default=1500)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--ticks", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = rng.integers(-1024, 2048, size=(args.slices, args.size, args.size), dtype=np.int16)
+    volume = Volume(data, np.ones(args.slices, dtype=np.float32), np.full(args.slices, -1024, dtype=np.float32))
+    start = time.perf_counter()
+    volume.build_pyramid()
+    print(f"pirâmide 2x/4x montada em {time.perf_counter() - start:.2f} s")
+
+    runs = [("figura inteira (antigo)", lambda: run_full_redraw(volume, args.ticks))]
+    runs += [(f"blit {factor}x", lambda factor=factor: run_blit(volume, args.ticks, factor)) for factor in (1, 2, 4)]
+    lut = WindowLUT(data.dtype, 40, 400)
+    runs += [(f"blit {factor}x + LUT uint8", lambda factor=factor: run_blit(volume, args.ticks, factor, lut))
+             for factor in (1, 4)]
+    for name, run in runs:
+        frame = run()
+        print(f"{name:<24} {frame * 1e3:>8.1f} ms/tick  {1 / frame:>7.1f} fps")
+
+
+if __name__ == "__main__":
+    main()
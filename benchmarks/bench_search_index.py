@@ -0,0 +1,63 @@
+# bench_search_index.py - latência do SearchIndex x varredura linear em 1M de linhas
+#
+# Uso: python benchmarks/bench_search_index.py [--rows 1000000] [--series-per-patient 10]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store_utils import SearchIndex
+
+SYLLABLES = ["ma", "ri", "an", "jo", "se", "pe", "dro", "lu", "ci", "a", "car", "los", "fer", "nan", "da", "sil", "va",
+             "so", "u", "za", "oli", "vei", "ra", "san", "tos", "go", "mes", "li", "ma", "bar", "bo"]
+STUDIES = ["TC TORAX", "TC CRANIO", "TC ABDOME TOTAL", "RM JOELHO", "ANGIOTC AORTA", "TC COLUNA LOMBAR"]
+
+
+def make_name(rng):
+    return " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).upper() for _ in range(3))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--series-per-patient", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    patients = [(make_name(rng), f"{i:08d}") for i in range(max(1, args.rows // args.series_per_patient))]
+    rows = []
+    for row_id in range(args.rows):
+        name, patient_id = patients[row_id // args.series_per_patient]
+        rows.append({"Paciente": name, "PatientID": patient_id, "Descrição do Estudo": rng.choice(STUDIES),
+                     "Exame": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2015, 2024)}"})
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    for row_id, row in enumerate(rows):
+        index.add(row_id, row)
+    print(f"Índice de {args.rows} linhas construído em {time.perf_counter() - start:.1f} s "
+          f"({len(index.texts)} textos distintos, {len(index.grams)} n-gramas)")
+
+    name, patient_id = patients[len(patients) // 2]
+    queries = [name.split()[0][:4], name.split()[1], patient_id, patient_id[-5:], "ABDOME", "/2019", name]
+    for query in queries:
+        samples = []
+        for _ in range(20):
+            start = time.perf_counter()
+            matches = index.search(query)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+
+        start = time.perf_counter()
+        lowered = query.lower()
+        linear = sum(1 for row in rows if any(lowered in row[column].lower() for column in index.columns))
+        linear_time = time.perf_counter() - start
+        print(f"{query!r:<32} {len(matches):>8} linhas  índice: mediana {samples[len(samples) // 2] * 1e3:8.2f} ms  "
+              f"varredura linear: {linear_time * 1e3:9.1f} ms ({linear} linhas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# bench_sniff.py - pasta com DICOM sem extensão misturado a arquivos que não são DICOM: dcmread(force=True)
+# em todos x varredura com descarte pelos primeiros bytes x nova varredura com os vereditos no ScanCache
+#
+# Uso: python benchmarks/bench_sniff.py [--dicom 500] [--junk 2000] [--junk-size 1048576] [--workers 1]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_utils import ScanCache
+from scan_utils import scan_directory, read_header_record, RECORD_VERSION
+from stats_utils import ScanStats
+from synthetic import write_series
+
+
+def parse_all(folder):
+    # Como seria sem o filtro .dcm e sem classificação: todo arquivo vai para o dcmread
+    parsed = 0
+    for entry in os.scandir(folder):
+        try:
+            read_header_record(entry.path)
+            parsed += 1
+        except Exception:
+            pass
+    return parsed
+
+
+def scan(folder, workers, cache):
+    stats = ScanStats(folder)
+    files = sum(len(records) for _, _, records, _ in
+                scan_directory(folder, workers=workers, cache=cache, stats=stats))
+    return files, stats.to_dict()["files"]["not_dicom"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dicom", type=int, default=500)
+    parser.add_argument("--junk", type=int, default=2000)
+    parser.add_argument("--junk-size", type=int, default=1024 * 1024)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "exame")
+        write_series(folder, args.dicom, rows=256, columns=256, extension="")
+        # Arquivos que costumam acompanhar exportações: laudos, imagens, logs
+        block = (b"%PDF-1.4 laudo " * 64)[:1024]
+        for i in range(args.junk):
+            with open(os.path.join(folder, f"anexo{i:05d}.pdf"), "wb") as file:
+                file.write(block * (args.junk_size // len(block)))
+
+        start = time.perf_counter()
+        parsed = parse_all(folder)
+        print(f"dcmread em tudo        {time.perf_counter() - start:>7.2f} s  {parsed} registros")
+
+        cache = ScanCache(os.path.join(tmp, "cache.sqlite3"), version=RECORD_VERSION)
+        for label in ("varredura", "nova varredura"):
+            start = time.perf_counter()
+            files, rejected = scan(folder, args.workers, cache)
+            print(f"{label:<22} {time.perf_counter() - start:>7.2f} s  {files} registros  "
+                  f"{rejected} descartados")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
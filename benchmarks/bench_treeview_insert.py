@@ -0,0 +1,118 @@
+# bench_treeview_insert.py - inserção de 100k linhas: linha a linha x UIUpdateQueue em lotes
+#
+# Precisa de um display (no Linux sem tela: xvfb-run python benchmarks/bench_treeview_insert.py)
+# Uso: python benchmarks/bench_treeview_insert.py [--rows 100000] [--batch 500]
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+from threading import Thread
+from tkinter import ttk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui_utils import UIUpdateQueue
+
+COLUMNS = ("Nascimento", "Sexo", "Idade", "Exame", "Descrição do Estudo", "Fabricante", "Equipamento",
+           "Tipo de Exame", "Quantidade de Slices", "Espessura do Slice", "Tamanho da Pasta", "Visualizar", "Pasta")
+
+
+def make_row(i):
+    return (f"PACIENTE {i}", ("01/01/1970", "M", 54, "01/01/2024", "TC TORAX", "SIEMENS", "SOMATOM", "CT",
+                              200, "1.00 mm", "100 MB", "👁️", f"/dados/PAC{i:06d}"))
+
+
+def build_window():
+    root = tk.Tk()
+    tree = ttk.Treeview(root, columns=COLUMNS)
+    tree.pack(fill="both", expand=True)
+    label = tk.Label(root)
+    label.pack()
+    return root, tree, label
+
+
+def relayout(tree, label):
+    # O mesmo trabalho que analyze_directory_async fazia depois de cada pasta
+    for col in tree["columns"]:
+        tree.column(col, anchor=tk.CENTER)
+    label.config(text=f"Total number of CT scans analyzed: {len(tree.get_children())}")
+
+
+def heartbeat(root, gaps):
+    # Mede de quanto em quanto tempo o loop do Tk consegue atender eventos
+    last = [time.perf_counter()]
+
+    def tick():
+        now = time.perf_counter()
+        gaps.append(now - last[0])
+        last[0] = now
+        root.after(10, tick)
+    root.after(10, tick)
+
+
+def run_per_row(rows):
+    root, tree, label = build_window()
+    gaps = []
+    heartbeat(root, gaps)
+    start = time.perf_counter()
+
+    def insert_all():
+        # Caminho antigo: uma linha por vez, com o layout refeito a cada linha, sem ceder ao loop
+        for i in range(rows):
+            text, values = make_row(i)
+            tree.insert("", "end", text=text, values=values)
+            relayout(tree, label)
+        root.update()
+        root.quit()
+    root.after(0, insert_all)
+    root.mainloop()
+    elapsed = time.perf_counter() - start
+    root.destroy()
+    return elapsed, max(gaps, default=elapsed)
+
+
+def run_queued(rows, batch):
+    root, tree, label = build_window()
+    gaps = []
+    heartbeat(root, gaps)
+    done = [0]
+
+    def after_batch():
+        relayout(tree, label)
+        if done[0] == rows:
+            root.quit()
+
+    def insert(text, values):
+        tree.insert("", "end", text=text, values=values)
+        done[0] += 1
+
+    ui_queue = UIUpdateQueue(root, batch_size=batch, after_batch=after_batch)
+    start = time.perf_counter()
+
+    def produce():
+        for i in range(rows):
+            ui_queue.put(insert, *make_row(i))
+    Thread(target=produce, daemon=True).start()
+    root.mainloop()
+    elapsed = time.perf_counter() - start
+    root.destroy()
+    return elapsed, max(gaps[1:], default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--skip-per-row", action="store_true", help="Não roda o caminho antigo (quadrático)")
+    args = parser.parse_args()
+
+    if not args.skip_per_row:
+        elapsed, worst = run_per_row(args.rows)
+        print(f"linha a linha   {elapsed:>8.2f} s  {args.rows / elapsed:>10.0f} linhas/s  maior travamento {worst * 1000:>9.0f} ms")
+    elapsed, worst = run_queued(args.rows, args.batch)
+    print(f"fila em lotes   {elapsed:>8.2f} s  {args.rows / elapsed:>10.0f} linhas/s  maior travamento {worst * 1000:>9.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
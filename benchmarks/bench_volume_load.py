@@ -0,0 +1,66 @@
+# bench_volume_load.py - montagem do volume: float64 fatia a fatia (caminho antigo) x load_volume,
+# e a reabertura da mesma série pelo VolumeCache (memmap)
+#
+# Uso: python benchmarks/bench_volume_load.py [--slices 300] [--size 512] [--skip-legacy]
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pydicom as dicom
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volume_utils import load_volume, VolumeCache
+from synthetic import write_series
+
+
+def legacy_volume(path):
+    # O que plot_slices fazia: todas as fatias com pixels em uma lista, depois um float64 preenchido por colunas
+    slices = [dicom.dcmread(os.path.join(path, s), force=True) for s in os.listdir(path)]
+    slices = sorted(slices, key=lambda x: x.ImagePositionPatient[2])
+    img_shape = list(slices[0].pixel_array.shape)
+    img_shape.append(len(slices))
+    volume3d = np.zeros(img_shape)
+    for i, s in enumerate(slices):
+        volume3d[:, :, i] = s.pixel_array
+    return volume3d
+
+
+def measure(function, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(path)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, current, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slices", type=int, default=300)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--skip-legacy", action="store_true", help="Não roda o caminho antigo (8 bytes/voxel)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as cache_dir:
+        write_series(tmp, args.slices, args.size, args.size)
+        cache = VolumeCache(cache_dir)
+        runs = [("load_volume", load_volume),
+                ("cache: 1ª abertura", lambda path: load_volume(path, cache)),
+                ("cache: reabertura", lambda path: load_volume(path, cache))]
+        if not args.skip_legacy:
+            runs.insert(0, ("float64 (antigo)", legacy_volume))
+        for name, function in runs:
+            elapsed, current, peak, result = measure(function, tmp)
+            del result
+            print(f"{name:<18} {elapsed:>7.2f} s  volume {current / (1024 * 1024):>8.1f} MB  "
+                  f"pico {peak / (1024 * 1024):>8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# bench_vtk_open.py - abrir uma série no VTK: um vtkDICOMImageReader (+ dcmread) por arquivo, como o
+# view_dicom_series antigo, x uma decodificação do volume e um vtkImageData sem cópia (numpy_support)
+#
+# Não abre janela: mede só a preparação dos dados. Uso: python benchmarks/bench_vtk_open.py [--slices 1000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pydicom
+import vtk
+from vtk.util import numpy_support
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from volume_utils import load_volume
+from synthetic import write_series
+
+
+def per_file_readers(folder):
+    # Caminho antigo: cada arquivo lido duas vezes e um reader novo por fatia; para poder paginar,
+    # as fatias ainda precisam ser empilhadas (vtkImageAppend) num volume
+    append = vtk.vtkImageAppend()
+    append.SetAppendAxis(2)
+    for name in sorted(os.listdir(folder)):
+        dicom_path = os.path.join(folder, name)
+        pydicom.dcmread(dicom_path, force=True)
+        reader = vtk.vtkDICOMImageReader()
+        reader.SetFileName(dicom_path)
+        reader.Update()
+        append.AddInputData(reader.GetOutput())
+    append.Update()
+    return append.GetOutput()
+
+
+def single_volume(folder):
+    volume = load_volume(folder)
+    data = volume.data.reshape(-1)
+    image = vtk.vtkImageData()
+    image.SetDimensions(volume.shape[2], volume.shape[1], volume.shape[0])
+    image.GetPointData().SetScalars(numpy_support.numpy_to_vtk(data, deep=False))
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--slices", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=512)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_series(tmp, args.slices, args.size, args.size)
+        for name, function in [("reader por arquivo", per_file_readers), ("volume + numpy_support", single_volume)]:
+            start = time.perf_counter()
+            function(tmp)
+            print(f"{name:<24} {time.perf_counter() - start:>7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# synthetic.py - gera séries DICOM sintéticas para os benchmarks
+import os
+import numpy as np
+import pydicom as dicom
+from pydicom.dataset import FileDataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, generate_uid
+
+CT_IMAGE_STORAGE = "1.2.840.10008.5.1.4.1.1.2"
+
+
+def make_slice(index, rows=512, columns=512, study_uid=None, series_uid=None,
+               patient=("Silva", "Joao"), patient_id="000001", with_pixels=True, transfer_syntax=None):
+    file_meta = FileMetaDataset()
+    file_meta.MediaStorageSOPClassUID = CT_IMAGE_STORAGE
+    file_meta.MediaStorageSOPInstanceUID = generate_uid()
+    file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+    ds = FileDataset(None, {}, file_meta=file_meta, preamble=b"\0" * 128)
+    if int(dicom.__version__.split(".")[0]) < 3:
+        ds.is_little_endian = True
+        ds.is_implicit_VR = False
+    ds.SOPClassUID = CT_IMAGE_STORAGE
+    ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+    ds.PatientName = "^".join(patient)
+    ds.PatientID = patient_id
+    ds.PatientBirthDate = "19700101"
+    ds.PatientSex = "M"
+    ds.StudyDate = "20240101"
+    ds.StudyDescription = "TC TORAX"
+    ds.StudyInstanceUID = study_uid or generate_uid()
+    ds.SeriesInstanceUID = series_uid or generate_uid()
+    ds.Manufacturer = "SIEMENS"
+    ds.ManufacturerModelName = "SOMATOM"
+    ds.Modality = "CT"
+    ds.SliceThickness = "1.0"
+    ds.InstanceNumber = index + 1
+    ds.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+    ds.ImagePositionPatient = [0, 0, float(index)]
+    ds.PixelSpacing = [0.7, 0.7]
+    ds.RescaleSlope = 1
+    ds.RescaleIntercept = -1024
+    ds.Rows = rows
+    ds.Columns = columns
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.BitsAllocated = 16
+    ds.BitsStored = 16
+    ds.HighBit = 15
+    ds.PixelRepresentation = 1
+    if with_pixels:
+        pixels = (np.arange(rows * columns, dtype=np.int32) % 2048 - 1024 + index).astype(np.int16)
+        ds.PixelData = pixels.reshape(rows, columns).tobytes()
+        if transfer_syntax is not None:
+            # Ex.: RLELossless, que o pydicom comprime sem dependências extras
+            ds.compress(transfer_syntax)
+    return ds
+
+
+def write_series(folder, count, rows=512, columns=512, with_pixels=True, extension=".dcm", **kwargs):
+    os.makedirs(folder, exist_ok=True)
+    kwargs.setdefault("study_uid", generate_uid())
+    kwargs.setdefault("series_uid", generate_uid())
+    paths = []
+    for i in range(count):
+        ds = make_slice(i, rows, columns, with_pixels=with_pixels, **kwargs)
+        path = os.path.join(folder, f"IM{i:05d}{extension}")
+        ds.save_as(path)
+        paths.append(path)
+    return paths
+
+
+def write_tree(root, patients, series_per_patient, slices_per_series, **kwargs):
+    paths = []
+    for p in range(patients):
+        patient_id = f"{p:06d}"
+        study_uid = generate_uid()
+        for s in range(series_per_patient):
+            folder = os.path.join(root, f"PAC{patient_id}", f"SE{s:03d}")
+            paths += write_series(folder, slices_per_series, patient_id=patient_id,
+                                  patient=(f"Paciente{p}", "Teste"), study_uid=study_uid, **kwargs)
+    return paths
@@ -0,0 +1,101 @@
+# cache_utils.py
+import os
+import sys
+import json
+import sqlite3
+
+
+def user_cache_dir(app_name="dicom_info"):
+    # Pasta de cache do usuário em cada sistema (LOCALAPPDATA, ~/Library/Caches ou XDG_CACHE_HOME)
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    elif sys.platform == "darwin":
+        base = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    path = os.path.join(base, app_name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class ScanCache:
+    # Registros da tabela por arquivo, válidos enquanto (caminho, tamanho, mtime_ns) não mudarem.
+    # version identifica o formato do registro; ao mudar, o cache antigo é descartado.
+    # Guarda também os arquivos que não são DICOM, pela chave de scan_utils.verdict_key (inode) e com a
+    # pasta, para serem consultados e descartados pasta a pasta como os registros.
+
+    def __init__(self, path=None, version=1):
+        self.path = path or os.path.join(user_cache_dir(), "scan_cache.sqlite3")
+        # A conexão é usada por uma análise de cada vez, mas cada análise roda na sua própria thread
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != version:
+            self.connection.execute("DROP TABLE IF EXISTS files")
+            self.connection.execute("DROP TABLE IF EXISTS rejected")
+            self.connection.execute(f"PRAGMA user_version = {int(version)}")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, folder TEXT NOT NULL,"
+            " size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, record TEXT NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS files_folder ON files (folder)")
+        if "folder" not in {row[1] for row in self.connection.execute("PRAGMA table_info(rejected)")}:
+            # Tabela sem a pasta (versão anterior): os vereditos são refeitos na próxima varredura
+            self.connection.execute("DROP TABLE IF EXISTS rejected")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS rejected ("
+            " key TEXT PRIMARY KEY, folder TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS rejected_folder ON rejected (folder)")
+        self.connection.commit()
+
+    def folder_records(self, folder):
+        # {caminho: (tamanho, mtime_ns, registro)} de todos os arquivos em cache diretamente na pasta
+        rows = self.connection.execute("SELECT path, size, mtime_ns, record FROM files WHERE folder = ?", (folder,))
+        return {path: (size, mtime_ns, json.loads(record)) for path, size, mtime_ns, record in rows}
+
+    def store(self, entries):
+        # entries: [(caminho, pasta, tamanho, mtime_ns, registro)]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO files (path, folder, size, mtime_ns, record) VALUES (?, ?, ?, ?, ?)",
+                [(path, folder, size, mtime_ns, json.dumps(record, ensure_ascii=False))
+                 for path, folder, size, mtime_ns, record in entries])
+
+    def folder_rejected(self, folder):
+        # {chave: (tamanho, mtime_ns)} dos arquivos da pasta classificados como não DICOM
+        rows = self.connection.execute("SELECT key, size, mtime_ns FROM rejected WHERE folder = ?", (folder,))
+        return {key: (size, mtime_ns) for key, size, mtime_ns in rows}
+
+    def store_rejected(self, entries):
+        # entries: [(chave, pasta, tamanho, mtime_ns)]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO rejected (key, folder, size, mtime_ns) VALUES (?, ?, ?, ?)", entries)
+
+    def evict(self, paths):
+        with self.connection:
+            self.connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths])
+
+    def evict_rejected(self, keys):
+        with self.connection:
+            self.connection.executemany("DELETE FROM rejected WHERE key = ?", [(key,) for key in keys])
+
+    def evict_missing_folders(self, directory, seen_folders, unreadable=()):
+        # Remove as pastas sob directory que não apareceram na última varredura completa, exceto as que
+        # estão em unreadable ou abaixo delas (não puderam ser listadas, não foram removidas)
+        kept = [os.path.join(folder, "") for folder in unreadable]
+        prefix = os.path.join(directory, "")
+        # Intervalo [prefixo, prefixo com o separador incrementado) usa o índice de folder
+        prefix_end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        cached_folders = [folder for (folder,) in self.connection.execute(
+            "SELECT folder FROM files WHERE folder = ? OR (folder >= ? AND folder < ?)"
+            " UNION SELECT folder FROM rejected WHERE folder = ? OR (folder >= ? AND folder < ?)",
+            (directory, prefix, prefix_end) * 2)]
+        missing = [(folder,) for folder in cached_folders if folder not in seen_folders
+                   and folder not in unreadable and not any(folder.startswith(parent) for parent in kept)]
+        with self.connection:
+            self.connection.executemany("DELETE FROM files WHERE folder = ?", missing)
+            self.connection.executemany("DELETE FROM rejected WHERE folder = ?", missing)
+
+    def close(self):
+        self.connection.close()
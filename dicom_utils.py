@@ -1,46 +1,77 @@
 import os
-import pydicom
-import vtk
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, PhotoImage
-from datetime import datetime
-from threading import Thread
-from ttkthemes import ThemedTk
-from PIL import Image, ImageTk
-
-# ... (funções anteriores permanecem inalteradas)
-
-def view_dicom_series(patient_key, dicom_files):
-    viewer_window = tk.Toplevel(root)
-    viewer_window.title(f"Visualização DICOM - {patient_key}")
-
-    render_window = vtk.vtkRenderWindow()
-    render_window.SetWindowName(f"Visualização DICOM - {patient_key}")
-    render_window.SetSize(800, 600)
+import time
+import numpy as np
+from volume_utils import load_volume, VolumeCache, WindowLUT, WINDOW_PRESETS
+
+# vtk e matplotlib (com pygetwindow) são importados dentro das funções que os usam: abrir a tela
+# principal não carrega nenhum dos dois, só o primeiro uso do visualizador correspondente.
+
+def view_dicom_series(patient_key, dicom_files, series_uid=None):
+    # dicom_files: a pasta da série (coluna "Pasta" da tabela) ou uma lista de arquivos dela.
+    # A série é decodificada uma vez (ou lida do VolumeCache) e exibida numa única sessão VTK.
+    folder = dicom_files if isinstance(dicom_files, str) else os.path.dirname(dicom_files[0])
+    volume = load_volume(folder, VolumeCache(), os.cpu_count() or 1, series_uid=series_uid)
+    view_volume(volume, f"Visualização DICOM - {patient_key}")
+
+
+def volume_to_vtk_image(volume):
+    # vtkImageData sobre a memória do próprio volume (numpy_support sem deep copy): x = coluna,
+    # y = linha, z = fatia, com o espaçamento real da série
+    import vtk
+    from vtk.util import numpy_support
+    data = np.ascontiguousarray(volume.data)
+    slices, rows, columns = data.shape
+    image = vtk.vtkImageData()
+    image.SetDimensions(columns, rows, slices)
+    image.SetSpacing(volume.pixel_spacing[1], volume.pixel_spacing[0], volume.slice_spacing)
+    image.GetPointData().SetScalars(numpy_support.numpy_to_vtk(data.reshape(-1), deep=False))
+    return image
+
+
+def view_volume(volume, title="Visualização DICOM"):
+    import vtk
+    viewer = vtk.vtkImageViewer2()
+    viewer.SetInputData(volume_to_vtk_image(volume))
+    viewer.SetSliceOrientationToXY()
 
-    renderer = vtk.vtkRenderer()
-    render_window.AddRenderer(renderer)
-    render_window_interactor = vtk.vtkRenderWindowInteractor()
+    # Janela da série (ou partes moles) convertida de HU para os valores brutos do volume
+    center, width = volume.window or WINDOW_PRESETS["Partes moles"]
+    slope, intercept = float(volume.slopes[0]) or 1.0, float(volume.intercepts[0])
+    viewer.SetColorWindow(width / slope)
+    viewer.SetColorLevel((center - intercept) / slope)
 
-    viewer = vtk.vtkImageViewer2()
+    render_window = viewer.GetRenderWindow()
+    render_window.SetSize(800, 600)
+    render_window_interactor = vtk.vtkRenderWindowInteractor()
     viewer.SetupInteractor(render_window_interactor)
-    viewer.SetRenderer(renderer)
+    viewer.SetSlice(len(volume) // 2)
+    viewer.Render()
+
+    # A linha 0 do DICOM fica no topo: olha a fatia por trás, com y para baixo
+    camera = viewer.GetRenderer().GetActiveCamera()
+    focal_point, position = camera.GetFocalPoint(), camera.GetPosition()
+    camera.SetPosition(focal_point[0], focal_point[1], 2 * focal_point[2] - position[2])
+    camera.SetViewUp(0, -1, 0)
 
-    for dicom_file in dicom_files:
-        dicom_path = os.path.join(main_directory, patient_key, dicom_file)
-        try:
-            ds = pydicom.dcmread(dicom_path, force=True)
-            reader = vtk.vtkDICOMImageReader()
-            reader.SetFileName(dicom_path)
-            viewer.SetInputConnection(reader.GetOutputPort())
-            viewer.Render()
+    def show_slice(step):
+        viewer.SetSlice(min(max(viewer.GetSlice() + step, viewer.GetSliceMin()), viewer.GetSliceMax()))
+        render_window.SetWindowName(f"{title} - Slice {viewer.GetSlice()}")
+        viewer.Render()
 
-            render_window.Render()
+    def on_key_press(obj, event):
+        step = {"Up": 1, "Down": -1, "Prior": 10, "Next": -10}.get(obj.GetKeySym())
+        if step:
+            show_slice(step)
 
-            render_window_interactor.Start()
+    # Roda do mouse pagina as fatias (no lugar do zoom padrão do estilo de imagem)
+    style = render_window_interactor.GetInteractorStyle()
+    style.AddObserver("MouseWheelForwardEvent", lambda obj, event: show_slice(1))
+    style.AddObserver("MouseWheelBackwardEvent", lambda obj, event: show_slice(-1))
+    render_window_interactor.AddObserver("KeyPressEvent", on_key_press)
 
-        except pydicom.errors.InvalidDicomError:
-            print(f"Aviso: Ignorando arquivo DICOM inválido: {dicom_path}")
+    show_slice(0)
+    render_window_interactor.Initialize()
+    render_window_interactor.Start()
 
 
 def calculate_slice_thickness(ds):
@@ -48,47 +79,49 @@ def calculate_slice_thickness(ds):
         return "{:.2f} mm".format(float(getattr(ds, 'SliceThickness', "N/A")))
     except ValueError:
         return "N/A"
-    
-import pydicom as dicom
-import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.axes_grid1 import make_axes_locatable
-from matplotlib.widgets import CheckButtons
-import os
-import pyautogui
-import pygetwindow as gw
-
-import pydicom as dicom
-import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.axes_grid1 import make_axes_locatable
-from matplotlib.widgets import CheckButtons
-import os
-import pyautogui
-import pygetwindow as gw
-
-def plot_slices(path):
-    ct_images = os.listdir(path)
-
-    # Extrair informações cruciais dos DICOMs
-    slices = [dicom.read_file(os.path.join(path, s), force=True) for s in ct_images]
-    slices = sorted(slices, key=lambda x: x.ImagePositionPatient[2])
-
-    pixel_spacing = slices[0].PixelSpacing
-    slices_thickness = slices[0].SliceThickness
-
-    axial_aspect_ratio = pixel_spacing[1] / pixel_spacing[0]
-    sagittal_aspect_ratio = pixel_spacing[1] / slices_thickness
-    coronal_aspect_ratio = slices_thickness / pixel_spacing[0]
 
-    img_shape = list(slices[0].pixel_array.shape)
-    img_shape.append(len(slices))
-    volume3d = np.zeros(img_shape)
 
-    # Preencher o volume3d
-    for i, s in enumerate(slices):
-        array2D = s.pixel_array
-        volume3d[:, :, i] = array2D
+# Rolagem rápida: intervalo entre ticks (s) abaixo do qual a pirâmide 4x / 2x é usada
+FAST_SCROLL_4X = 0.05
+FAST_SCROLL_2X = 0.15
+# Tempo (ms) sem rolar até voltar à resolução original
+SCROLL_SETTLE_MS = 200
+
+def plot_slices(path, use_cache=True, workers=None, series_uid=None):
+    # Volume (fatias, linhas, colunas) no dtype nativo; o rescale é aplicado só nos cortes exibidos.
+    # Com o cache, reabrir a mesma série é um memmap do volume já decodificado. Sem ele, a fatia do
+    # meio aparece logo e o resto do volume é preenchido em segundo plano.
+    # Pastas com várias séries: só a série pedida (ou a maior, ver group_series) é decodificada.
+    import matplotlib.pyplot as plt
+    import pygetwindow as gw
+    from mpl_toolkits.axes_grid1 import make_axes_locatable
+    from matplotlib.transforms import Bbox
+    from matplotlib.ticker import FuncFormatter
+    from matplotlib.widgets import CheckButtons, RadioButtons
+    volume = load_volume(path, VolumeCache() if use_cache else None, workers or os.cpu_count() or 1,
+                         progressive=True, series_uid=series_uid)
+
+    pixel_spacing = volume.pixel_spacing
+    # Espaçamento real ao longo da normal, não a espessura nominal
+    slices_thickness = volume.slice_spacing
+
+    # Altura / largura de um pixel de cada corte (ver Volume.cut): PixelSpacing é (entre linhas, entre
+    # colunas); axial é (linhas, colunas), sagital (fatias, linhas) e coronal (fatias, colunas)
+    axial_aspect_ratio = pixel_spacing[0] / pixel_spacing[1]
+    sagittal_aspect_ratio = slices_thickness / pixel_spacing[0]
+    coronal_aspect_ratio = slices_thickness / pixel_spacing[1]
+
+    img_shape = [volume.shape[1], volume.shape[2], volume.shape[0]]
+
+    # Exibição em uint8 por LUT: a janela da própria série (WindowCenter/Width) ou partes moles
+    presets = dict(WINDOW_PRESETS)
+    if volume.window:
+        presets = {"DICOM": volume.window, **presets}
+    initial_window = "DICOM" if volume.window else "Partes moles"
+    lut = WindowLUT(volume.data.dtype, *presets[initial_window])
+
+    def display(orientation, index, factor=1):
+        return lut.apply(*volume.cut(orientation, index, factor))
 
     # Configurar o tamanho da tela
     fig, axs = plt.subplots(2, 2, figsize=(15, 12))  # Ajuste o tamanho aqui
@@ -107,41 +140,83 @@ def plot_slices(path):
     cax_coronal = divider_coronal.append_axes("right", size="5%", pad=0.1)
 
     # Inicialização rápida da imagem
-    im_axial = axial_ax.imshow(volume3d[:, :, img_shape[2] // 2], cmap='gray', picker=True, aspect='auto', extent=[0, img_shape[1], 1, img_shape[0]])
+    im_axial = axial_ax.imshow(display('axial', img_shape[2] // 2), cmap='gray', vmin=0, vmax=255, picker=True, aspect=axial_aspect_ratio)
     axial_ax.set_title(f"Axial - Slice {img_shape[2] // 2}")
     axial_cbar = plt.colorbar(im_axial, cax=cax_axial)
 
-    im_sagittal = sagittal_ax.imshow(volume3d[:, img_shape[1] // 2, :], cmap='gray', picker=True, aspect='auto', extent=[0, img_shape[1], 1, img_shape[0]])
+    im_sagittal = sagittal_ax.imshow(display('sagittal', img_shape[1] // 2), cmap='gray', vmin=0, vmax=255, picker=True, aspect=sagittal_aspect_ratio)
     sagittal_ax.set_title(f"Sagittal - Slice {img_shape[1] // 2}")
     sagittal_cbar = plt.colorbar(im_sagittal, cax=cax_sagittal)
 
-    im_coronal = coronal_ax.imshow(volume3d[img_shape[0] // 2, :, :].T, cmap='gray', picker=True, aspect='auto', extent=[0, img_shape[1], 1, img_shape[0]])
+    im_coronal = coronal_ax.imshow(display('coronal', img_shape[0] // 2), cmap='gray', vmin=0, vmax=255, picker=True, aspect=coronal_aspect_ratio)
     coronal_ax.set_title(f"Coronal - Slice {img_shape[0] // 2}")
     coronal_cbar = plt.colorbar(im_coronal, cax=cax_coronal)
 
+    # As barras de cor mostram HU, não o índice 0..255 da LUT
+    hu_formatter = FuncFormatter(lambda value, _: f"{lut.center - lut.width / 2 + value / 255 * lut.width:.0f}")
+    for cbar in (axial_cbar, sagittal_cbar, coronal_cbar):
+        cbar.formatter = hu_formatter
+        cbar.update_ticks()
+
     # Adicionando widgets para medir e zoom
     rax = plt.axes([0.3, 0.95, 0.4, 0.04])
     check = CheckButtons(rax, ['Medir', 'Zoom'], [False, False])
 
     class ScrollSlices:
-        def __init__(self, ax, slices, orientation):
+        def __init__(self, ax, volume, orientation):
             self.ax = ax
-            self.slices = slices
-            self.index = len(slices) // 2
+            self.volume = volume
             self.orientation = orientation
+            # Cada orientação percorre um eixo diferente do volume
+            self.cut, self.count = {
+                'vertical': ('axial', volume.shape[0]),
+                'sagittal': ('sagittal', volume.shape[2]),
+                'coronal': ('coronal', volume.shape[1]),
+            }[orientation]
+            self.index = self.count // 2
             self.measure_active = False
             self.zoom_active = False
+            # Imagem e título são animados: ficam fora do fundo salvo e são redesenhados por blit
+            self.image = ax.images[0]
+            self.image.set_animated(True)
+            self.ax.title.set_animated(True)
+            self.background = None
+            self.blit_box = None
+            self.last_scroll = 0.0
+            self.settle_timer = ax.figure.canvas.new_timer(interval=SCROLL_SETTLE_MS)
+            self.settle_timer.single_shot = True
+            self.settle_timer.add_callback(self.settle)
             self.update()
 
-        def update(self, *args):
-            if self.orientation == 'vertical':
-                self.ax.images[0].set_array(self.slices[:, :, self.index])
-            elif self.orientation == 'sagittal':
-                self.ax.images[0].set_array(self.slices[:, self.index, :].T)
-            else:
-                self.ax.images[0].set_array(self.slices[self.index, :, :].T)
+        def update(self, *args, factor=1):
+            self.image.set_array(display(self.cut, self.index, factor))
             self.ax.set_title(f"{self.orientation.capitalize()} - Slice {self.index}")
 
+        def on_draw(self, event):
+            # Depois de cada desenho completo: guarda o fundo desta área (eixo + título) e desenha os animados
+            canvas = self.ax.figure.canvas
+            title_box = self.ax.title.get_window_extent(event.renderer)
+            self.blit_box = Bbox.from_extents(self.ax.bbox.x0, self.ax.bbox.y0,
+                                              self.ax.bbox.x1, max(self.ax.bbox.y1, title_box.y1))
+            self.background = canvas.copy_from_bbox(self.blit_box)
+            self.ax.draw_artist(self.image)
+            self.ax.draw_artist(self.ax.title)
+
+        def blit(self):
+            # Redesenha só este eixo; sem suporte a blit no backend, cai no desenho completo
+            canvas = self.ax.figure.canvas
+            if self.background is None or not canvas.supports_blit:
+                canvas.draw_idle()
+                return
+            canvas.restore_region(self.background)
+            self.ax.draw_artist(self.image)
+            self.ax.draw_artist(self.ax.title)
+            canvas.blit(self.blit_box)
+
+        def settle(self):
+            self.update()
+            self.blit()
+
         def toggle_measure(self, label):
             self.measure_active = not self.measure_active
             # Adicione a lógica de medição aqui se necessário
@@ -160,15 +235,22 @@ def plot_slices(path):
         def on_scroll(self, event):
             if event.inaxes == self.ax:
                 if event.button == 'up':
-                    self.index = (self.index + 1) % len(self.slices)
+                    self.index = (self.index + 1) % self.count
                 elif event.button == 'down':
-                    self.index = (self.index - 1) % len(self.slices)
-                self.update()
-                plt.draw()
-
-    axial_scroll = ScrollSlices(axial_ax, volume3d, 'vertical')
-    sagittal_scroll = ScrollSlices(sagittal_ax, volume3d, 'sagittal')
-    coronal_scroll = ScrollSlices(coronal_ax, volume3d, 'coronal')
+                    self.index = (self.index - 1) % self.count
+                # Rolando rápido, mostra o nível reduzido; parado, volta à resolução original
+                now = time.perf_counter()
+                interval, self.last_scroll = now - self.last_scroll, now
+                factor = 4 if interval < FAST_SCROLL_4X else 2 if interval < FAST_SCROLL_2X else 1
+                self.update(factor=factor)
+                self.blit()
+                self.settle_timer.stop()
+                if factor > 1:
+                    self.settle_timer.start()
+
+    axial_scroll = ScrollSlices(axial_ax, volume, 'vertical')
+    sagittal_scroll = ScrollSlices(sagittal_ax, volume, 'sagittal')
+    coronal_scroll = ScrollSlices(coronal_ax, volume, 'coronal')
 
     check.on_clicked(axial_scroll.toggle_measure)
     check.on_clicked(axial_scroll.toggle_zoom)
@@ -176,6 +258,41 @@ def plot_slices(path):
     fig.canvas.mpl_connect('scroll_event', axial_scroll.on_scroll)
     fig.canvas.mpl_connect('scroll_event', sagittal_scroll.on_scroll)
     fig.canvas.mpl_connect('scroll_event', coronal_scroll.on_scroll)
+    for scroll in (axial_scroll, sagittal_scroll, coronal_scroll):
+        fig.canvas.mpl_connect('draw_event', scroll.on_draw)
+    # Troca de janela: só as tabelas da LUT são refeitas
+    def change_window(label):
+        lut.set_window(*presets[label])
+        for scroll in (axial_scroll, sagittal_scroll, coronal_scroll):
+            scroll.update()
+        fig.canvas.draw_idle()
+
+    axs[1, 1].set_title("Janela")
+    window_buttons = RadioButtons(axs[1, 1], list(presets), active=list(presets).index(initial_window))
+    window_buttons.on_clicked(change_window)
+
+    # O matplotlib só guarda referências fracas dos callbacks; a figura mantém os objetos vivos
+    fig.viewer_widgets = (axial_scroll, sagittal_scroll, coronal_scroll, check, window_buttons)
+
+    # Níveis 2x e 4x para a rolagem rápida, montados em segundo plano
+    volume.start_pyramid()
+
+    # Enquanto o volume carrega, redesenha os cortes com as fatias que já chegaram
+    def refresh_coverage():
+        coverage = volume.coverage()
+        for scroll in (axial_scroll, sagittal_scroll, coronal_scroll):
+            scroll.update()
+        fig.suptitle(f"Carregando {coverage:.0%}" if coverage < 1 else "")
+        fig.canvas.draw_idle()
+        if coverage >= 1:
+            coverage_timer.stop()
+
+    if volume.coverage() < 1:
+        fig.suptitle(f"Carregando {volume.coverage():.0%}")
+        coverage_timer = fig.canvas.new_timer(interval=500)
+        coverage_timer.add_callback(refresh_coverage)
+        coverage_timer.start()
+        fig.canvas.mpl_connect('close_event', lambda event: volume.stop())
 
     plt.subplots_adjust(left=0.1, right=0.9, top=0.924, bottom=0.052, wspace=0.376, hspace=0.145)
     
@@ -187,8 +304,6 @@ def plot_slices(path):
         window[0].maximize()
 
 
-plt.show()
-
 # Exemplo de uso
 # plot_slices(r"H:\DICOMS\Caso William\Silva_W_37288844")
     
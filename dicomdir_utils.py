@@ -0,0 +1,50 @@
+# dicomdir_utils.py
+import os
+import pydicom as dicom
+
+DICOMDIR_NAME = "DICOMDIR"
+
+
+def is_dicomdir(name):
+    return name.upper() == DICOMDIR_NAME
+
+
+def dicomdir_key(path):
+    # Chave dos caminhos referenciados; no Windows o DICOMDIR costuma estar em maiúsculas e o disco não
+    return os.path.normcase(os.path.abspath(path))
+
+
+def read_dicomdir(path):
+    # Séries referenciadas pelo DICOMDIR: {SeriesInstanceUID: (PatientID, StudyInstanceUID, [(chave do caminho,
+    # registro IMAGE)])}. Percorre a hierarquia PATIENT/STUDY/SERIES/IMAGE pelos offsets dos registros, sem
+    # abrir nenhuma imagem (o FileSet do pydicom resolve cada caminho e é bem mais lento em discos grandes).
+    # Levanta exceção se o DICOMDIR não puder ser lido ou estiver inconsistente.
+    ds = dicom.dcmread(path, force=True)
+    folder = os.path.dirname(os.path.abspath(path))
+    records = {record.seq_item_tell: record for record in ds.DirectoryRecordSequence}
+    series = {}
+    seen = set()  # Cada registro é visitado uma vez; offsets que voltam atrás formariam um laço infinito
+    pending = [(ds.OffsetOfTheFirstDirectoryRecordOfTheRootDirectoryEntity, {})]
+    while pending:
+        offset, context = pending.pop()
+        while offset:
+            if offset in seen:
+                raise ValueError(f"Ciclo nos offsets dos registros do DICOMDIR (offset {offset})")
+            seen.add(offset)
+            record = records[offset]  # KeyError: offset que não aponta para um registro
+            offset = record.OffsetOfTheNextDirectoryRecord
+            if record.get("RecordInUseFlag", 0xFFFF) == 0:
+                continue
+            record_type = str(record.DirectoryRecordType).upper()
+            lower = dict(context, **{record_type: record})
+            if record_type == "IMAGE":
+                file_id = record.ReferencedFileID
+                file_id = [file_id] if isinstance(file_id, str) else list(file_id)
+                uid = str(lower["SERIES"].SeriesInstanceUID)
+                entry = series.setdefault(uid, (str(lower["PATIENT"].PatientID),
+                                                str(lower["STUDY"].StudyInstanceUID), []))
+                entry[2].append((dicomdir_key(os.path.join(folder, *file_id)), record))
+            child = record.get("OffsetOfReferencedLowerLevelDirectoryEntity", 0)
+            if child:
+                pending.append((child, lower))
+    return series
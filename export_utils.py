@@ -0,0 +1,115 @@
+# export_utils.py
+import os
+import csv
+import json
+from itertools import islice
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+# Linhas acumuladas antes de cada escrita; no Parquet cada lote vira um row group
+ROW_GROUP_SIZE = 50000
+
+# Uma linha por arquivo DICOM (scan_cli --group-by file), na ordem em que as pastas terminam
+FILE_COLUMNS = ("Arquivo", "Bytes", "PatientID", "Paciente", "Nascimento", "Sexo", "Idade", "Exame",
+                "Descrição do Estudo", "Fabricante", "Equipamento", "Tipo de Exame", "Espessura do Slice",
+                "StudyInstanceUID", "SeriesInstanceUID", "Posição")
+
+# Tipos das colunas no Parquet; as demais vão como texto (Idade e espessura podem ser "N/D")
+INTEGER_COLUMNS = ("Quantidade de Slices", "Bytes")
+FLOAT_COLUMNS = ("Posição",)
+
+
+def guess_format(path, default="csv"):
+    # Formato pela extensão do arquivo
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return extension if extension in EXPORT_FORMATS else default
+
+
+def file_rows(scan):
+    # Linhas por arquivo direto da saída de scan_directory: nada fica acumulado além da pasta atual
+    for _, _, records, _ in scan:
+        for record in records:
+            yield [record.get(column) for column in FILE_COLUMNS]
+
+
+class CsvExporter:
+    def __init__(self, stream, columns):
+        self.stream = stream
+        self.writer = csv.writer(stream)
+        self.writer.writerow(columns)
+
+    def write_group(self, rows):
+        self.writer.writerows(rows)
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class JsonlExporter:
+    def __init__(self, stream, columns):
+        self.stream = stream
+        self.columns = columns
+
+    def write_group(self, rows):
+        self.stream.writelines(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + "\n" for row in rows)
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class ParquetExporter:
+    # Cada write_group é um row group: a memória fica limitada ao lote, qualquer que seja o total
+    def __init__(self, stream, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.columns = columns
+        self.schema = pa.schema([(name, pa.int64() if name in INTEGER_COLUMNS else
+                                  pa.float64() if name in FLOAT_COLUMNS else pa.string()) for name in columns])
+        self.writer = pq.ParquetWriter(stream, self.schema)
+
+    def write_group(self, rows):
+        arrays = []
+        for index, field in enumerate(self.schema):
+            values = [row[index] for row in rows]
+            if field.type == self.pa.string():
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(self.pa.array(values, field.type))
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema), row_group_size=len(rows))
+
+    def close(self):
+        self.writer.close()
+
+
+EXPORTERS = {"csv": CsvExporter, "jsonl": JsonlExporter, "parquet": ParquetExporter}
+
+
+def export_rows(rows, stream, export_format, columns, row_group_size=ROW_GROUP_SIZE):
+    # Escreve rows (sequências na ordem de columns) em lotes de row_group_size; devolve quantas linhas
+    # saíram. O stream é binário para Parquet e de texto (newline="") para CSV e JSONL.
+    if row_group_size <= 0:
+        raise ValueError(f"row_group_size precisa ser positivo: {row_group_size}")
+    exporter = EXPORTERS[export_format](stream, columns)
+    rows = iter(rows)
+    count = 0
+    try:
+        while True:
+            group = list(islice(rows, row_group_size))
+            if not group:
+                break
+            exporter.write_group(group)
+            count += len(group)
+    finally:
+        exporter.close()
+    return count
+
+
+def export_to_file(rows, filename, columns, export_format=None, row_group_size=ROW_GROUP_SIZE):
+    export_format = export_format or guess_format(filename)
+    if export_format == "parquet":
+        with open(filename, "wb") as stream:
+            return export_rows(rows, stream, export_format, columns, row_group_size)
+    with open(filename, "w", newline="", encoding="utf-8") as stream:
+        return export_rows(rows, stream, export_format, columns, row_group_size)
@@ -1,14 +1,19 @@
 ""# gui_utils.py
+import sys
+import queue
+import traceback
+from array import array
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from dicom_utils import view_dicom_series, calculate_slice_thickness
 
-def open_viewer_window(patient_key, dicom_files):
-    viewer_window = tk.Toplevel()
-    viewer_window.title("Visualizador de DICOM")
+# Acima disso, linhas novas ou alteradas numa tabela ordenada custam mais inseridas uma a uma
+# (cada inserção desloca o array de order) do que reordenando tudo
+SORTED_INSERT_LIMIT = 256
 
-    # Adicione a lógica para exibir a série DICOM na nova janela
-    view_dicom_series(patient_key, dicom_files, viewer_window)
+def open_viewer_window(patient_key, dicom_files):
+    # O visualizador VTK abre a sua própria janela; dicom_utils (vtk, matplotlib) só é importado aqui
+    from dicom_utils import view_dicom_series
+    view_dicom_series(patient_key, dicom_files)
 
 def update_table(new_directory):
     # Sua implementação aqui
@@ -36,14 +41,265 @@ def on_startup(event=None):
     tree.tag_bind("#0", "<Button-3>", lambda event: show_context_menu(event, tree, "#0"))
 
 
-def format_date(date_str):
-    return f"{date_str[6:8]}/{date_str[4:6]}/{date_str[0:4]}"
+class UIUpdateQueue:
+    # Threads de trabalho não podem mexer nos widgets: elas chamam put(função, *args) e o loop
+    # do Tk executa até batch_size dessas chamadas por vez, chamando after_batch uma vez por lote
+    def __init__(self, root, batch_size=500, interval=50, after_batch=None):
+        self.root = root
+        self.batch_size = batch_size
+        self.interval = interval
+        self.after_batch = after_batch
+        self.queue = queue.SimpleQueue()
+        self.root.after(self.interval, self.drain)
 
+    def put(self, func, *args):
+        self.queue.put((func, args))
 
-def extract_clean_name(given_name, family_name):
-    given_name = ''.join(char for char in given_name if char.isalpha() or char.isspace())
-    family_name = ''.join(char for char in family_name if char.isalpha() or char.isspace())
-    return f"{given_name.strip()} {family_name.strip()}"
-    
-def get_sex(ds):
-    return getattr(ds, 'PatientSex', "N/A")
\ No newline at end of file
+    def clear(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def drain(self):
+        processed = 0
+        try:
+            while processed < self.batch_size:
+                try:
+                    func, args = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                processed += 1
+                # Uma chamada com erro (ex.: TclError de um widget já destruído) não pode parar a fila
+                try:
+                    func(*args)
+                except Exception:
+                    print(f"Aviso: erro ao atualizar a interface ({getattr(func, '__name__', func)})", file=sys.stderr)
+                    traceback.print_exc()
+            if processed and self.after_batch:
+                self.after_batch()
+        finally:
+            # Com a fila ainda cheia, devolve o controle ao Tk e volta logo em seguida
+            self.root.after(1 if not self.queue.empty() else self.interval, self.drain)
+
+
+class VirtualTable:
+    # Mostra um ResultStore em uma ttk.Treeview mantendo como itens do Tk só as linhas visíveis.
+    # Os itens são reaproveitados ao rolar e a barra de rolagem trabalha sobre os índices de order.
+    # format_row converte uma linha do store em (texto, valores) da Treeview.
+    def __init__(self, tree, scrollbar, store, format_row):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.store = store
+        self.format_row = format_row
+        self.order = array('q')  # ids das linhas do store, na ordem exibida
+        self.sort_column = None
+        self.sort_reverse = False
+        self.sort_values = None  # valores brutos da coluna ordenada com que cada linha foi posicionada
+        self.changed = set()  # linhas alteradas desde a última leitura, ver update_rows
+        self.filter_rows = None  # conjunto de ids a mostrar (resultado da busca) ou None para todos
+        self.selected = set()
+        self.first = 0
+        self.visible_rows = 1
+        self.slots = []  # itens do Tk reaproveitados, de cima para baixo
+        self.slot_rows = {}  # item do Tk -> id da linha mostrada nele
+        self.loaded_version = -1
+        self.loaded_rows = 0
+        self.loaded_deletions = 0
+
+        tree.configure(yscrollcommand="")
+        scrollbar.configure(command=self.yview)
+        tree.bind("<Configure>", self.on_resize, add="+")
+        tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        tree.bind("<Button-5>", lambda event: self.scroll(3))
+        tree.bind("<<TreeviewSelect>>", self.on_select, add="+")
+
+    def update_rows(self, row_ids):
+        # Linhas novas ou alteradas no store: com a tabela ordenada, só elas mudam de posição
+        self.changed.update(row_ids)
+        self.refresh()
+
+    def reload(self):
+        store = self.store
+        changed, self.changed = self.changed, set()
+        incremental = store.deletions == self.loaded_deletions
+        row_ids = store.row_ids(self.loaded_rows if incremental else 0)
+        if self.filter_rows is not None:
+            row_ids = array('q', (row_id for row_id in row_ids if row_id in self.filter_rows))
+        if (incremental and self.sort_column is not None and self.sort_values is not None
+                and len(row_ids) + len(changed) <= SORTED_INSERT_LIMIT):
+            # Poucas linhas novas ou alteradas: entram na ordem atual por busca binária, sem reordenar tudo
+            self.insert_sorted(row_ids, [row_id for row_id in changed if row_id < self.loaded_rows
+                                         and (self.filter_rows is None or row_id in self.filter_rows)])
+        elif incremental and self.sort_column is None:
+            # Só chegaram linhas novas: acrescenta sem reler o store inteiro
+            self.order.extend(row_ids)
+        else:
+            if not incremental:
+                self.order = array('q')
+            self.order.extend(row_ids)
+            if self.sort_column is not None:
+                self.order = store.sorted_ids(self.sort_column, self.sort_reverse, self.order)
+                self.sort_values = store.data[self.sort_column].raw()
+        self.loaded_version = store.version
+        self.loaded_rows = len(store.alive)
+        self.loaded_deletions = store.deletions
+
+    def insert_sorted(self, new_ids, changed_ids):
+        # Reposiciona as linhas alteradas cujo valor na coluna ordenada mudou e insere as novas por
+        # busca binária. As buscas usam sort_values, os valores com que as linhas estão em order, então
+        # order continua ordenada a cada passo.
+        column = self.store.data[self.sort_column]
+        values = self.sort_values
+        values.extend(column.raw(len(values)))
+        moved = []
+        for row_id in changed_ids:
+            value = column.raw_value(row_id)
+            if value != values[row_id]:
+                start, end = self.sorted_range(values[row_id], column.raw_key())
+                del self.order[self.order.index(row_id, start, end)]
+                values[row_id] = value
+                moved.append(row_id)
+        for row_id in moved + list(new_ids):
+            self.order.insert(self.sorted_range(values[row_id], column.raw_key())[1], row_id)
+
+    def sorted_range(self, value, raw_key):
+        # [início, fim) das linhas de order empatadas com value, em ordem crescente de chave (ou
+        # decrescente, com sort_reverse); o bisect da biblioteca não trata a ordem decrescente
+        values, order, target = self.sort_values, self.order, raw_key(value)
+
+        def position(right):
+            low, high = 0, len(order)
+            while low < high:
+                middle = (low + high) // 2
+                current = raw_key(values[order[middle]])
+                if current == target:
+                    before = right
+                else:
+                    before = current > target if self.sort_reverse else current < target
+                if before:
+                    low = middle + 1
+                else:
+                    high = middle
+            return low
+
+        return position(False), position(True)
+
+    def reset(self):
+        self.order = array('q')
+        self.sort_values = None
+        self.changed.clear()
+        self.filter_rows = None
+        self.selected.clear()
+        self.first = 0
+        self.loaded_version = -1
+        self.loaded_rows = 0
+        self.loaded_deletions = self.store.deletions
+        self.refresh()
+
+    def sort(self, column, reverse=False):
+        self.sort_column = column
+        self.sort_reverse = reverse
+        self.loaded_version = -1
+        self.loaded_deletions = -1  # força a releitura completa
+        self.refresh()
+
+    def set_filter(self, row_ids, keep_position=False):
+        self.filter_rows = row_ids
+        if not keep_position:
+            self.first = 0
+        self.loaded_version = -1
+        self.loaded_deletions = -1  # força a releitura completa
+        self.refresh()
+
+    def update_filter(self, row_ids, matches):
+        # Atualiza o filtro só para as linhas em row_ids (novas ou alteradas); matches(id) diz se a
+        # linha entra. Linhas novas são acrescentadas por reload; só uma linha já carregada que entra
+        # ou sai do filtro obriga a releitura completa.
+        self.changed.update(row_ids)
+        reload_all = False
+        for row_id in row_ids:
+            inside = matches(row_id)
+            if inside == (row_id in self.filter_rows):
+                continue
+            if inside:
+                self.filter_rows.add(row_id)
+            else:
+                self.filter_rows.discard(row_id)
+            if row_id < self.loaded_rows:
+                reload_all = True
+        if reload_all:
+            self.loaded_version = -1
+            self.loaded_deletions = -1
+        self.refresh()
+
+    def refresh(self):
+        if self.loaded_version != self.store.version:
+            self.reload()
+        total = len(self.order)
+        self.first = max(0, min(self.first, total - self.visible_rows))
+        rows = self.order[self.first:self.first + self.visible_rows]
+
+        while len(self.slots) < len(rows):
+            self.slots.append(self.tree.insert("", "end"))
+        while len(self.slots) > len(rows):
+            item = self.slots.pop()
+            self.slot_rows.pop(item, None)
+            self.tree.delete(item)
+
+        selection = []
+        for item, row_id in zip(self.slots, rows):
+            text, values = self.format_row(self.store.row(row_id))
+            self.tree.item(item, text=text, values=values)
+            self.slot_rows[item] = row_id
+            if row_id in self.selected:
+                selection.append(item)
+        self.tree.selection_set(selection)
+
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def row_for_item(self, item):
+        return self.slot_rows.get(item)
+
+    def scroll(self, rows):
+        self.first += rows
+        self.refresh()
+        return "break"
+
+    def scroll_to(self, row_id):
+        try:
+            self.first = self.order.index(row_id)
+        except ValueError:
+            return
+        self.refresh()
+
+    def yview(self, *args):
+        # Mesmo protocolo do comando da Scrollbar do Tk: moveto fração | scroll n units/pages
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.order))
+            self.refresh()
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    def on_mouse_wheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def on_resize(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # Desconta a linha do cabeçalho
+        visible_rows = max(1, event.height // row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.refresh()
+
+    def on_select(self, event):
+        # Mantém a seleção do usuário no store, para ela sobreviver à rolagem
+        selected_items = set(self.tree.selection())
+        for item, row_id in self.slot_rows.items():
+            if item in selected_items:
+                self.selected.add(row_id)
+            else:
+                self.selected.discard(row_id)
@@ -1,57 +1,35 @@
 import os
-from numpy import roots
-import pydicom as dicom
-from pydicom.data import get_testdata_files
-from pydicom.errors import InvalidDicomError
+import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
-from datetime import datetime
-from threading import Thread
+from threading import Thread, Lock, Event
 from ttkthemes import ThemedTk
-from PIL import Image, ImageTk
-from dicom_utils import plot_slices
 from gui_utils import open_viewer_window, update_table, on_double_click_column_resize, filter_by_name, on_startup
-from gui_utils import format_date, extract_clean_name, get_sex
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.lib.utils import ImageReader
-from reportlab.platypus import PageBreak, Table, TableStyle, SimpleDocTemplate
-from reportlab.lib import colors, pagesizes  # Adiciona a importação da biblioteca pagesizes
-from reportlab.platypus import PageBreak, Table, TableStyle, SimpleDocTemplate, Image as RLImage
+from gui_utils import UIUpdateQueue, VirtualTable
+from store_utils import ResultStore, SearchIndex
+from scan_utils import scan_directory, count_files, RECORD_VERSION
+from aggregate_utils import StudyAggregator, GROUP_LEVELS
+from cache_utils import ScanCache, user_cache_dir
+from stats_utils import ScanStats, format_eta
+from export_utils import export_to_file
 import subprocess
-from concurrent.futures import ThreadPoolExecutor
-from functools import partial
-import zipfile
+import time
+import argparse
 # from app_test import Application
+# matplotlib, vtk e reportlab só são importados quando o visualizador ou o relatório são usados
+# (ver gui_utils.open_viewer_window e generate_pdf_report_and_open); benchmarks/bench_import_time.py
+# acompanha o tempo de abertura.
 
 
-def calculate_slice_thickness(ds):
-    try:
-        return "{:.2f} mm".format(float(getattr(ds, 'SliceThickness', "N/A")))
-    except ValueError:
-        return "N/A"
-    
-def calculate_age(birth_date_str):
-    try:
-        birth_date = datetime.strptime(birth_date_str, "%Y%m%d")
-        current_date = datetime.now()
-        age = current_date.year - birth_date.year -- ((current_date.month, current_date.day) < (birth_date.month, birth_date.day))
-        return age
-    except ValueError:
-        return "N/D"
-
 # Modifique a lista de cabeçalhos para incluir apenas as colunas desejadas
 headers = ["Paciente", "Nasicmento" , "Sexo", "Idade", "Exame", "Descrição do Estudo", "Quantidade de Slices", "Espessura do Slice"]
 
-def get_table_data(tree):
-    # Obtém os cabeçalhos da tabela
-    headers = tree["columns"]
-    # Obtém os dados das linhas da tabela
-    data = []
-    for item in tree.get_children():
-        row_values = tree.item(item, "values")
-        data.append([tree.item(item, "text")] + [row_values[headers.index(column)] for column in headers])
+def get_table_data(store, row_ids=None):
+    # Lê os cabeçalhos e as linhas direto do ResultStore, sem passar pelos itens da Treeview
+    row_ids = store.row_ids() if row_ids is None else row_ids
+    data = [list(store.row(row_id)) for row_id in row_ids]
     # Retorna os cabeçalhos e os dados da tabela
-    return [headers] + data
+    return [list(store.columns)] + data
 
 """ def show_context_menu(event, tree, column):
     print(f"Column: {column}, Event: {event}")
@@ -93,104 +71,71 @@ def edit_patient_name(event):
 
 
 
-def generate_pdf_report_and_open(tree):
-    
-# Mapeamento dos índices das colunas para os nomes dos cabeçalhos
-    header_mapping = {
-        0: "Nome do paciente",
-        1: "Data de nascimento",
-        3: "Idade",
-        2: "Sexo",
-        4: "Data do exame",
-        6: "Fabricante",
-        7: "Equipamento",
-        9: "Quantidade de Slices",
-        10: "Espessura do Slice"
-        }
-    
-    # Obtém os dados da tabela
-    table_data = get_table_data(tree)
-    # Seleciona apenas as colunas desejadas (colunas 1, 2, 4, 5, 7, 8, 10 e 11)
-    selected_columns_indices = [0, 1, 3, 2, 4, 6, 7, 9]
-    table_data_selected = [[row[i] for i in selected_columns_indices] for row in table_data]
-    # Renomeia os cabeçalhos das colunas
-    headers = [header_mapping.get(i, "") for i in selected_columns_indices]
-    table_data_selected.insert(1, headers)
-    # Define o nome do arquivo PDF
-    filename = "dicom_report.pdf"
-    # Cria um documento PDF em modo paisagem
-    pdf = SimpleDocTemplate(filename, pagesize=landscape(letter))
-    # Adiciona os dados da tabela ao PDF, excluindo a primeira linha (cabeçalhos)
-    table = Table(table_data_selected[1:], repeatRows=1)
-    # Define o estilo da tabela
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONT', (0, 0), (-1, -1), 'Helvetica', 8)  # Reduz o tamanho da fonte da tabela
-    ]))
-    
-    # Define o estilo do cabeçalho da tabela
-    header_style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONT', (0, 0), (-1, -1), 'Helvetica', 9)  # Reduz o tamanho da fonte do cabeçalho
-    ])
-
-    # Aplica o estilo do cabeçalho à primeira linha da tabela
-    for i, header in enumerate(headers):
-        header_style.add('BACKGROUND', (i, 0), (i, 0), colors.grey)
-        header_style.add('TEXTCOLOR', (i, 0), (i, 0), colors.whitesmoke)
-    
-    # Adiciona a tabela ao documento PDF
-    table.setStyle(header_style)
-     # Adiciona o logo ao início do documento PDF
-    logo_path = "./img/logo.png"  # Substitua pelo caminho real do seu arquivo de logo
-    original_logo = RLImage(logo_path)  # Adiciona um salto de página após o logo
-    scaled_logo = RLImage(logo_path, width=320, height=100)
-    pdf.build([scaled_logo, table])
-    
-    # Abre o relatório PDF no visualizador padrão do sistema
-    subprocess.Popen([filename], shell=True)
-
-def get_folder_size(folder):
-    total_size = 0
-    for dirpath, dirnames, filenames in os.walk(folder):
-        for filename in filenames:
-            if filename.lower().endswith('.dcm'):
-                filepath = os.path.join(dirpath, filename)
-                total_size += os.path.getsize(filepath)
-    total_size_mb = total_size / (1024 * 1024)
-    total_size_mb_int = round(total_size_mb)
-    return "{} MB".format(int(total_size_mb_int))
-
-def show_dicom_info(main_directory):
+def generate_pdf_report_and_open(store, row_ids=None, filename=None):
+    # Pergunta onde salvar quando o chamador não escolheu o arquivo
+    if filename is None:
+        filename = filedialog.asksaveasfilename(title="Salvar relatório", initialfile="dicom_report.pdf",
+                                                defaultextension=".pdf", filetypes=[("PDF", "*.pdf")])
+        if not filename:
+            return
+    from report_utils import generate_pdf_report
+    row_ids = store.row_ids() if row_ids is None else row_ids
+    # O relatório é gerado página a página direto do ResultStore (ver report_utils)
+    generate_pdf_report(store, row_ids, filename)
+
+    # Abre o relatório PDF no visualizador padrão do sistema, sem passar o nome do arquivo por um shell
+    if os.name == "nt":
+        os.startfile(filename)
+    else:
+        subprocess.Popen(["open" if sys.platform == "darwin" else "xdg-open", filename])
+
+# Intervalo (segundos) entre as verificações do modo de observação da pasta
+WATCH_INTERVAL = 10
+
+# Espera (ms) depois da última tecla antes de executar a busca
+SEARCH_DEBOUNCE_MS = 150
+
+# Intervalo (ms) de atualização da janela de progresso
+PROGRESS_INTERVAL_MS = 250
+
+
+def show_dicom_info(main_directory, workers=1, use_cache=True):
     analyzed_directories = set()
     analysis_interrupted = False  # Flag para verificar se a análise foi interrompida
+    # Sem o cache em disco, um cache em memória ainda permite reanálises incrementais na sessão
+    scan_cache = ScanCache(version=RECORD_VERSION) if use_cache else ScanCache(":memory:", version=RECORD_VERSION)
+    scan_snapshot = {}  # Estado da última varredura, usado pela reanálise incremental
+    store = ResultStore()  # Linhas da tabela; a Treeview só mostra a janela visível (VirtualTable)
+    search_index = SearchIndex()  # Nome, PatientID, descrição e data do exame -> linhas do store
+    aggregator = StudyAggregator()  # Séries da árvore inteira; as linhas são geradas por série, estudo ou paciente
+    row_items = {}  # chave do grupo (ver aggregate_utils.group_key) -> id da linha no store
+    changed_rows = set()  # Linhas inseridas ou alteradas desde o último refresh_table_layout
+    search_job = None  # Busca agendada pelo debounce da digitação
+    scan_lock = Lock()  # Uma varredura por vez (análise completa, reanálise ou observação)
+    watch_stop = Event()
+
+    def reset_scan_state():
+        ui_queue.clear()  # Descarta linhas ainda pendentes de uma análise anterior
+        analyzed_directories.clear()
+        scan_snapshot.clear()
+        aggregator.clear()
+        row_items.clear()
+        changed_rows.clear()
+        store.clear()
+        search_index.clear()
+        table_view.reset()
 
     def update_table(new_directory, sort_by_name=False, analyze_folders=False):
-        tree.delete(*tree.get_children())
         main_directory.set(new_directory)
-        analyzed_directories.clear()
+        reset_scan_state()
+
+        if sort_by_name:
+            # A ordenação fica na view e vale também para as linhas que chegarem depois
+            table_view.sort("Paciente")
 
         if new_directory and analyze_folders:
             analyze_directory()
 
-        if sort_by_name:
-            items = list(tree.get_children())
-            items.sort(key=lambda item: tree.item(item, 'text').lower())
-            for item in items:
-                tree.move(item, "", "end")
-
     def on_close():
         nonlocal analysis_interrupted
         analysis_interrupted = True  # Set the flag to indicate that the analysis has been interrupted
@@ -215,7 +160,7 @@ def show_dicom_info(main_directory):
         analysis_interrupted = False  # Reinicia a flag ao iniciar a análise
         current_directory = main_directory.get()
         if current_directory in analyzed_directories:
-            tk.messagebox.showinfo("Diretório Já Analisado", "Este diretório já foi analisado e está na tabela.")
+            tk.messagebox.showinfo("Diretório Já Analisado", "Este diretório já foi analisado e está na tabela. Use Rescan para incluir as alterações.")
             return
 
         progress_window = tk.Toplevel(root)
@@ -234,10 +179,33 @@ def show_dicom_info(main_directory):
         progress_label = tk.Label(progress_window, text="Analyzing...Please wait.")
         progress_label.pack(pady=10)
 
+        # Indeterminada até a contagem prévia dos arquivos terminar, depois arquivos concluídos / total
         progress_bar = ttk.Progressbar(progress_window, orient="horizontal", length=300, mode="indeterminate")
         progress_bar.pack(pady=10)
         progress_bar.start()
 
+        stats = ScanStats(current_directory)
+        Thread(target=lambda: stats.set_total(count_files(current_directory)), daemon=True).start()
+
+        def refresh_progress():
+            if not progress_window.winfo_exists():
+                return
+            done, total, rate, eta = stats.progress()
+            if total is None:
+                progress_label.config(text=f"Contando arquivos... {done} analisados ({rate:.0f} arquivos/s)")
+            else:
+                if str(progress_bar["mode"]) != "determinate":
+                    progress_bar.stop()
+                    progress_bar.config(mode="determinate")
+                # O total cresce quando a varredura abre um arquivo compactado (ver count_files)
+                progress_bar.config(maximum=max(total, 1))
+                progress_bar["value"] = min(done, total)
+                progress_label.config(text=f"{done} de {total} arquivos - {rate:.0f} arquivos/s - "
+                                           f"restam {format_eta(eta)}")
+            progress_window.after(PROGRESS_INTERVAL_MS, refresh_progress)
+
+        progress_window.after(PROGRESS_INTERVAL_MS, refresh_progress)
+
         abort_button = ttk.Button(progress_window, text="Abort Analysis", command=abort_analysis, style="TButton")
         abort_button.pack(pady=10, padx=20)
 
@@ -258,92 +226,163 @@ def show_dicom_info(main_directory):
         def analyze_directory_async():
             nonlocal progress_bar, progress_label, analysis_interrupted
             try:
-                processed_files = set()
-                for root_folder, _, _ in os.walk(current_directory):
-                    if analysis_interrupted:  # Verifica se a análise foi interrompida
-                        break
-
-                    dicom_files = [f for f in os.listdir(root_folder) if f.lower().endswith('.dcm')]
-
-                    patient_info = {}
-
-                    for dicom_file in dicom_files:
-                        dicom_path = os.path.join(root_folder, dicom_file)
-                        try:
-                            if dicom_path not in processed_files:  # Check if file is already processed
-                                ds = dicom.dcmread(dicom_path, force=True)
-                                processed_files.add(dicom_path)  # Add to processed files set
-
-                            patient_name = extract_clean_name(ds.PatientName.given_name, ds.PatientName.family_name)
-                            patient_key = f"{patient_name}_{ds.PatientID}"
-                            
-
-                            if patient_key not in patient_info:
-                                patient_folder = os.path.join(current_directory, root_folder)
-                                patient_info[patient_key] = {
-                                    "Nascimento": format_date(ds.PatientBirthDate),
-                                    "Sexo": get_sex(ds),
-                                    "Idade": calculate_age(ds.PatientBirthDate),
-                                    "Exame": format_date(ds.StudyDate),
-                                    "Descrição do Estudo": getattr(ds, 'StudyDescription', "N/A"),
-                                    "Fabricante": getattr(ds, 'Manufacturer', "N/A"),
-                                    "Equipamento": getattr(ds, 'ManufacturerModelName', "N/A"),
-                                    "Tipo de Exame": getattr(ds, 'Modality', "N/A"),
-                                    "Quantidade de Slices": 0,
-                                    "Espessura do Slice": "N/A",
-                                    "Tamanho da Pasta": get_folder_size(patient_folder),
-                                    "Visualizar": "👁️",
-                                    "Pasta": patient_folder  # Adiciona a coluna para abrir a pasta
-                                }
-
-                            patient_info[patient_key]["Quantidade de Slices"] += 1
-                            patient_info[patient_key]["Espessura do Slice"] = calculate_slice_thickness(ds)
-
-                        except dicom.errors.InvalidDicomError:
-                            print(f"Aviso: Ignorando arquivo DICOM inválido: {dicom_path}")
-
-                    for patient_key, info in patient_info.items():
-                        if analysis_interrupted:  # Verifica se a análise foi interrompida
-                            break
-
-                        # Inserção na árvore com o caminho do diretório oculto
-                        item_id = tree.insert("", "end", text=f"{patient_name}", values=(
-                            info["Nascimento"],
-                            info["Sexo"],
-                            info["Idade"],
-                            info["Exame"],
-                            info["Descrição do Estudo"],
-                            info["Fabricante"],
-                            info["Equipamento"],
-                            info["Tipo de Exame"],
-                            info["Quantidade de Slices"],
-                            info["Espessura do Slice"],
-                            info["Tamanho da Pasta"],
-                            info["Visualizar"],
-                            "Clique para abrir pasta",
-                        ))
-                        # Define o caminho do diretório como valor oculto
-                        tree.set(item_id, "#13", info["Pasta"])
-
-                    for col in tree["columns"]:
-                        tree.column(col, anchor=tk.CENTER)
-
+                with scan_lock:
+                    run_scan(current_directory, should_stop=lambda: analysis_interrupted, stats=stats)
                     if not analysis_interrupted:  # Atualiza a tabela apenas se a análise não foi interrompida
                         analyzed_directories.add(current_directory)
-                        total_rows_label.config(text=f"Total number of CT scans analyzed: {len(tree.get_children())}")
-                        on_double_click_column_resize(tree)
-
             finally:
-                progress_bar.stop()
-                progress_window.destroy()
+                ui_queue.put(progress_bar.stop)
+                ui_queue.put(progress_window.destroy)
 
         analysis_thread = Thread(target=analyze_directory_async)
         analysis_thread.start()
 
+    def run_scan(directory, should_stop=None, stats=None):
+        # Usada pela análise completa e pela incremental: com o snapshot, só as pastas
+        # alteradas desde a última varredura chegam aqui, e suas linhas são refeitas no lugar.
+        # Roda fora da thread do Tk, então as linhas vão para a árvore pela ui_queue.
+        stats = ScanStats(directory) if stats is None else stats
+        for folder, folder_size, records, failures in scan_directory(
+                directory, workers=workers, should_stop=should_stop, cache=scan_cache, snapshot=scan_snapshot,
+                stats=stats):
+            if should_stop and should_stop():  # Verifica se a análise foi interrompida
+                break
+
+            for dicom_path, error in failures:
+                print(f"Aviso: Ignorando arquivo DICOM inválido: {dicom_path} ({error})")
+
+            ui_queue.put(update_folder_rows, folder, records, stats)
+
+        # Entra na fila depois das linhas, para incluir o tempo de inserção na tabela
+        ui_queue.put(dump_scan_stats, stats)
+
+    def dump_scan_stats(stats):
+        # Métricas da última varredura (contagens, etapas, arquivos mais lentos, erros por tipo)
+        stats.finish()
+        try:
+            stats.dump(os.path.join(user_cache_dir(), "scan_stats.json"))
+        except OSError as error:
+            print(f"Aviso: não foi possível gravar as métricas da varredura ({error})")
+
+    def refresh_table_layout():
+        # Chamada pela ui_queue uma vez por lote de linhas, e não a cada pasta
+        query = entry_search.get()
+        if not query.strip():
+            table_view.update_rows(changed_rows)
+        elif table_view.filter_rows is None:
+            table_view.set_filter(search_index.search(query), keep_position=True)
+        else:
+            # Com uma busca ativa, só as linhas do lote são testadas e entram ou saem do filtro
+            table_view.update_filter(changed_rows, lambda row_id: search_index.matches(
+                dict(zip(store.columns, store.row(row_id))), query))
+        changed_rows.clear()
+        for col in tree["columns"]:
+            tree.column(col, anchor=tk.CENTER)
+        total_rows_label.config(text=f"Total number of CT scans analyzed: {len(store)}")
+        on_double_click_column_resize(tree)
+
+    def format_table_row(row):
+        # Linha do store -> (texto da coluna #0, valores das demais colunas da Treeview)
+        return row[0], row[1:12] + ("👁️", row[12])  # A última coluna guarda o caminho da pasta
+
+    def update_folder_rows(folder, records, stats=None):
+        # Troca a contribuição da pasta no agregador e refaz só as linhas dos grupos afetados (thread do Tk)
+        start = time.perf_counter()
+        level = GROUP_LEVELS[group_by.get()]
+        for key in aggregator.update_folder(folder, records, level):
+            set_group_row(key, aggregator.group_row(key, level))
+        if stats is not None:
+            stats.record("tabela", time.perf_counter() - start)
+
+    def set_group_row(key, info):
+        # Insere, atualiza ou remove (info None) a linha do grupo
+        row_id = row_items.pop(key, None)
+        if row_id is not None:
+            search_index.remove(row_id, dict(zip(store.columns, store.row(row_id))))
+            if info is None:
+                store.delete(row_id)
+                return
+            store.update(row_id, info)
+        else:
+            if info is None:
+                return
+            row_id = store.append(info)
+        search_index.add(row_id, info)
+        row_items[key] = row_id
+        changed_rows.add(row_id)
+
+    def export_table():
+        # Exporta as linhas da view (filtro e ordenação atuais) em lotes
+        filename = filedialog.asksaveasfilename(title="Exportar tabela", initialfile="dicom_info.csv",
+                                                defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv"), ("Parquet", "*.parquet"),
+                                                           ("JSON Lines", "*.jsonl")])
+        if not filename:
+            return
+        # Só os ids são copiados aqui, na thread do Tk; as linhas são lidas do store à medida que os
+        # lotes são escritos (ver ResultStore.iter_rows)
+        rows = store.iter_rows(table_view.order[:])
+        columns = list(store.columns)
+
+        def export_async():
+            try:
+                count = export_to_file(rows, filename, columns)
+            except Exception as error:
+                ui_queue.put(messagebox.showerror, "Exportar tabela", f"Não foi possível exportar: {error}")
+            else:
+                ui_queue.put(messagebox.showinfo, "Exportar tabela", f"{count} linhas exportadas para {filename}")
+
+        Thread(target=export_async, daemon=True).start()
+
+    def regroup(event=None):
+        # Troca o nível das linhas (série, estudo ou paciente) a partir do agregador, sem nova varredura
+        row_items.clear()
+        changed_rows.clear()
+        store.clear()
+        search_index.clear()
+        for key, info in aggregator.rows(GROUP_LEVELS[group_by.get()]).items():
+            row_items[key] = store.append(info)
+            search_index.add(row_items[key], info)
+        table_view.reset()
+        refresh_table_layout()
+
+    def rescan_directory():
+        # Reanálise incremental: lê só os arquivos novos ou alterados e remove os que sumiram
+        current_directory = main_directory.get()
+        if current_directory not in analyzed_directories:
+            analyze_directory()
+            return
+
+        def rescan_async():
+            if scan_lock.acquire(blocking=False):
+                try:
+                    run_scan(current_directory)
+                finally:
+                    scan_lock.release()
+
+        Thread(target=rescan_async, daemon=True).start()
+
+    def toggle_watch():
+        # Observação por polling: repete a reanálise incremental a cada WATCH_INTERVAL segundos
+        if watch_folder.get():
+            watch_stop.clear()
+
+            def watch_loop():
+                while not watch_stop.wait(WATCH_INTERVAL):
+                    current_directory = main_directory.get()
+                    if current_directory in analyzed_directories and scan_lock.acquire(blocking=False):
+                        try:
+                            run_scan(current_directory)
+                        finally:
+                            scan_lock.release()
+
+            Thread(target=watch_loop, daemon=True).start()
+        else:
+            watch_stop.set()
+
     def clear_table_and_cache():
-        tree.delete(*tree.get_children())
         main_directory.set("")
-        analyzed_directories.clear()
+        reset_scan_state()
         total_rows_label.config(text="Total de Tomografias Analisadas: 0")
         entry_search.delete(0, tk.END)     # Limpa o campo de busca
 
@@ -454,7 +493,7 @@ def show_dicom_info(main_directory):
                     messagebox.showerror("Erro", "Dicom Viewer. Soon will be launched")
 
     def start_viewer_thread(patient_key, dicom_files):
-        viewer_thread = Thread(target=view_dicom_series, args=(patient_key, dicom_files))
+        viewer_thread = Thread(target=open_viewer_window, args=(patient_key, dicom_files))
         viewer_thread.daemon = True
         viewer_thread.start()                
         
@@ -473,22 +512,20 @@ def show_dicom_info(main_directory):
             column = tree.identify_column(event.x)
             if column == "#13":  # Verifica se o clique ocorreu na última coluna
                 # Recupera o caminho do diretório da linha clicada na última coluna
-                directory = tree.set(item, "#13")
+                row_id = table_view.row_for_item(item)
+                if row_id is None:
+                    return
+                directory = store.get(row_id, "Pasta")
                 os.startfile(directory)  # Abre a pasta no Windows Explorer
 
  
     def filter_by_name():
-        query = entry_search.get().lower()
-        for item in tree.get_children():
-            # Obtenha o texto do item e converta para minúsculas para comparar com a consulta
-            item_text = tree.item(item, "text").lower()
-            # Verifique se a consulta está presente no texto do item
-            if query in item_text:
-                tree.item(item, open=True)
-                tree.selection_add(item)
-            else:
-                tree.item(item, open=False)
-                tree.selection_remove(item)
+        nonlocal search_job
+        if search_job is not None:
+            root.after_cancel(search_job)
+            search_job = None
+        # Consulta o índice (nome, PatientID, descrição e data do exame) e mostra só as linhas encontradas
+        table_view.set_filter(search_index.search(entry_search.get()))
 
     def on_startup(event=None):
         # Distribui uniformemente as colunas ao iniciar o programa
@@ -506,9 +543,18 @@ def show_dicom_info(main_directory):
 
     
     def on_search_entry_change(event):
+        nonlocal search_job
         entry_text = entry_search.get()
-        entry_search.delete(0, "end")  # Limpa o conteúdo atual do campo de entrada
-        entry_search.insert(0, entry_text.upper())  # Insere o texto em maiúsculas no campo de entrada    
+        if entry_text != entry_text.upper():
+            # Só reescreve o campo quando há minúsculas, preservando a posição do cursor
+            cursor = entry_search.index(tk.INSERT)
+            entry_search.delete(0, "end")
+            entry_search.insert(0, entry_text.upper())
+            entry_search.icursor(cursor)
+        # Busca enquanto digita, com debounce para não consultar a cada tecla
+        if search_job is not None:
+            root.after_cancel(search_job)
+        search_job = root.after(SEARCH_DEBOUNCE_MS, filter_by_name)
 
     def on_enter_key(event):
         filter_by_name()
@@ -524,6 +570,8 @@ def show_dicom_info(main_directory):
 
     main_directory = tk.StringVar(value="./data2")
     analyze_on_button_click = tk.BooleanVar(value=False)
+    watch_folder = tk.BooleanVar(value=False)
+    group_by = tk.StringVar(value="Série")
 
     tree_style = ttk.Style()
     tree_style.configure("Treeview", background="white", fieldbackground="white", foreground="black")
@@ -559,18 +607,25 @@ def show_dicom_info(main_directory):
 
     btn_choose_dir = ttk.Button(frame_buttons, text="Choose Folder", command=choose_directory, style="TButton")
     btn_analyze = ttk.Button(frame_buttons, text="Analyze", command=analyze_directory, style="TButton")
+    btn_rescan = ttk.Button(frame_buttons, text="Rescan", command=rescan_directory, style="TButton")
+    chk_watch = ttk.Checkbutton(frame_buttons, text="Watch Folder", variable=watch_folder, command=toggle_watch)
+    combo_group_by = ttk.Combobox(frame_buttons, textvariable=group_by, values=list(GROUP_LEVELS),
+                                  state="readonly", width=10)
+    combo_group_by.bind("<<ComboboxSelected>>", regroup)
     btn_dark_mode = ttk.Button(frame_buttons, text="Dark Mode", command=toggle_dark_mode, style="TButton")
     btn_clear_table = ttk.Button(frame_buttons, text="Clean Table", command=clear_table_and_cache, style="TButton")
     btn_gerar_relatorio = ttk.Button(frame_buttons, text="Generate PDF Report", command=clear_table_and_cache, style="TButton")
+    btn_export = ttk.Button(frame_buttons, text="Export Table", command=export_table, style="TButton")
 
 
-    scrollbar = ttk.Scrollbar(root, orient="vertical", command=tree.yview)
+    scrollbar = ttk.Scrollbar(root, orient="vertical")
     scrollbar.grid(row=5, column=5, sticky="ns")
-    tree.configure(yscrollcommand=scrollbar.set)
+    table_view = VirtualTable(tree, scrollbar, store, format_table_row)
     entry_search = ttk.Entry(frame_buttons, style="TEntry")
     btn_search = ttk.Button(frame_buttons, text="Search by Name", command=filter_by_name, style="TButton")
     total_rows_label = tk.Label(root, text="Total number of CT scans analyzed: 0", font=("Helvetica", 14, "bold"))
     reserved_rights_label = tk.Label(root, text="Cad4Share - Dicom Info - All rights reserved", font=("Helvetica", 14))
+    ui_queue = UIUpdateQueue(root, after_batch=refresh_table_layout)
     header_image = tk.PhotoImage(file=r"img\logo.png")
    
     resized_image = header_image.subsample(2, 2)
@@ -579,13 +634,17 @@ def show_dicom_info(main_directory):
 
     btn_choose_dir.grid(row=0, column=0, pady=5, padx=5, sticky="nsew")
     btn_analyze.grid(row=0, column=1, pady=5, padx=5, sticky="nsew")
+    btn_rescan.grid(row=0, column=2, pady=5, padx=5, sticky="nsew")
+    chk_watch.grid(row=0, column=5, pady=5, padx=5, sticky="nsew")
     btn_dark_mode.grid(row=0, column=3, pady=5, padx=5, sticky="nsew")
     btn_clear_table.grid(row=0, column=4, pady=5, padx=5, sticky="nsew")
 
     entry_search.grid(row=1, column=0, columnspan=3, pady=5, padx=5, sticky="nsew")
     btn_search.grid(row=1, column=3, pady=5, padx=5, sticky="nsew")
     btn_gerar_relatorio.grid(row=1, column=4, pady=5, padx=5, sticky="nsew")
-    btn_gerar_relatorio.config(command=lambda: generate_pdf_report_and_open(tree))
+    combo_group_by.grid(row=1, column=5, pady=5, padx=5, sticky="nsew")
+    btn_export.grid(row=0, column=6, pady=5, padx=5, sticky="nsew")
+    btn_gerar_relatorio.config(command=lambda: generate_pdf_report_and_open(store, table_view.order))
    
     entry_search.bind("<KeyRelease>", on_search_entry_change)  # Adiciona o evento de liberação de tecla ao campo de entrada
     entry_search.bind("<Return>", on_enter_key)
@@ -606,6 +665,15 @@ def show_dicom_info(main_directory):
 
     root.bind("<Map>", on_startup)
     root.mainloop()
-# Substitua o caminho abaixo pelo caminho real para o diretório com suas imagens DICOM
-main_directory = "./data2"
-show_dicom_info(main_directory)
\ No newline at end of file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cad4Share - Dicom Info")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Número de processos usados para ler os cabeçalhos DICOM (1 = sem pool)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Não usa o cache de cabeçalhos em disco (relê todos os arquivos)")
+    args = parser.parse_args()
+
+    # Substitua o caminho abaixo pelo caminho real para o diretório com suas imagens DICOM
+    main_directory = "./data2"
+    show_dicom_info(main_directory, workers=max(1, args.workers), use_cache=not args.no_cache)
\ No newline at end of file
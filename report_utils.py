@@ -0,0 +1,91 @@
+# report_utils.py
+import os
+from functools import lru_cache
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+
+# (coluna do ResultStore, cabeçalho no relatório, largura em pontos)
+REPORT_COLUMNS = [
+    ("Paciente", "Nome do paciente", 170),
+    ("Nascimento", "Data de nascimento", 80),
+    ("Idade", "Idade", 45),
+    ("Sexo", "Sexo", 40),
+    ("Exame", "Data do exame", 80),
+    ("Fabricante", "Fabricante", 110),
+    ("Equipamento", "Equipamento", 110),
+    ("Quantidade de Slices", "Quantidade de Slices", 85),
+]
+
+PAGE_SIZE = landscape(letter)
+MARGIN = 36
+HEADER_HEIGHT = 22
+ROW_HEIGHT = 14
+FONT_SIZE = 9
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "img", "logo.png")
+LOGO_WIDTH, LOGO_HEIGHT = 320, 100
+
+# Estilo montado uma única vez e compartilhado pelas tabelas de todas as páginas
+REPORT_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONT', (0, 0), (-1, -1), 'Helvetica', FONT_SIZE),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+
+
+@lru_cache(maxsize=4096)
+def fit_text(text, width, font_size=FONT_SIZE):
+    # As larguras são fixas; textos maiores que a célula são cortados com reticências. Sempre medido
+    # com stringWidth (maiúsculas como W e M passam do dobro da largura média); nomes, datas e
+    # fabricantes se repetem muito, por isso o cache por valor.
+    text = str(text)
+    if stringWidth(text, "Helvetica", font_size) <= width - 6:
+        return text
+    while text and stringWidth(text + "…", "Helvetica", font_size) > width - 6:
+        text = text[:-1]
+    return text + "…"
+
+
+def generate_pdf_report(store, row_ids, filename="dicom_report.pdf", logo_path=LOGO_PATH):
+    # Gera o relatório página a página: cada página é uma Table pequena, com larguras e alturas
+    # fixas, desenhada direto no canvas. Só as linhas de uma página ficam em memória por vez.
+    headers = [header for _, header, _ in REPORT_COLUMNS]
+    col_widths = [width for _, _, width in REPORT_COLUMNS]
+    page_width, page_height = PAGE_SIZE
+    pdf = canvas.Canvas(filename, pagesize=PAGE_SIZE, pageCompression=1)
+
+    top = page_height - MARGIN
+    if logo_path and os.path.exists(logo_path):
+        # Logo no início da primeira página
+        pdf.drawImage(logo_path, (page_width - LOGO_WIDTH) / 2, top - LOGO_HEIGHT,
+                      width=LOGO_WIDTH, height=LOGO_HEIGHT, mask='auto')
+        top -= LOGO_HEIGHT + 10
+
+    page_rows = []
+    for row_id in row_ids:
+        page_rows.append([fit_text(store.get(row_id, column), width) for column, _, width in REPORT_COLUMNS])
+        if len(page_rows) == int((top - MARGIN - HEADER_HEIGHT) // ROW_HEIGHT):
+            draw_page(pdf, headers, page_rows, col_widths, top)
+            page_rows = []
+            top = page_height - MARGIN
+    if page_rows or pdf.getPageNumber() == 1:
+        draw_page(pdf, headers, page_rows, col_widths, top)
+    pdf.save()
+    return filename
+
+
+def draw_page(pdf, headers, rows, col_widths, top):
+    table = Table([headers] + rows, colWidths=col_widths, rowHeights=[HEADER_HEIGHT] + [ROW_HEIGHT] * len(rows),
+                  style=REPORT_STYLE)
+    width, height = table.wrapOn(pdf, sum(col_widths), top - MARGIN)
+    table.drawOn(pdf, (PAGE_SIZE[0] - width) / 2, top - height)
+    pdf.showPage()
@@ -0,0 +1,133 @@
+# scan_cli.py - varredura sem interface gráfica, para rodar em servidores sem display
+#
+# Uso: python scan_cli.py PASTA [-o saida.csv|saida.jsonl|saida.parquet|-] [--format csv|jsonl|parquet]
+#                         [--workers N] [--include GLOB ...] [--exclude GLOB ...] [--max-depth N] [--no-cache]
+#                         [--stats metricas.json] [--group-by series|study|patient|file] [--row-group-size N]
+#
+# Gera as mesmas linhas da tabela da interface (uma por série, estudo ou paciente), ou uma linha por
+# arquivo, gravadas em lotes à medida que saem (ver export_utils). Sai com 1 se algum arquivo não
+# pôde ser lido e com 2 em erro de uso ou falha geral. Não importa tkinter, ttkthemes, PIL nem vtk.
+import argparse
+import os
+import sys
+from scan_utils import scan_directory, RECORD_VERSION, DEFAULT_INCLUDE
+from aggregate_utils import StudyAggregator, GROUP_LEVELS
+from cache_utils import ScanCache
+from store_utils import TABLE_COLUMNS
+from stats_utils import ScanStats
+from export_utils import EXPORT_FORMATS, FILE_COLUMNS, ROW_GROUP_SIZE, export_rows, file_rows, guess_format
+
+
+def scan_rows(directory, failures, group_by="series", **scan_options):
+    # (colunas, linhas); as falhas de leitura vão para failures. Por arquivo, as linhas saem assim que
+    # cada pasta termina, com memória constante. Agrupadas, só depois da varredura inteira, porque
+    # uma série pode estar espalhada por várias pastas (a memória cresce com o número de séries).
+    def collect_failures(scan):
+        for folder, folder_size, records, folder_failures in scan:
+            failures.extend(folder_failures)
+            yield folder, folder_size, records, folder_failures
+
+    scan = collect_failures(scan_directory(directory, **scan_options))
+    if group_by == "file":
+        return FILE_COLUMNS, file_rows(scan)
+
+    def aggregated_rows():
+        aggregator = StudyAggregator()
+        for folder, _, records, _ in scan:
+            aggregator.update_folder(folder, records)
+        for row in aggregator.rows(group_by).values():
+            yield [row[column] for column in TABLE_COLUMNS]
+
+    return TABLE_COLUMNS, aggregated_rows()
+
+
+def positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"precisa ser maior que zero: {value}")
+    return number
+
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"não pode ser negativo: {value}")
+    return number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Varre uma pasta de DICOMs e exporta a tabela de exames.")
+    parser.add_argument("directory")
+    parser.add_argument("-o", "--output", default="-", help="Arquivo de saída ('-' para stdout)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS,
+                        help="Formato da saída (padrão: pela extensão de --output, ou csv)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processos para ler os cabeçalhos (1 = sem pool)")
+    parser.add_argument("--include", nargs="+", default=list(DEFAULT_INCLUDE), metavar="GLOB",
+                        help="Arquivos considerados, relativos à pasta (padrão: todos; "
+                             "os que não são DICOM são descartados pelos primeiros bytes)")
+    parser.add_argument("--exclude", nargs="+", default=[], metavar="GLOB",
+                        help="Arquivos ou pastas ignorados, relativos à pasta")
+    parser.add_argument("--max-depth", type=non_negative_int, help="Níveis de subpastas percorridos (0 = só a pasta)")
+    parser.add_argument("--no-cache", action="store_true", help="Não usa o cache de cabeçalhos em disco")
+    parser.add_argument("--group-by", choices=list(GROUP_LEVELS.values()) + ["file"], default="series",
+                        help="Uma linha por série (padrão), estudo, paciente ou arquivo")
+    parser.add_argument("--row-group-size", type=positive_int, default=ROW_GROUP_SIZE,
+                        help="Linhas por escrita (row group no Parquet)")
+    parser.add_argument("--stats", metavar="JSON",
+                        help="Grava as métricas da varredura (etapas, arquivos mais lentos, erros por tipo)")
+    args = parser.parse_args(argv)
+    if args.format is None:
+        args.format = guess_format(args.output)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.directory):
+        print(f"Pasta não encontrada: {args.directory}", file=sys.stderr)
+        return 2
+
+    binary = args.format == "parquet"
+    if binary:
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            print("A saída parquet precisa do pacote pyarrow (pip install pyarrow)", file=sys.stderr)
+            return 2
+    cache = None if args.no_cache else ScanCache(version=RECORD_VERSION)
+    failures = []
+    stats = ScanStats(os.path.abspath(args.directory))
+    try:
+        columns, rows = scan_rows(args.directory, failures, args.group_by, workers=max(1, args.workers),
+                                  cache=cache, stats=stats, include=args.include, exclude=args.exclude,
+                                  max_depth=args.max_depth)
+        if args.output == "-":
+            export_rows(rows, sys.stdout.buffer if binary else sys.stdout, args.format, columns, args.row_group_size)
+        else:
+            with open(args.output, "wb") if binary else open(args.output, "w", newline="", encoding="utf-8") as stream:
+                export_rows(rows, stream, args.format, columns, args.row_group_size)
+    except BrokenPipeError:
+        # Saída fechada antes do fim (ex.: | head): encerra sem despejar o traceback
+        sys.stdout = open(os.devnull, "w")
+        return 0
+    except Exception as error:
+        print(f"Erro: {type(error).__name__}: {error}", file=sys.stderr)
+        return 2
+    finally:
+        if cache is not None:
+            cache.close()
+        stats.finish()
+        if args.stats:
+            stats.dump(args.stats)
+
+    for path, error in failures:
+        print(f"{path}: {error}", file=sys.stderr)
+    if failures:
+        print(f"{len(failures)} arquivo(s) não puderam ser lidos", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
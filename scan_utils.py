@@ -0,0 +1,501 @@
+# scan_utils.py
+import io
+import os
+import re
+import time
+import fnmatch
+import multiprocessing
+from itertools import chain, groupby
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+import pydicom as dicom
+from archive_utils import is_archive, list_members, member_path, split_member_path, iter_member_headers
+from dicomdir_utils import is_dicomdir, dicomdir_key, read_dicomdir
+from sniff_utils import sniff_stream
+
+# Tags usadas pela tabela; os demais elementos e os dados de pixel não são lidos
+SCAN_TAGS = [
+    "PatientName", "PatientID", "PatientBirthDate", "PatientSex",
+    "StudyDate", "StudyDescription",
+    "Manufacturer", "ManufacturerModelName", "Modality", "SliceThickness",
+    "StudyInstanceUID", "SeriesInstanceUID", "ImagePositionPatient", "ImageOrientationPatient",
+]
+
+# Quantidade de arquivos enviada a cada tarefa do pool de processos
+SCAN_BATCH_SIZE = 64
+
+# Arquivos considerados pela varredura: globs relativos à pasta analisada, sem diferenciar maiúsculas.
+# Muitos equipamentos gravam DICOM sem extensão; o que não for DICOM é descartado pelo início do
+# arquivo (ver sniff_utils) antes do dcmread.
+DEFAULT_INCLUDE = ("*",)
+
+# Formato dos registros de read_header_record; incremente ao mudar os campos (invalida o ScanCache)
+RECORD_VERSION = 2
+
+
+def calculate_slice_thickness(ds):
+    try:
+        return "{:.2f} mm".format(float(getattr(ds, 'SliceThickness', "N/A")))
+    except ValueError:
+        return "N/A"
+
+
+def calculate_age(birth_date_str):
+    try:
+        birth_date = datetime.strptime(birth_date_str, "%Y%m%d")
+        current_date = datetime.now()
+        age = current_date.year - birth_date.year - ((current_date.month, current_date.day) < (birth_date.month, birth_date.day))
+        return age
+    except ValueError:
+        return "N/D"
+
+
+def format_date(date_str):
+    return f"{date_str[6:8]}/{date_str[4:6]}/{date_str[0:4]}"
+
+
+def extract_clean_name(given_name, family_name):
+    given_name = ''.join(char for char in given_name if char.isalpha() or char.isspace())
+    family_name = ''.join(char for char in family_name if char.isalpha() or char.isspace())
+    return f"{given_name.strip()} {family_name.strip()}"
+
+
+def get_sex(ds):
+    return getattr(ds, 'PatientSex', "N/A")
+
+
+def format_size(total_size):
+    return "{} MB".format(round(total_size / (1024 * 1024)))
+
+
+def slice_position(ds, orientation=None):
+    # Posição da fatia ao longo da normal do plano (produto vetorial das direções de IOP), em mm.
+    # orientation substitui a IOP de ds (registros IMAGE do DICOMDIR só trazem a posição).
+    position = getattr(ds, "ImagePositionPatient", None)
+    orientation = orientation or getattr(ds, "ImageOrientationPatient", None)
+    if position is None or len(position) != 3:
+        return None
+    if orientation is None or len(orientation) != 6:
+        return float(position[2])
+    rx, ry, rz, cx, cy, cz = (float(v) for v in orientation)
+    normal = (ry * cz - rz * cy, rz * cx - rx * cz, rx * cy - ry * cx)
+    return sum(float(p) * n for p, n in zip(position, normal))
+
+
+def read_dicom_header(dicom_path):
+    # Para a leitura antes do PixelData e pula (seek) os elementos fora de SCAN_TAGS.
+    # dicom_path também pode ser um arquivo aberto (o cabeçalho de um membro de arquivo compactado).
+    return dicom.dcmread(dicom_path, force=True, stop_before_pixels=True, specific_tags=SCAN_TAGS)
+
+
+def read_header_record(dicom_path):
+    return header_record(read_dicom_header(dicom_path))
+
+
+def header_record(ds):
+    # Extrai do cabeçalho só os valores da tabela, como um dict simples (barato de enviar entre processos)
+    return {
+        "Paciente": extract_clean_name(ds.PatientName.given_name, ds.PatientName.family_name),
+        "PatientID": str(ds.PatientID),
+        "PatientBirthDate": str(ds.PatientBirthDate),
+        "Nascimento": format_date(ds.PatientBirthDate),
+        "Sexo": str(get_sex(ds)),
+        "Idade": calculate_age(ds.PatientBirthDate),
+        "Exame": format_date(ds.StudyDate),
+        "Descrição do Estudo": str(getattr(ds, 'StudyDescription', "N/A")),
+        "Fabricante": str(getattr(ds, 'Manufacturer', "N/A")),
+        "Equipamento": str(getattr(ds, 'ManufacturerModelName', "N/A")),
+        "Tipo de Exame": str(getattr(ds, 'Modality', "N/A")),
+        "Espessura do Slice": calculate_slice_thickness(ds),
+        "StudyInstanceUID": str(getattr(ds, 'StudyInstanceUID', "")),
+        "SeriesInstanceUID": str(getattr(ds, 'SeriesInstanceUID', "")),
+        "Posição": slice_position(ds),
+    }
+
+
+def dicomdir_records(series):
+    # Registros de todas as instâncias de um DICOMDIR (ver read_dicomdir) lendo uma única imagem por série,
+    # que completa o que o DICOMDIR não traz (nascimento, sexo, fabricante, equipamento, espessura).
+    # Devolve None se o DICOMDIR estiver desatualizado (arquivo referenciado que não existe mais) ou não
+    # bater com a imagem lida; nesse caso a varredura lê todos os arquivos referenciados.
+    records = {}
+    for uid, (patient_id, study_uid, instances) in series.items():
+        if not all(os.path.isfile(path) for path, _ in instances):
+            return None
+        representative_path = instances[len(instances) // 2][0]
+        try:
+            ds = read_dicom_header(representative_path)
+            header = header_record(ds)
+        except Exception:
+            return None
+        if (header["SeriesInstanceUID"] != uid
+                or header["StudyInstanceUID"] != study_uid
+                or header["PatientID"] != patient_id):
+            return None
+        orientation = getattr(ds, "ImageOrientationPatient", None)
+        for path, image in instances:
+            record = dict(header)
+            if path != representative_path:
+                # None se o registro IMAGE não traz a posição
+                record["Posição"] = slice_position(image, orientation)
+            records[path] = record
+    return records
+
+
+def sniffed_record(stream):
+    # Registro do cabeçalho, ou None sem chamar o dcmread se o arquivo não parecer DICOM
+    return read_header_record(stream) if sniff_stream(stream) else None
+
+
+def parse_record(path, source, start):
+    # (caminho, registro, erro, segundos desde start) de um cabeçalho; registro e erro são None
+    # para um arquivo que não é DICOM
+    try:
+        if isinstance(source, str):
+            with open(source, "rb") as stream:
+                record = sniffed_record(stream)
+        else:
+            record = sniffed_record(source)
+    except Exception as error:
+        # Só o nome e a mensagem: nem toda exceção sobrevive ao pickle de volta
+        return path, None, f"{type(error).__name__}: {error}", time.perf_counter() - start
+    return path, record, None, time.perf_counter() - start
+
+
+def parse_archive(archive, paths, headers=None):
+    # Membros de um mesmo arquivo compactado: ele é aberto uma vez e só os cabeçalhos são lidos.
+    # headers ({caminho: bytes}) traz os cabeçalhos já lidos na listagem; o arquivo só é aberto para
+    # os membros que não estão nele.
+    headers = headers or {}
+    names = [split_member_path(path)[1] for path in paths]
+    results = {}
+    start = time.perf_counter()
+    missing = [name for path, name in zip(paths, names) if path not in headers]
+    members = chain(((name, io.BytesIO(headers[path])) for path, name in zip(paths, names) if path in headers),
+                    iter_member_headers(archive, missing) if missing else ())
+    try:
+        for name, header in members:
+            results[name] = parse_record(member_path(archive, name), header, start)
+            start = time.perf_counter()
+        failure = "KeyError: membro não encontrado no arquivo compactado"
+    except Exception as error:
+        failure = f"{type(error).__name__}: {error}"
+    return [results.get(name) or (path, None, failure, 0.0) for path, name in zip(paths, names)]
+
+
+def parse_batch(paths, headers=None):
+    # Executada nos processos do pool: devolve (caminho, registro, erro, segundos) na mesma ordem de paths
+    results = []
+    for archive, group in groupby(paths, key=lambda path: split_member_path(path)[0]):
+        if archive is not None:
+            results.extend(parse_archive(archive, list(group), headers))
+            continue
+        for path in group:
+            results.append(parse_record(path, path, time.perf_counter()))
+    return results
+
+
+def verdict_key(path, stat):
+    # Chave do veredito "não é DICOM": o inode sobrevive a renomear e mover o arquivo. No Windows o
+    # stat do scandir vem sem inode (0), e os membros de arquivos compactados não têm um; usa o caminho.
+    inode = getattr(stat, "st_ino", 0)
+    return f"{stat.st_dev}:{inode}" if inode else path
+
+
+def is_inside(folder, parents):
+    # folder é uma das pastas de parents ou está abaixo de alguma delas
+    return any(folder == parent or folder.startswith(os.path.join(parent, "")) for parent in parents)
+
+
+def compile_globs(patterns):
+    # Junta os globs num único regex; '*' também atravessa '/', então "*.dcm" vale em qualquer nível
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns), re.IGNORECASE)
+
+
+def scan_tree(folder, include=None, exclude=None, max_depth=None, root=None, depth=0, discs=None, referenced=None,
+              unreadable=None):
+    # Percorre a árvore em pós-ordem usando os.scandir, com um único stat por arquivo.
+    # Cada pasta é gerada depois das subpastas como (pasta, [(caminho, stat)], tamanho),
+    # onde tamanho já inclui os arquivos aceitos de todas as subpastas.
+    # include/exclude são regexes de compile_globs, testados no caminho relativo a root (com '/');
+    # uma pasta excluída não é percorrida. max_depth limita os níveis abaixo de root.
+    # Arquivos .zip/.tar(.gz) viram pastas virtuais, geradas antes da pasta que os contém, com os
+    # membros aceitos por include (testado no nome do membro) e o tamanho do arquivo compactado.
+    # Uma pasta com DICOMDIR aceita também, em toda a subárvore, os arquivos referenciados por ele
+    # (em geral sem extensão); as séries lidas do DICOMDIR vão para discs[pasta] antes das subpastas.
+    # Uma entrada sem stat (link quebrado, sem permissão) é ignorada; uma pasta que não pode ser listada
+    # não é gerada e vai para unreadable, para que o snapshot e o cache dela não sejam descartados.
+    root = folder if root is None else root
+    include = compile_globs(DEFAULT_INCLUDE) if include is None else include
+    dicom_files = []
+    subfolders = []
+    archives = []
+    folder_size = 0
+    try:
+        with os.scandir(folder) as iterator:
+            entries = list(iterator)
+    except OSError:
+        if unreadable is not None:
+            unreadable.add(folder)
+        return 0
+    for entry in entries:
+        try:
+            if not (is_dicomdir(entry.name) and entry.is_file()):
+                continue
+            series = read_dicomdir(entry.path)
+        except Exception:
+            break  # DICOMDIR ilegível: só os arquivos aceitos por include
+        referenced = set(referenced or ())
+        referenced.update(path for _, _, instances in series.values() for path, _ in instances)
+        if discs is not None:
+            discs[folder] = series
+        break
+    for entry in entries:
+        relative = entry.path[len(root) + 1:].replace(os.sep, "/")
+        if exclude is not None and exclude.match(relative):
+            continue
+        try:
+            if entry.is_dir():
+                if not entry.is_symlink() and (max_depth is None or depth < max_depth):
+                    subfolders.append(entry.path)
+            elif is_dicomdir(entry.name):
+                continue
+            elif is_archive(entry.name):
+                archives.append((entry.path, entry.stat()))
+            elif include.match(relative) or (referenced and dicomdir_key(entry.path) in referenced):
+                stat = entry.stat()
+                dicom_files.append((entry.path, stat))
+                folder_size += stat.st_size
+        except OSError:
+            continue
+
+    for subfolder in subfolders:
+        folder_size += yield from scan_tree(subfolder, include, exclude, max_depth, root, depth + 1, discs, referenced,
+                                            unreadable)
+
+    for archive, stat in archives:
+        members = list_members(archive, stat, include.match)
+        if members:
+            yield archive, members, stat.st_size
+            folder_size += stat.st_size
+
+    yield folder, dicom_files, folder_size
+    return folder_size
+
+
+def count_files(directory, include=DEFAULT_INCLUDE, exclude=(), max_depth=None):
+    # Contagem prévia para a barra de progresso. É uma segunda passada pelas pastas, em paralelo com a
+    # varredura (ver benchmarks/bench_progress_count.py), mas só lê as entradas: sem stat, sem abrir
+    # arquivos compactados nem DICOMDIRs. Os membros dos arquivos compactados entram no total à medida
+    # que a varredura os lista (ScanStats.add_total); arquivos aceitos só por um DICOMDIR não são contados.
+    directory = os.path.abspath(directory)
+    include, exclude = compile_globs(include), compile_globs(exclude)
+    total = 0
+    pending = [(directory, 0)]
+    while pending:
+        folder, depth = pending.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    relative = entry.path[len(directory) + 1:].replace(os.sep, "/")
+                    if exclude is not None and exclude.match(relative):
+                        continue
+                    if entry.is_dir():
+                        if not entry.is_symlink() and (max_depth is None or depth < max_depth):
+                            pending.append((entry.path, depth + 1))
+                    elif not is_dicomdir(entry.name) and not is_archive(entry.name) and include.match(relative):
+                        total += 1
+        except OSError:
+            continue
+    return total
+
+
+def scan_directory(directory, workers=1, batch_size=SCAN_BATCH_SIZE, should_stop=None, cache=None, snapshot=None,
+                   include=DEFAULT_INCLUDE, exclude=(), max_depth=None, stats=None):
+    # Gera (pasta, tamanho, registros, falhas) assim que todos os arquivos de uma pasta
+    # foram lidos; cada registro leva o caminho e o tamanho do arquivo ("Arquivo" e "Bytes"). Com workers > 1 os cabeçalhos são lidos em um pool de processos e as
+    # pastas chegam na ordem em que terminam, não na ordem da árvore.
+    # Com um ScanCache, só são lidos os arquivos novos ou com tamanho/mtime diferentes.
+    # snapshot ({pasta: (tamanho, {caminho: (tamanho, mtime_ns)})}) guarda o estado da última
+    # varredura: pastas iguais a ele são puladas, e pastas esvaziadas ou removidas saem com
+    # registros vazios, para que as linhas correspondentes sejam apagadas.
+    # include/exclude (globs) e max_depth restringem a varredura, ver scan_tree.
+    # stats (ScanStats, ver stats_utils) recebe contadores e o tempo de cada etapa.
+    # Numa pasta com DICOMDIR válido, os arquivos referenciados não são abertos: os registros vêm do
+    # DICOMDIR e de uma imagem por série (ver dicomdir_records).
+    # Arquivos que não são DICOM ficam de fora dos registros e das falhas; com um ScanCache o veredito
+    # fica guardado por inode (ver verdict_key) e eles não são abertos de novo enquanto não mudarem.
+    directory = os.path.abspath(directory)
+    # Com filtros, uma pasta ausente não significa pasta removida: o cache dela fica
+    filtered = tuple(include) != DEFAULT_INCLUDE or bool(exclude) or max_depth is not None
+    folders = {}  # pasta -> [tamanho, arquivos pendentes, registros, falhas, {caminho: (tamanho, mtime_ns)}]
+    seen_folders = set()
+
+    def collect(batch, results):
+        parsed = []
+        not_dicom = []
+        for (folder, _, stat), (path, record, error, elapsed) in zip(batch, results):
+            if stats is not None:
+                stats.file_parsed(path, stat.st_size, elapsed, error, rejected=record is None and error is None)
+            state = folders[folder]
+            if record is None and error is None:
+                not_dicom.append((verdict_key(path, stat), folder, stat.st_size, stat.st_mtime_ns))
+            elif error is None:
+                state[2].append(record)
+                record["Arquivo"], record["Bytes"] = path, stat.st_size
+                parsed.append((path, folder, stat.st_size, stat.st_mtime_ns, record))
+            else:
+                state[3].append((path, error))
+            state[1] -= 1
+            if state[1] == 0:
+                yield finish(folder)
+        if cache is not None and (parsed or not_dicom):
+            start = time.perf_counter()
+            cache.store(parsed)
+            cache.store_rejected(not_dicom)
+            if stats is not None:
+                stats.record("cache", time.perf_counter() - start)
+
+    def finish(folder):
+        # O snapshot só é atualizado quando a pasta termina, para uma análise interrompida não marcá-la como vista
+        folder_size, _, records, failures, files = folders.pop(folder)
+        if stats is not None:
+            stats.folder_done()
+        if snapshot is not None:
+            if files:
+                snapshot[folder] = (folder_size, files)
+            else:
+                snapshot.pop(folder, None)
+        return folder, folder_size, records, failures
+
+    executor = None
+    if workers > 1:
+        # spawn evita herdar por fork as threads do Tk
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    running = {}
+
+    def submit(batch):
+        paths = [path for _, path, _ in batch]
+        # Cabeçalhos de membros de .tar lidos na listagem (ver list_members)
+        headers = {path: stat.header for _, path, stat in batch if getattr(stat, "header", None) is not None}
+        if executor is None:
+            yield from collect(batch, parse_batch(paths, headers or None))
+        else:
+            running[executor.submit(parse_batch, paths, headers or None)] = batch
+            yield from drain(workers * 2)
+
+    def drain(block_until):
+        # Recolhe os lotes prontos; bloqueia enquanto houver mais de block_until lotes em execução
+        while running:
+            done, _ = wait(running, timeout=None if len(running) > block_until else 0, return_when=FIRST_COMPLETED)
+            if not done:
+                return
+            for future in done:
+                yield from collect(running.pop(future), future.result())
+
+    try:
+        batch = []
+        discs = {}  # pasta com DICOMDIR -> séries, preenchido por scan_tree antes das subpastas
+        disc_records = {}  # chave do caminho (dicomdir_key) -> registro montado a partir do DICOMDIR
+        unreadable = set()  # pastas que não puderam ser listadas: o snapshot e o cache delas ficam
+        tree = scan_tree(directory, compile_globs(include), compile_globs(exclude), max_depth, discs=discs,
+                         unreadable=unreadable)
+        if stats is not None:
+            tree = stats.timed("listagem", tree)
+        for folder, dicom_entries, folder_size in tree:
+            if should_stop and should_stop():
+                return
+            while discs:
+                start = time.perf_counter()
+                disc_records.update(dicomdir_records(discs.popitem()[1]) or {})
+                if stats is not None:
+                    stats.record("dicomdir", time.perf_counter() - start)
+            seen_folders.add(folder)
+            if stats is not None and is_archive(folder):
+                stats.add_total(len(dicom_entries))  # count_files não abre os arquivos compactados
+            files = {path: (stat.st_size, stat.st_mtime_ns) for path, stat in dicom_entries}
+            previous = snapshot.get(folder) if snapshot is not None else None
+            if previous is not None and previous == (folder_size, files):
+                if stats is not None:
+                    stats.files_reused(skipped=len(files), size=sum(size for size, _ in files.values()))
+                continue  # nada mudou na pasta nem nas subpastas
+            cached = {}
+            rejected = {}  # verdict_key -> (tamanho, mtime_ns) dos arquivos da pasta que não são DICOM
+            if cache is not None:
+                start = time.perf_counter()
+                cached = cache.folder_records(folder)
+                rejected = cache.folder_rejected(folder)
+                if stats is not None:
+                    stats.record("cache", time.perf_counter() - start)
+            if not dicom_entries and not cached and previous is None:
+                continue
+
+            # A pendência extra só é liberada no fim do laço, para a pasta não sair pela metade
+            state = folders[folder] = [folder_size, 1, [], [], files]
+            hits = hit_bytes = indexed = indexed_bytes = known = known_bytes = 0
+            # Os membros de um arquivo compactado vão num lote só: ele é aberto (e um .tar.gz descompactado)
+            # uma única vez, e o paralelismo fica entre arquivos compactados
+            archive_batch = [] if is_archive(folder) else None
+            for path, stat in dicom_entries:
+                hit = cached.pop(path, None)
+                if hit is not None and hit[0] == stat.st_size and hit[1] == stat.st_mtime_ns:
+                    record = hit[2]
+                    record["Idade"] = calculate_age(record["PatientBirthDate"])
+                    record["Arquivo"], record["Bytes"] = path, stat.st_size
+                    state[2].append(record)
+                    hits += 1
+                    hit_bytes += stat.st_size
+                    continue
+                record = disc_records.pop(dicomdir_key(path), None) if disc_records else None
+                if record is not None:
+                    record["Arquivo"], record["Bytes"] = path, stat.st_size
+                    state[2].append(record)
+                    indexed += 1
+                    indexed_bytes += stat.st_size
+                    continue
+                if rejected and rejected.pop(verdict_key(path, stat), None) == (stat.st_size, stat.st_mtime_ns):
+                    known += 1
+                    known_bytes += stat.st_size
+                    continue
+                state[1] += 1
+                if archive_batch is not None:
+                    archive_batch.append((folder, path, stat))
+                    continue
+                batch.append((folder, path, stat))
+                if len(batch) >= batch_size:
+                    yield from submit(batch)
+                    batch = []
+
+            if archive_batch:
+                yield from submit(archive_batch)
+            if stats is not None and (hits or indexed or known):
+                stats.files_reused(cached=hits, indexed=indexed, rejected=known,
+                                   size=hit_bytes + indexed_bytes + known_bytes)
+            if cached:
+                # Arquivos que estavam em cache mas não existem mais na pasta
+                cache.evict(cached)
+            if rejected:
+                # Vereditos de arquivos que saíram da pasta ou que agora são DICOM
+                cache.evict_rejected(rejected)
+            state[1] -= 1
+            if state[1] == 0:
+                yield finish(folder)
+
+        if batch:
+            yield from submit(batch)
+        yield from drain(0)
+
+        if snapshot is not None:
+            prefix = os.path.join(directory, "")
+            for folder in [f for f in snapshot if (f == directory or f.startswith(prefix)) and f not in seen_folders
+                           and not is_inside(f, unreadable)]:
+                del snapshot[folder]
+                yield folder, 0, [], []
+
+        if cache is not None and not filtered:
+            cache.evict_missing_folders(directory, seen_folders, unreadable)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,47 @@
+# sniff_utils.py
+import struct
+
+# Preâmbulo de 128 bytes seguido de "DICM" (PS3.10, 7.1)
+PREAMBLE_SIZE = 128
+DICOM_MAGIC = b"DICM"
+SNIFF_SIZE = PREAMBLE_SIZE + len(DICOM_MAGIC)
+
+# Arquivos sem preâmbulo (implicit VR antigos, ACR-NEMA) começam direto num elemento do grupo de
+# meta-informação ou dos grupos mais baixos do dataset
+FIRST_GROUPS = (0x0002, 0x0008)
+EXPLICIT_VRS = {
+    b"AE", b"AS", b"AT", b"CS", b"DA", b"DS", b"DT", b"FD", b"FL", b"IS", b"LO", b"LT", b"OB", b"OD",
+    b"OF", b"OL", b"OV", b"OW", b"PN", b"SH", b"SL", b"SQ", b"SS", b"ST", b"SV", b"TM", b"UC", b"UI",
+    b"UL", b"UN", b"UR", b"US", b"UT", b"UV",
+}
+# Um primeiro elemento implicit VR maior que isso não é plausível (são UIDs, datas, códigos)
+MAX_FIRST_LENGTH = 0x10000
+
+
+def looks_like_dicom(head):
+    # head: os primeiros SNIFF_SIZE bytes do arquivo
+    if head[PREAMBLE_SIZE:SNIFF_SIZE] == DICOM_MAGIC:
+        return True
+    if len(head) < 8:
+        return False
+    if head[4:6] in EXPLICIT_VRS:
+        # Explicit VR, little ou big endian
+        return (struct.unpack("<H", head[:2])[0] in FIRST_GROUPS
+                or struct.unpack(">H", head[:2])[0] in FIRST_GROUPS)
+    if struct.unpack("<H", head[:2])[0] not in FIRST_GROUPS:
+        return False
+    # Implicit VR: 4 bytes de tamanho, par, logo depois da tag
+    length = struct.unpack("<I", head[4:8])[0]
+    return length < MAX_FIRST_LENGTH and length % 2 == 0
+
+
+def sniff_stream(stream):
+    # Classifica pelo início do arquivo aberto e volta ao começo, para o dcmread usar o mesmo handle
+    head = stream.read(SNIFF_SIZE)
+    stream.seek(0)
+    return looks_like_dicom(head)
+
+
+def is_dicom_file(path):
+    with open(path, "rb") as stream:
+        return sniff_stream(stream)
@@ -0,0 +1,199 @@
+# stats_utils.py
+import os
+import json
+import time
+import heapq
+from threading import Lock
+from collections import Counter
+
+# Arquivos mais lentos guardados por varredura
+SLOWEST_FILES = 20
+
+# Etapas medidas: listagem das pastas (scandir + stat, que já dá o tamanho das pastas), leitura do
+# cabeçalho (dcmread), descarte de arquivos que não são DICOM pelos primeiros bytes, consultas e
+# gravações no ScanCache, montagem dos registros a partir de um DICOMDIR e inserção das linhas na tabela
+STAGES = ("listagem", "dcmread", "sniff", "cache", "dicomdir", "tabela")
+
+
+class LatencyHistogram:
+    # Histograma em potências de 2 de microssegundos: o balde i conta as durações em [2^(i-1), 2^i) µs.
+    # Tamanho fixo, independente da quantidade de medidas.
+    def __init__(self):
+        self.buckets = [0] * 40
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[min(int(seconds * 1e6).bit_length(), len(self.buckets) - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        # Limite superior do balde que contém o quantil q (em segundos)
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min((1 << index) / 1e6, self.max)
+        return 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 6),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p90_ms": round(self.quantile(0.9) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            # Limite superior do balde (µs) -> quantidade, só os baldes usados
+            "buckets_us": {str(1 << index): count for index, count in enumerate(self.buckets) if count},
+        }
+
+
+class ScanStats:
+    # Contadores de uma varredura. É alimentado pela thread da varredura (scan_directory) e pela
+    # thread do Tk (inserção na tabela) e lido pela janela de progresso, por isso o lock.
+    def __init__(self, directory=None, top=SLOWEST_FILES):
+        self.lock = Lock()
+        self.directory = directory
+        self.top = top
+        self.started = time.time()
+        self.finished = None
+        self.files_total = None  # Conhecido depois da contagem prévia (count_files), se houver
+        self.files_extra = 0  # Membros de arquivos compactados, somados ao total durante a varredura
+        self.files_done = 0  # Lidos, com erro, descartados, vindos do cache ou do DICOMDIR, ou pulados pelo snapshot
+        self.files_parsed = 0
+        self.files_cached = 0
+        self.files_indexed = 0
+        self.files_rejected = 0  # Não são DICOM (lidos só os primeiros bytes ou já conhecidos)
+        self.files_skipped = 0
+        self.bytes_done = 0
+        self.folders = 0
+        self.stages = {stage: LatencyHistogram() for stage in STAGES}
+        self.slowest = []  # heap mínimo de (segundos, caminho) com os top arquivos mais lentos
+        self.errors = Counter()
+
+    def set_total(self, files_total):
+        with self.lock:
+            self.files_total = files_total
+
+    def add_total(self, files):
+        with self.lock:
+            self.files_extra += files
+
+    def total(self):
+        # Chamado com o lock
+        return None if self.files_total is None else self.files_total + self.files_extra
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.stages[stage].add(seconds)
+
+    def timed(self, stage, iterable):
+        # Repassa os itens de iterable medindo o tempo de cada next() como stage
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record(stage, time.perf_counter() - start)
+                return
+            self.record(stage, time.perf_counter() - start)
+            yield item
+
+    def file_parsed(self, path, size, seconds, error=None, rejected=False):
+        with self.lock:
+            self.files_done += 1
+            self.bytes_done += size
+            if rejected:
+                self.stages["sniff"].add(seconds)
+                self.files_rejected += 1
+                return
+            self.stages["dcmread"].add(seconds)
+            if error is None:
+                self.files_parsed += 1
+            else:
+                # Os erros chegam como "Tipo: mensagem" (ver parse_batch)
+                self.errors[error.split(":", 1)[0]] += 1
+            if len(self.slowest) < self.top:
+                heapq.heappush(self.slowest, (seconds, path))
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (seconds, path))
+
+    def files_reused(self, cached=0, skipped=0, indexed=0, rejected=0, size=0):
+        # Arquivos que não precisaram ser lidos: válidos no ScanCache, descritos por um DICOMDIR, já
+        # conhecidos como não DICOM ou em pastas iguais ao snapshot
+        with self.lock:
+            self.files_cached += cached
+            self.files_skipped += skipped
+            self.files_indexed += indexed
+            self.files_rejected += rejected
+            self.files_done += cached + skipped + indexed + rejected
+            self.bytes_done += size
+
+    def folder_done(self):
+        with self.lock:
+            self.folders += 1
+
+    def finish(self):
+        with self.lock:
+            self.finished = time.time()
+
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    def progress(self):
+        # (arquivos concluídos, total ou None, arquivos/s, ETA em segundos ou None)
+        with self.lock:
+            done, total = self.files_done, self.total()
+        elapsed = self.elapsed()
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if total is not None and rate > 0 else None
+        return done, total, rate, eta
+
+    def to_dict(self):
+        with self.lock:
+            elapsed = self.elapsed()
+            return {
+                "directory": self.directory,
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "elapsed_s": round(elapsed, 3),
+                "files": {
+                    "total": self.total(),
+                    "done": self.files_done,
+                    "parsed": self.files_parsed,
+                    "cached": self.files_cached,
+                    "dicomdir": self.files_indexed,
+                    "not_dicom": self.files_rejected,
+                    "skipped": self.files_skipped,
+                    "failed": sum(self.errors.values()),
+                },
+                "bytes": self.bytes_done,
+                "folders": self.folders,
+                "files_per_s": round(self.files_done / elapsed, 1) if elapsed > 0 else 0.0,
+                "mb_per_s": round(self.bytes_done / (1024 * 1024) / elapsed, 2) if elapsed > 0 else 0.0,
+                "stages": {stage: histogram.to_dict() for stage, histogram in self.stages.items()},
+                "slowest_files": [{"path": path, "ms": round(seconds * 1000, 3)}
+                                  for seconds, path in sorted(self.slowest, reverse=True)],
+                "errors": dict(self.errors.most_common()),
+            }
+
+    def dump(self, path):
+        # Grava em um arquivo temporário e troca, para não deixar um JSON pela metade
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+        os.replace(temporary, path)
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
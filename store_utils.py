@@ -0,0 +1,222 @@
+# store_utils.py
+from array import array
+
+# Colunas da tabela de resultados, na ordem de get_table_data e do relatório PDF
+TABLE_COLUMNS = ("Paciente", "Nascimento", "Sexo", "Idade", "Exame", "Descrição do Estudo",
+                 "Fabricante", "Equipamento", "Tipo de Exame", "Quantidade de Slices",
+                 "Espessura do Slice", "Tamanho da Pasta", "Pasta", "PatientID")
+
+# Colunas consultadas pela busca da tela principal
+SEARCH_COLUMNS = ("Paciente", "PatientID", "Descrição do Estudo", "Exame")
+
+# Colunas guardadas como inteiros; as demais são codificadas por dicionário
+INTEGER_COLUMNS = ("Quantidade de Slices",)
+
+
+class StringColumn:
+    # Cada valor distinto é guardado uma única vez; as linhas guardam só o código (4 bytes)
+    def __init__(self):
+        self.values = []
+        self.codes_by_value = {}
+        self.codes = array('I')
+
+    def encode(self, value):
+        value = str(value)
+        code = self.codes_by_value.get(value)
+        if code is None:
+            code = self.codes_by_value[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def set(self, row_id, value):
+        self.codes[row_id] = self.encode(value)
+
+    def get(self, row_id):
+        return self.values[self.codes[row_id]]
+
+    def sort_key(self):
+        # Ordena o dicionário uma vez e compara as linhas pela posição do valor
+        ranks = [0] * len(self.values)
+        for rank, code in enumerate(sorted(range(len(self.values)), key=lambda c: self.values[c].lower())):
+            ranks[code] = rank
+        codes = self.codes
+        return lambda row_id: ranks[codes[row_id]]
+
+    def raw(self, start=0):
+        # Cópia dos códigos a partir de start, para saber depois se o valor de uma linha mudou
+        return self.codes[start:]
+
+    def raw_value(self, row_id):
+        return self.codes[row_id]
+
+    def raw_key(self):
+        # Chave de um código na mesma ordem de sort_key, para inserir linhas numa ordem já pronta
+        values = self.values
+        return lambda code: (values[code].lower(), code)
+
+
+class IntegerColumn:
+    def __init__(self):
+        self.data = array('q')
+
+    def append(self, value):
+        self.data.append(int(value))
+
+    def set(self, row_id, value):
+        self.data[row_id] = int(value)
+
+    def get(self, row_id):
+        return self.data[row_id]
+
+    def sort_key(self):
+        return self.data.__getitem__
+
+    def raw(self, start=0):
+        return self.data[start:]
+
+    def raw_value(self, row_id):
+        return self.data[row_id]
+
+    def raw_key(self):
+        return lambda value: value
+
+
+class ResultStore:
+    # Linhas da tabela em formato colunar. Os ids das linhas são estáveis: remover uma linha
+    # só a marca como apagada, e clear() é o único que reaproveita os ids.
+    def __init__(self, columns=TABLE_COLUMNS):
+        self.columns = tuple(columns)
+        self.generation = 0  # Incrementada por clear(), que reaproveita os ids (ver iter_rows)
+        self.clear()
+
+    def clear(self):
+        self.generation += 1
+        self.updating = False
+        self.data = {name: IntegerColumn() if name in INTEGER_COLUMNS else StringColumn() for name in self.columns}
+        self.alive = bytearray()
+        self.count = 0
+        self.version = 0  # Incrementada a cada mudança, para as views saberem quando recarregar
+        self.deletions = 0  # Sem remoções desde a última leitura, a view só precisa acrescentar as linhas novas
+
+    def __len__(self):
+        return self.count
+
+    def append(self, row):
+        for name, column in self.data.items():
+            column.append(row[name])
+        self.alive.append(1)
+        self.count += 1
+        self.version += 1
+        return len(self.alive) - 1
+
+    def update(self, row_id, row):
+        self.updating = True
+        for name, column in self.data.items():
+            column.set(row_id, row[name])
+        self.version += 1
+        self.updating = False
+
+    def delete(self, row_id):
+        if self.alive[row_id]:
+            self.alive[row_id] = 0
+            self.count -= 1
+            self.version += 1
+            self.deletions += 1
+
+    def get(self, row_id, column):
+        return self.data[column].get(row_id)
+
+    def row(self, row_id):
+        return tuple(column.get(row_id) for column in self.data.values())
+
+    def iter_rows(self, row_ids):
+        # Linhas de row_ids lidas sob demanda por outra thread (a exportação) enquanto a do Tk continua
+        # alterando o store. Uma linha lida no meio de um update() é lida de novo; depois de um clear()
+        # os ids apontam para outras linhas, e a leitura é interrompida com RuntimeError.
+        generation = self.generation
+        return (self.stable_row(row_id, generation) for row_id in row_ids)
+
+    def stable_row(self, row_id, generation):
+        while True:
+            version = self.version
+            try:
+                row = self.row(row_id)
+            except IndexError:
+                row = None
+            if self.generation != generation:
+                raise RuntimeError("a tabela foi recarregada durante a leitura")
+            if self.version == version and not self.updating:
+                return row
+
+    def row_ids(self, start=0):
+        alive = self.alive
+        return array('q', (row_id for row_id in range(start, len(alive)) if alive[row_id]))
+
+    def sorted_ids(self, column, reverse=False, row_ids=None):
+        row_ids = self.row_ids() if row_ids is None else row_ids
+        return array('q', sorted(row_ids, key=self.data[column].sort_key(), reverse=reverse))
+
+
+class SearchIndex:
+    # Índice de n-gramas (1 a 3 caracteres) sobre os textos distintos das colunas de busca.
+    # Nomes e descrições se repetem entre séries, então o índice cresce com os textos distintos,
+    # não com o número de linhas; cada texto aponta para o conjunto de linhas que o contêm.
+    def __init__(self, columns=SEARCH_COLUMNS):
+        self.columns = tuple(columns)
+        self.clear()
+
+    def clear(self):
+        self.text_ids = {}
+        self.texts = []
+        self.text_rows = []
+        self.grams = {}
+
+    def add(self, row_id, row):
+        for column in self.columns:
+            text = str(row[column]).lower()
+            if not text:
+                continue
+            text_id = self.text_ids.get(text)
+            if text_id is None:
+                text_id = self.text_ids[text] = len(self.texts)
+                self.texts.append(text)
+                self.text_rows.append(set())
+                for gram in {text[i:i + n] for n in (1, 2, 3) for i in range(len(text) - n + 1)}:
+                    postings = self.grams.get(gram)
+                    if postings is None:
+                        postings = self.grams[gram] = array('I')
+                    postings.append(text_id)
+            self.text_rows[text_id].add(row_id)
+
+    def remove(self, row_id, row):
+        for column in self.columns:
+            text_id = self.text_ids.get(str(row[column]).lower())
+            if text_id is not None:
+                self.text_rows[text_id].discard(row_id)
+
+    def matches(self, row, query):
+        # O mesmo critério de search para uma única linha, sem consultar o índice
+        query = query.strip().lower()
+        return any(query in str(row[column]).lower() for column in self.columns)
+
+    def search(self, query):
+        # Devolve o conjunto de linhas que contêm query em alguma coluna, ou None para consulta vazia
+        query = query.strip().lower()
+        if not query:
+            return None
+        if len(query) <= 3:
+            # Todo trecho de até 3 caracteres já é um n-grama indexado
+            text_ids = self.grams.get(query, ())
+        else:
+            postings = sorted((self.grams.get(query[i:i + 3], ()) for i in range(len(query) - 2)), key=len)
+            if not postings[0]:
+                return set()
+            candidates = set(postings[0]).intersection(*postings[1:3])
+            text_ids = [text_id for text_id in candidates if query in self.texts[text_id]]
+        rows = set()
+        for text_id in text_ids:
+            rows.update(self.text_rows[text_id])
+        return rows
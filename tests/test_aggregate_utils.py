@@ -0,0 +1,69 @@
+# test_aggregate_utils.py
+from aggregate_utils import StudyAggregator
+from scan_utils import format_size
+
+MB = 1024 * 1024
+
+
+def make_record(series, study="1.2", patient="PAC1", position=None, thickness="1.00 mm", size=100):
+    return {
+        "Paciente": f"Paciente {patient}", "Nascimento": "01/01/1970", "Sexo": "F", "Idade": "50",
+        "Exame": "01/01/2020", "Descrição do Estudo": "TORAX", "Fabricante": "GE", "Equipamento": "X",
+        "Tipo de Exame": "CT", "PatientID": patient, "StudyInstanceUID": study, "SeriesInstanceUID": series,
+        "Espessura do Slice": thickness, "Posição": position, "Bytes": size,
+    }
+
+
+def test_series_spread_across_folders():
+    aggregator = StudyAggregator()
+    aggregator.update_folder("/a", [make_record("S1", position=p) for p in (0.0, 1.0, 2.0)])
+    changed = aggregator.update_folder("/b", [make_record("S1", position=-5.0, thickness="2.00 mm")])
+    assert changed == {"S1"}
+    row = aggregator.group_row("S1", "series")
+    assert row["Quantidade de Slices"] == 4
+    assert row["Espessura do Slice"] == "1.00 mm"
+    assert row["Pasta"] == "/a"
+
+    parts = aggregator.series["S1"]
+    assert (parts["/a"].min_position, parts["/a"].max_position) == (0.0, 2.0)
+    assert parts["/b"].extent == 0.0
+
+
+def test_extent_skips_missing_positions():
+    aggregator = StudyAggregator()
+    aggregator.update_folder("/a", [make_record("S1", position=None), make_record("S1", position=3.0),
+                                    make_record("S1", position=-1.5)])
+    accumulator = aggregator.series["S1"]["/a"]
+    assert (accumulator.min_position, accumulator.max_position, accumulator.extent) == (-1.5, 3.0, 4.5)
+    aggregator.update_folder("/b", [make_record("S2")])
+    assert aggregator.series["S2"]["/b"].extent is None
+
+
+def test_rescanning_a_folder_replaces_its_contribution():
+    aggregator = StudyAggregator()
+    aggregator.update_folder("/a", [make_record("S1")] * 3)
+    aggregator.update_folder("/b", [make_record("S1")] * 2)
+    aggregator.update_folder("/a", [make_record("S1")])
+    assert aggregator.group_row("S1", "series")["Quantidade de Slices"] == 3
+
+    # Pasta esvaziada: a série some quando não sobra nenhuma pasta
+    aggregator.update_folder("/a", [])
+    aggregator.update_folder("/b", [])
+    assert aggregator.group_row("S1", "series") is None
+    assert aggregator.rows("patient") == {}
+
+
+def test_rows_by_study_and_patient():
+    aggregator = StudyAggregator()
+    aggregator.update_folder("/a", [make_record("S1", size=10 * MB), make_record("S2", size=20 * MB)])
+    aggregator.update_folder("/b", [make_record("S3", study="1.3", size=30 * MB)])
+    aggregator.update_folder("/c", [make_record("S4", study="2.1", patient="PAC2")])
+    assert set(aggregator.rows("series")) == {"S1", "S2", "S3", "S4"}
+    studies = aggregator.rows("study")
+    assert set(studies) == {"1.2", "1.3", "2.1"}
+    assert studies["1.2"]["Quantidade de Slices"] == 2
+    patients = aggregator.rows("patient")
+    assert set(patients) == {"Paciente PAC1_PAC1", "Paciente PAC2_PAC2"}
+    assert patients["Paciente PAC1_PAC1"]["Quantidade de Slices"] == 3
+    # "Tamanho da Pasta" é a soma dos arquivos do grupo
+    assert patients["Paciente PAC1_PAC1"]["Tamanho da Pasta"] == format_size(60 * MB)
@@ -0,0 +1,55 @@
+# test_archive_utils.py
+import io
+import os
+import tarfile
+
+import pytest
+from pydicom.data import get_testdata_file
+
+import archive_utils
+from archive_utils import list_members, read_header_bytes
+from scan_utils import parse_archive
+
+
+@pytest.mark.parametrize("name", ["CT_small.dcm", "MR_small_bigendian.dcm"])
+def test_read_header_bytes_stops_at_pixel_data(name):
+    with open(get_testdata_file(name), "rb") as file:
+        data = file.read()
+    header = read_header_bytes(io.BytesIO(data)).getvalue()
+    assert len(header) < len(data)
+    assert data.startswith(header)
+
+
+def test_tar_members_are_parsed_from_the_listing(tmp_path, monkeypatch):
+    archive = str(tmp_path / "exame.tar.gz")
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(get_testdata_file("CT_small.dcm"), arcname="serie/a.dcm")
+        tar.add(get_testdata_file("MR_small_bigendian.dcm"), arcname="serie/b.dcm")
+    members = list_members(archive, os.stat(archive), lambda name: True)
+    assert all(stat.header for _, stat in members)
+
+    # Com os cabeçalhos da listagem o arquivo não é aberto de novo
+    monkeypatch.setattr(tarfile, "open", None)
+    paths = [path for path, _ in members]
+    results = parse_archive(archive, paths, {path: stat.header for path, stat in members})
+    assert [error for _, _, error, _ in results] == [None, None]
+
+
+def test_non_dicom_member_is_not_buffered():
+    stream = io.BytesIO(b"%PDF-1.4\n" + b"\0" * (8 * 1024 * 1024))
+    assert len(read_header_bytes(stream).getvalue()) <= 132
+
+
+def test_header_over_the_limit_is_read_from_the_member(tmp_path, monkeypatch):
+    with open(get_testdata_file("CT_small.dcm"), "rb") as file:
+        data = file.read()
+    assert read_header_bytes(io.BytesIO(data), limit=0) is None
+    monkeypatch.setattr(archive_utils, "read_header_bytes", lambda stream: None)
+
+    archive = str(tmp_path / "exame.tar")
+    with tarfile.open(archive, "w") as tar:
+        tar.add(get_testdata_file("CT_small.dcm"), arcname="a.dcm")
+    members = list_members(archive, os.stat(archive), lambda name: True)
+    assert members[0][1].header is None
+    results = parse_archive(archive, [path for path, _ in members], {})
+    assert results[0][1] is not None and results[0][2] is None
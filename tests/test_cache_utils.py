@@ -0,0 +1,76 @@
+# test_cache_utils.py
+import os
+
+from cache_utils import ScanCache
+
+
+def entry(folder, name, size=10, record=None):
+    return (os.path.join(folder, name), folder, size, 1000, record or {"Paciente": name})
+
+
+def test_store_and_folder_records(tmp_path):
+    cache = ScanCache(str(tmp_path / "cache.sqlite3"))
+    cache.store([entry("/exames/a", "1.dcm"), entry("/exames/a", "2.dcm"), entry("/exames/b", "3.dcm")])
+    records = cache.folder_records("/exames/a")
+    assert set(records) == {os.path.join("/exames/a", "1.dcm"), os.path.join("/exames/a", "2.dcm")}
+    assert records[os.path.join("/exames/a", "1.dcm")] == (10, 1000, {"Paciente": "1.dcm"})
+    cache.close()
+
+
+def test_evict_paths_and_missing_folders(tmp_path):
+    cache = ScanCache(str(tmp_path / "cache.sqlite3"))
+    folders = ["/exames", "/exames/a", "/exames/a/sub", "/exames/b", "/exames-2"]
+    cache.store([entry(folder, "1.dcm") for folder in folders])
+    cache.evict([os.path.join("/exames/b", "1.dcm")])
+    assert cache.folder_records("/exames/b") == {}
+
+    cache.evict_missing_folders("/exames", {"/exames", "/exames/a"})
+    assert cache.folder_records("/exames/a")
+    assert cache.folder_records("/exames/a/sub") == {}
+    # Pasta irmã com o mesmo prefixo fica fora do intervalo
+    assert cache.folder_records("/exames-2")
+    cache.close()
+
+
+def test_version_change_drops_records_and_verdicts(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ScanCache(path, version=1)
+    cache.store([entry("/exames/a", "1.dcm")])
+    cache.store_rejected([("1:42", "/exames/a", 5, 1000)])
+    cache.close()
+
+    cache = ScanCache(path, version=1)
+    assert cache.folder_records("/exames/a")
+    assert cache.folder_rejected("/exames/a") == {"1:42": (5, 1000)}
+    cache.close()
+
+    cache = ScanCache(path, version=2)
+    assert cache.folder_records("/exames/a") == {}
+    assert cache.folder_rejected("/exames/a") == {}
+    cache.close()
+
+
+def test_missing_folders_drop_their_verdicts(tmp_path):
+    cache = ScanCache(str(tmp_path / "cache.sqlite3"))
+    cache.store_rejected([("1:1", "/exames/a", 5, 1000), ("1:2", "/exames/b", 5, 1000)])
+    cache.evict_missing_folders("/exames", {"/exames", "/exames/a"})
+    assert cache.folder_rejected("/exames/a") == {"1:1": (5, 1000)}
+    assert cache.folder_rejected("/exames/b") == {}
+    cache.evict_rejected(["1:1"])
+    assert cache.folder_rejected("/exames/a") == {}
+    cache.close()
+
+
+def test_old_rejected_table_is_rebuilt(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "cache.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA user_version = 1")
+    connection.execute("CREATE TABLE rejected (key TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL)")
+    connection.execute("INSERT INTO rejected VALUES ('1:1', 5, 1000)")
+    connection.commit()
+    connection.close()
+    cache = ScanCache(path, version=1)
+    cache.store_rejected([("1:1", "/exames/a", 5, 1000)])
+    assert cache.folder_rejected("/exames/a") == {"1:1": (5, 1000)}
+    cache.close()
@@ -0,0 +1,52 @@
+# test_dicomdir_utils.py
+import os
+import shutil
+
+import pydicom as dicom
+import pytest
+from pydicom.data import get_testdata_file
+
+from dicomdir_utils import dicomdir_key, read_dicomdir
+
+
+@pytest.fixture
+def disc(tmp_path):
+    # Cópia do DICOMDIR de exemplo do pydicom, com as imagens referenciadas
+    source = os.path.dirname(get_testdata_file("DICOMDIR"))
+    for name in ("DICOMDIR", "77654033", "98892001", "98892003"):
+        path = os.path.join(source, name)
+        if os.path.isdir(path):
+            shutil.copytree(path, tmp_path / name)
+        else:
+            shutil.copy(path, tmp_path / name)
+    return tmp_path
+
+
+def test_read_dicomdir_groups_images_by_series(disc):
+    series = read_dicomdir(str(disc / "DICOMDIR"))
+    assert len(series) == 13
+    assert sum(len(instances) for _, _, instances in series.values()) == 31
+    for patient_id, study_uid, instances in series.values():
+        assert patient_id and study_uid
+        for key, _ in instances:
+            assert key == dicomdir_key(key)
+            assert os.path.isfile(key)
+
+
+def test_read_dicomdir_rejects_offset_cycle(disc):
+    path = str(disc / "DICOMDIR")
+    ds = dicom.dcmread(path)
+    records = ds.DirectoryRecordSequence
+    first = ds.OffsetOfTheFirstDirectoryRecordOfTheRootDirectoryEntity
+    # O último registro da raiz aponta de volta para o primeiro
+    offset = first
+    while True:
+        record = next(r for r in records if r.seq_item_tell == offset)
+        if not record.OffsetOfTheNextDirectoryRecord:
+            break
+        offset = record.OffsetOfTheNextDirectoryRecord
+    record.OffsetOfTheNextDirectoryRecord = first
+    ds.save_as(path)
+
+    with pytest.raises(ValueError):
+        read_dicomdir(path)
@@ -0,0 +1,58 @@
+# test_export_utils.py
+import csv
+import io
+import json
+
+import pytest
+
+from export_utils import FILE_COLUMNS, export_rows, export_to_file, guess_format
+
+COLUMNS = ("Paciente", "Quantidade de Slices", "Posição")
+ROWS = [("Ana Silva", 120, 1.5), ("José Ção", 3, None), ("Bruno", 0, -20.25)]
+
+
+@pytest.mark.parametrize("row_group_size", [1, 2, 100])
+def test_csv_round_trip(row_group_size):
+    stream = io.StringIO(newline="")
+    assert export_rows(iter(ROWS), stream, "csv", COLUMNS, row_group_size) == len(ROWS)
+    rows = list(csv.reader(io.StringIO(stream.getvalue(), newline="")))
+    assert rows[0] == list(COLUMNS)
+    assert rows[1:] == [[str(value) if value is not None else "" for value in row] for row in ROWS]
+
+
+@pytest.mark.parametrize("row_group_size", [1, 2, 100])
+def test_jsonl_round_trip(row_group_size):
+    stream = io.StringIO()
+    assert export_rows(ROWS, stream, "jsonl", COLUMNS, row_group_size) == len(ROWS)
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == \
+        [dict(zip(COLUMNS, row)) for row in ROWS]
+
+
+@pytest.mark.parametrize("row_group_size", [1, 2, 100])
+def test_parquet_round_trip(tmp_path, row_group_size):
+    pq = pytest.importorskip("pyarrow.parquet")
+    filename = str(tmp_path / "tabela.parquet")
+    assert export_to_file(ROWS, filename, COLUMNS, row_group_size=row_group_size) == len(ROWS)
+    parquet_file = pq.ParquetFile(filename)
+    assert parquet_file.metadata.num_row_groups == -(-len(ROWS) // row_group_size)
+    table = parquet_file.read()
+    assert table.column_names == list(COLUMNS)
+    assert [tuple(row.values()) for row in table.to_pylist()] == ROWS
+
+
+def test_empty_export_writes_header_only():
+    stream = io.StringIO(newline="")
+    assert export_rows([], stream, "csv", FILE_COLUMNS) == 0
+    assert next(csv.reader(io.StringIO(stream.getvalue()))) == list(FILE_COLUMNS)
+
+
+def test_non_positive_row_group_size_is_rejected():
+    with pytest.raises(ValueError):
+        export_rows(ROWS, io.StringIO(), "csv", COLUMNS, 0)
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("tabela.csv", "csv"), ("tabela.PARQUET", "parquet"), ("tabela.jsonl", "jsonl"), ("tabela.txt", "csv"),
+])
+def test_guess_format(path, expected):
+    assert guess_format(path) == expected
@@ -0,0 +1,142 @@
+# test_gui_utils.py
+import pytest
+
+from gui_utils import UIUpdateQueue
+
+
+class FakeRoot:
+    # Só o after do Tk: guarda os reagendamentos em vez de rodar um loop de eventos
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, func):
+        self.scheduled.append((delay, func))
+
+
+def test_drain_survives_failing_callback(capsys):
+    root = FakeRoot()
+    batches = []
+    ui_queue = UIUpdateQueue(root, batch_size=10, after_batch=lambda: batches.append(True))
+    calls = []
+
+    def broken():
+        raise RuntimeError("widget destruído")
+
+    ui_queue.put(calls.append, 1)
+    ui_queue.put(broken)
+    ui_queue.put(calls.append, 2)
+    ui_queue.drain()
+
+    assert calls == [1, 2]
+    assert batches == [True]
+    assert len(root.scheduled) == 2  # o agendamento inicial e o reagendamento depois do lote
+    assert "broken" in capsys.readouterr().err
+
+
+def test_drain_reschedules_when_after_batch_fails():
+    root = FakeRoot()
+
+    def after_batch():
+        raise RuntimeError("falha")
+
+    ui_queue = UIUpdateQueue(root, after_batch=after_batch)
+    ui_queue.put(lambda: None)
+    try:
+        ui_queue.drain()
+    except RuntimeError:
+        pass
+    assert len(root.scheduled) == 2
+
+
+class FakeTree:
+    # O mínimo da ttk.Treeview usado pela VirtualTable
+    def __init__(self):
+        self.items = {}
+
+    def configure(self, **options):
+        pass
+
+    def bind(self, *args, **options):
+        pass
+
+    def insert(self, parent, index):
+        item = len(self.items) + 1
+        self.items[item] = None
+        return item
+
+    def delete(self, item):
+        del self.items[item]
+
+    def item(self, item, **options):
+        self.items[item] = options
+
+    def selection_set(self, items):
+        pass
+
+
+class FakeScrollbar:
+    def configure(self, **options):
+        pass
+
+    def set(self, first, last):
+        pass
+
+
+def test_update_filter_merges_changed_rows():
+    from store_utils import TABLE_COLUMNS, ResultStore, SearchIndex
+    from gui_utils import VirtualTable
+
+    def make_row(name):
+        row = {column: "x" for column in TABLE_COLUMNS}
+        row.update({"Paciente": name, "Quantidade de Slices": 1})
+        return row
+
+    store, index = ResultStore(), SearchIndex()
+    table = VirtualTable(FakeTree(), FakeScrollbar(), store, lambda row: (row[0], row[1:]))
+    table.visible_rows = 50
+    ids = [store.append(make_row(name)) for name in ("ana", "bruno", "mariana")]
+    for row_id in ids:
+        index.add(row_id, make_row(store.get(row_id, "Paciente")))
+    table.set_filter(index.search("ana"))
+    assert list(table.order) == [ids[0], ids[2]]
+
+    def matches(row_id):
+        return index.matches(dict(zip(store.columns, store.row(row_id))), "ana")
+
+    new = store.append(make_row("anabela"))
+    table.update_filter({new}, matches)
+    assert list(table.order) == [ids[0], ids[2], new]
+
+    # Linha já carregada que passa a casar com a busca
+    store.update(ids[1], make_row("banana"))
+    table.update_filter({ids[1]}, matches)
+    assert list(table.order) == [ids[0], ids[1], ids[2], new]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_sorted_table_places_new_and_changed_rows(reverse):
+    from store_utils import TABLE_COLUMNS, ResultStore
+    from gui_utils import VirtualTable
+
+    def make_row(name, slices):
+        row = {column: "x" for column in TABLE_COLUMNS}
+        row.update({"Paciente": name, "Quantidade de Slices": slices})
+        return row
+
+    store = ResultStore()
+    table = VirtualTable(FakeTree(), FakeScrollbar(), store, lambda row: (row[0], row[1:]))
+    names = ["maria", "Ana", "carlos", "bia", "ana", "zeca", "Érica", "joão"]
+    for column in ("Paciente", "Quantidade de Slices"):
+        store.clear()
+        table.reset()
+        ids = [store.append(make_row(name, i * 7 % 5)) for i, name in enumerate(names[:4])]
+        table.sort(column, reverse)
+        for i, name in enumerate(names[4:], 4):
+            ids.append(store.append(make_row(name, i * 7 % 5)))
+            table.update_rows({ids[-1]})
+        store.update(ids[0], make_row("aaron", 9))
+        store.update(ids[5], make_row("zeca", 0))
+        table.update_rows({ids[0], ids[5]})
+        key = store.data[column].sort_key()
+        assert [key(row_id) for row_id in table.order] == sorted(map(key, ids), reverse=reverse)
+        assert sorted(table.order) == ids
@@ -0,0 +1,21 @@
+# test_report_utils.py
+import pytest
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from report_utils import FONT_SIZE, fit_text
+
+
+@pytest.mark.parametrize("text, width", [
+    ("MWANGANGA WAWERU MOHAMMED ABDULLAHI WAMBA", 170),
+    ("W" * 10, 45),
+    ("SIEMENS HEALTHINEERS SOMATOM DEFINITION", 110),
+])
+def test_fit_text_never_overflows_cell(text, width):
+    fitted = fit_text(text, width)
+    assert fitted.endswith("…")
+    assert stringWidth(fitted, "Helvetica", FONT_SIZE) <= width - 6
+
+
+def test_fit_text_keeps_short_values():
+    assert fit_text("Ana Silva", 170) == "Ana Silva"
+    assert fit_text(42, 45) == "42"
@@ -0,0 +1,14 @@
+# test_scan_cli.py
+import pytest
+
+from scan_cli import parse_args
+
+
+def test_max_depth_accepts_zero():
+    assert parse_args(["/exames", "--max-depth", "0"]).max_depth == 0
+
+
+@pytest.mark.parametrize("option, value", [("--max-depth", "-1"), ("--row-group-size", "0")])
+def test_invalid_numbers_are_rejected(option, value):
+    with pytest.raises(SystemExit):
+        parse_args(["/exames", option, value])
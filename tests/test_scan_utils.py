@@ -0,0 +1,162 @@
+# test_scan_utils.py
+import os
+
+from scan_utils import compile_globs, count_files, scan_directory, verdict_key
+
+
+def test_compile_globs_matches_relative_paths():
+    assert compile_globs([]) is None
+    include = compile_globs(["*.dcm"])
+    assert include.match("IM0001.DCM")
+    assert include.match("paciente/serie/IM0001.dcm")
+    assert not include.match("laudo.pdf")
+    exclude = compile_globs(["tmp/*", "*.bak"])
+    assert exclude.match("tmp/IM1")
+    assert exclude.match("serie/IM1.bak")
+    assert not exclude.match("serie/IM1")
+
+
+def test_verdict_key_falls_back_to_path_without_inode():
+    class Stat:
+        st_dev, st_ino = 3, 0
+    assert verdict_key("/a/b", Stat()) == "/a/b"
+    Stat.st_ino = 77
+    assert verdict_key("/a/b", Stat()) == "3:77"
+
+
+def test_scan_skips_non_dicom_files(tmp_path):
+    from pydicom.data import get_testdata_file
+    with open(get_testdata_file("CT_small.dcm"), "rb") as source:
+        data = source.read()
+    (tmp_path / "serie").mkdir()
+    (tmp_path / "serie" / "IM0001").write_bytes(data)  # sem extensão
+    (tmp_path / "serie" / "laudo.pdf").write_bytes(b"%PDF-1.4\n" * 100)
+    (tmp_path / "DICOMDIR.txt").write_text("não é DICOM")
+
+    assert count_files(str(tmp_path)) == 3
+    results = list(scan_directory(str(tmp_path)))
+    records = [record for _, _, folder_records, _ in results for record in folder_records]
+    failures = [failure for _, _, _, folder_failures in results for failure in folder_failures]
+    assert [record["Arquivo"] for record in records] == [os.path.join(str(tmp_path), "serie", "IM0001")]
+    assert failures == []
+
+
+def write_dicom(path):
+    from pydicom.data import get_testdata_file
+    with open(get_testdata_file("CT_small.dcm"), "rb") as source:
+        path.write_bytes(source.read())
+
+
+def cached_rows(cache):
+    return cache.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+
+def test_broken_symlink_keeps_folder_rows(tmp_path):
+    from cache_utils import ScanCache
+    (tmp_path / "P1" / "sub").mkdir(parents=True)
+    write_dicom(tmp_path / "P1" / "IM1")
+    write_dicom(tmp_path / "P1" / "sub" / "IM2")
+    cache = ScanCache(str(tmp_path / "cache.sqlite3"))
+    snapshot = {}
+    folder = str(tmp_path / "P1")
+    assert sum(len(records) for _, _, records, _ in scan_directory(folder, cache=cache, snapshot=snapshot)) == 2
+
+    os.symlink(str(tmp_path / "nao_existe"), str(tmp_path / "P1" / "quebrado"))
+    assert list(scan_directory(folder, cache=cache, snapshot=snapshot)) == []
+    assert set(snapshot) == {folder, os.path.join(folder, "sub")}
+    assert cached_rows(cache) == 2
+    cache.close()
+
+
+def test_unreadable_folder_keeps_snapshot_and_cache(tmp_path, monkeypatch):
+    from cache_utils import ScanCache
+    (tmp_path / "P1" / "sub").mkdir(parents=True)
+    write_dicom(tmp_path / "P1" / "sub" / "IM1")
+    cache = ScanCache(str(tmp_path / "cache.sqlite3"))
+    snapshot = {}
+    folder = str(tmp_path / "P1")
+    list(scan_directory(folder, cache=cache, snapshot=snapshot))
+
+    sub = os.path.join(folder, "sub")
+    scandir = os.scandir
+
+    def failing_scandir(path):
+        if path == sub:
+            raise PermissionError(path)
+        return scandir(path)
+    monkeypatch.setattr(os, "scandir", failing_scandir)
+    results = list(scan_directory(folder, cache=cache, snapshot=snapshot))
+    assert all(name != sub for name, _, _, _ in results)
+    assert sub in snapshot
+    assert cached_rows(cache) == 1
+    cache.close()
+
+
+def test_folder_size_includes_subfolders(tmp_path):
+    from scan_utils import scan_tree
+    (tmp_path / "P1" / "sub").mkdir(parents=True)
+    (tmp_path / "P1" / "a.dcm").write_bytes(b"x" * 10)
+    (tmp_path / "P1" / "sub" / "b.dcm").write_bytes(b"x" * 5)
+    (tmp_path / "P1" / "sub" / "c.dcm").write_bytes(b"x" * 7)
+    sizes = {folder: size for folder, _, size in scan_tree(str(tmp_path / "P1"))}
+    assert sizes == {str(tmp_path / "P1" / "sub"): 12, str(tmp_path / "P1"): 22}
+
+
+def test_header_read_keeps_only_table_tags():
+    from pydicom.data import get_testdata_file
+    from scan_utils import SCAN_TAGS, read_dicom_header, read_header_record
+    path = get_testdata_file("CT_small.dcm")
+    ds = read_dicom_header(path)
+    assert "PixelData" not in ds
+    assert set(ds.dir()) <= set(SCAN_TAGS) | {"SpecificCharacterSet"}  # o pydicom sempre lê o charset
+    record = read_header_record(path)
+    assert record["PatientID"] == "1CT1"
+    assert record["Tipo de Exame"] == "CT"
+    assert record["Fabricante"] == "GE MEDICAL SYSTEMS"
+    assert record["Espessura do Slice"] == "5.00 mm"
+
+
+def test_incremental_rescan_with_snapshot(tmp_path):
+    import shutil
+    from cache_utils import ScanCache
+    for name in ("A", "B"):
+        (tmp_path / "exames" / name).mkdir(parents=True)
+        write_dicom(tmp_path / "exames" / name / "IM1")
+    root = str(tmp_path / "exames")
+    folder_a, folder_b = os.path.join(root, "A"), os.path.join(root, "B")
+    cache = ScanCache(":memory:")
+    snapshot = {}
+    assert {folder for folder, _, _, _ in scan_directory(root, cache=cache, snapshot=snapshot)} == {folder_a, folder_b}
+
+    # Nada mudou: nenhuma pasta é relida
+    assert list(scan_directory(root, cache=cache, snapshot=snapshot)) == []
+
+    # Arquivo novo em A: só A sai de novo, com os dois registros (IM1 vem do cache)
+    write_dicom(tmp_path / "exames" / "A" / "IM2")
+    results = list(scan_directory(root, cache=cache, snapshot=snapshot))
+    assert [(folder, len(records)) for folder, _, records, _ in results] == [(folder_a, 2)]
+
+    # Pasta removida: sai vazia, para as linhas dela serem apagadas
+    shutil.rmtree(folder_b)
+    assert list(scan_directory(root, cache=cache, snapshot=snapshot)) == [(folder_b, 0, [], [])]
+    assert folder_b not in snapshot
+    cache.close()
+
+
+def test_non_dicom_verdicts_are_reused_and_evicted(tmp_path):
+    from cache_utils import ScanCache
+    from stats_utils import ScanStats
+    (tmp_path / "laudo.pdf").write_bytes(b"%PDF-1.4\n" * 100)
+    (tmp_path / "log.txt").write_bytes(b"nada")
+    cache = ScanCache(":memory:")
+    list(scan_directory(str(tmp_path), cache=cache))
+    assert len(cache.folder_rejected(str(tmp_path))) == 2
+
+    os.remove(str(tmp_path / "log.txt"))
+    stats = ScanStats(str(tmp_path))
+    list(scan_directory(str(tmp_path), cache=cache, stats=stats))
+    # laudo.pdf não é aberto de novo, e o veredito do arquivo removido sai do cache
+    assert stats.files_rejected == 1 and stats.stages["sniff"].count == 0
+    assert list(cache.folder_rejected(str(tmp_path)).values()) == [(os.stat(str(tmp_path / "laudo.pdf")).st_size,
+                                                                    os.stat(str(tmp_path / "laudo.pdf")).st_mtime_ns)]
+    cache.close()
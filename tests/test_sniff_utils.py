@@ -0,0 +1,50 @@
+# test_sniff_utils.py
+import io
+import struct
+
+import pytest
+from pydicom.data import get_testdata_file
+
+from sniff_utils import DICOM_MAGIC, PREAMBLE_SIZE, SNIFF_SIZE, is_dicom_file, looks_like_dicom, sniff_stream
+
+
+@pytest.mark.parametrize("name", [
+    "CT_small.dcm",  # preâmbulo + DICM
+    "MR_small.dcm",
+    "rtstruct.dcm",  # implicit VR, sem preâmbulo
+    "ExplVR_LitEndNoMeta.dcm",
+    "ExplVR_BigEndNoMeta.dcm",
+])
+def test_dicom_files_are_accepted(name):
+    assert is_dicom_file(get_testdata_file(name))
+
+
+@pytest.mark.parametrize("head", [
+    b"",
+    b"DICM",
+    b"%PDF-1.4\n" + b"\0" * 200,
+    b"\x89PNG\r\n\x1a\n" + b"\0" * 200,
+    b"PK\x03\x04" + b"\0" * 200,  # zip
+    b"\x1f\x8b\x08\x00" + b"\0" * 200,  # gzip
+    "Paciente;Exame\nAna;2024\n".encode() * 10,
+    b"\0" * SNIFF_SIZE,  # preâmbulo sem a marca
+    struct.pack("<HHI", 0x0010, 0x0010, 8) + b"\0" * 200,  # grupo que não abre um arquivo DICOM
+    struct.pack("<HHI", 0x0008, 0x0005, 0x7FFFFFFF) + b"\0" * 200,  # tamanho implausível
+    struct.pack("<HHI", 0x0008, 0x0005, 11) + b"\0" * 200,  # tamanho ímpar
+])
+def test_non_dicom_heads_are_rejected(head):
+    assert not looks_like_dicom(head[:SNIFF_SIZE])
+
+
+def test_magic_after_preamble():
+    assert looks_like_dicom(b"\xff" * PREAMBLE_SIZE + DICOM_MAGIC)
+
+
+def test_implicit_vr_without_preamble():
+    assert looks_like_dicom(struct.pack("<HHI", 0x0008, 0x0016, 26) + b"1.2.840.10008.5.1.4.1.1.2\0")
+
+
+def test_sniff_stream_rewinds():
+    stream = io.BytesIO(b"\0" * PREAMBLE_SIZE + DICOM_MAGIC + b"resto")
+    assert sniff_stream(stream)
+    assert stream.tell() == 0
@@ -0,0 +1,49 @@
+# test_stats_utils.py
+import json
+
+from stats_utils import LatencyHistogram, ScanStats, format_eta
+
+
+def test_histogram_quantiles():
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.add(0.001)  # 1 ms
+    for _ in range(10):
+        histogram.add(0.1)
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) <= 0.002
+    assert 0.05 < histogram.quantile(0.99) <= 0.1
+    assert histogram.to_dict()["max_ms"] == 100.0
+
+
+def test_progress_counts_every_kind_of_file():
+    stats = ScanStats("/exames")
+    assert stats.progress()[1] is None
+    stats.set_total(10)
+    stats.add_total(2)  # membros de um arquivo compactado
+    stats.file_parsed("/exames/a", 100, 0.01)
+    stats.file_parsed("/exames/b", 100, 0.5, error="InvalidDicomError: x")
+    stats.file_parsed("/exames/c", 10, 0.0001, rejected=True)
+    stats.files_reused(cached=3, skipped=2, indexed=1, size=600)
+    done, total, _, _ = stats.progress()
+    assert (done, total) == (9, 12)
+
+    files = stats.to_dict()["files"]
+    assert files == {"total": 12, "done": 9, "parsed": 1, "cached": 3, "dicomdir": 1, "not_dicom": 1,
+                     "skipped": 2, "failed": 1}
+    assert stats.to_dict()["errors"] == {"InvalidDicomError": 1}
+    assert stats.to_dict()["slowest_files"][0]["path"] == "/exames/b"
+
+
+def test_dump_writes_json(tmp_path):
+    stats = ScanStats("/exames")
+    stats.finish()
+    path = tmp_path / "scan_stats.json"
+    stats.dump(str(path))
+    assert json.loads(path.read_text(encoding="utf-8"))["directory"] == "/exames"
+
+
+def test_format_eta():
+    assert format_eta(None) == "--:--"
+    assert format_eta(75) == "01:15"
+    assert format_eta(3725) == "1:02:05"
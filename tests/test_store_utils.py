@@ -0,0 +1,95 @@
+# test_store_utils.py
+import pytest
+
+from store_utils import TABLE_COLUMNS, ResultStore, SearchIndex
+
+
+def make_row(name, patient_id="1", description="TC TORAX", exam="01/01/2024"):
+    row = {column: "x" for column in TABLE_COLUMNS}
+    row.update({"Paciente": name, "PatientID": patient_id, "Descrição do Estudo": description,
+                "Exame": exam, "Quantidade de Slices": 10})
+    return row
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    for row_id, name in enumerate(["Ana Silva", "Bruno Souza", "Mariana Lima", "Zé"]):
+        index.add(row_id, make_row(name, patient_id=f"P{row_id:03d}"))
+    return index
+
+
+def brute_force(index, rows, query):
+    return {row_id for row_id, row in rows.items() if index.matches(row, query)}
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("a", {0, 1, 2, 3}),  # "TC TORAX" em todas
+    ("z", {1, 3}),
+    ("ZÉ", {3}),
+    ("an", {0, 2}),
+    ("na", {0, 2}),
+    ("ana", {0, 2}),
+    ("mariana", {2}),
+    ("silva", {0}),
+    ("p002", {2}),
+    ("torax", {0, 1, 2, 3}),
+    ("2024", {0, 1, 2, 3}),
+    ("xyz", set()),
+    ("anax", set()),
+])
+def test_search_short_and_long_queries(index, query, expected):
+    assert index.search(query) == expected
+
+
+def test_empty_query_means_no_filter(index):
+    assert index.search("") is None
+    assert index.search("   ") is None
+
+
+def test_search_after_remove_and_update(index):
+    index.remove(0, make_row("Ana Silva", patient_id="P000"))
+    assert index.search("ana") == {2}
+    assert index.search("si") == set()
+    # A linha volta com outro nome, como em set_group_row
+    index.add(0, make_row("Anabela Costa", patient_id="P000"))
+    assert index.search("ana") == {0, 2}
+    assert index.search("co") == {0}
+
+
+def test_search_agrees_with_matches():
+    index = SearchIndex()
+    rows = {row_id: make_row(name, description=description)
+            for row_id, (name, description) in enumerate([("Ana", "RM CRANIO"), ("Caio", "TC ABDOME"),
+                                                           ("Iara", "TC CRANIO"), ("Luana", "RX TORAX")])}
+    for row_id, row in rows.items():
+        index.add(row_id, row)
+    for query in ("a", "c", "an", "cr", "cranio", "tc c", "abdome", "o", "q"):
+        assert index.search(query) == brute_force(index, rows, query)
+
+
+def test_result_store_ids_survive_deletes():
+    store = ResultStore()
+    ids = [store.append(make_row(name)) for name in ("Carla", "ana", "Bruno")]
+    store.delete(ids[0])
+    assert len(store) == 2
+    assert list(store.row_ids()) == ids[1:]
+    assert store.get(ids[2], "Paciente") == "Bruno"
+    assert list(store.sorted_ids("Paciente")) == [ids[1], ids[2]]
+    store.update(ids[1], make_row("Zuleica"))
+    assert list(store.sorted_ids("Paciente", reverse=True)) == [ids[1], ids[2]]
+
+
+def test_iter_rows_reads_lazily_and_stops_after_clear():
+    store = ResultStore()
+    row = {column: "x" for column in TABLE_COLUMNS}
+    row["Quantidade de Slices"] = 1
+    ids = [store.append(dict(row, Paciente=name)) for name in ("ana", "bia", "caio")]
+    rows = store.iter_rows(ids)
+    assert next(rows)[0] == "ana"
+    # Alteração depois do pedido: a linha sai com o valor atual
+    store.update(ids[1], dict(row, Paciente="beatriz"))
+    assert next(rows)[0] == "beatriz"
+    store.clear()
+    with pytest.raises(RuntimeError):
+        next(rows)
@@ -0,0 +1,54 @@
+# test_volume_utils.py
+import warnings
+
+import numpy as np
+import pytest
+
+from volume_utils import WindowLUT
+
+
+def test_window_width_one_is_a_step():
+    lut = WindowLUT(np.int16, center=100, width=1)
+    pixels = np.array([[98, 99, 100, 101]], dtype=np.int16)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # sem divisão por zero
+        mapped = lut.apply(pixels, [1.0], [0.0])
+    assert mapped.tolist() == [[0, 0, 255, 255]]
+
+
+@pytest.mark.parametrize("width", [0, 0.5])
+def test_window_width_below_one_is_clamped(width):
+    lut = WindowLUT(np.int16, center=0, width=width)
+    assert lut.map_values(np.array([-1.0, 0.0, 1.0])).tolist() == [0, 255, 255]
+
+
+def test_linear_window_limits():
+    lut = WindowLUT(np.int16, center=40, width=400)
+    mapped = lut.apply(np.array([[-1024, -160, 40, 240, 3000]], dtype=np.int16), [1.0], [0.0])
+    assert mapped[0, 0] == 0 and mapped[0, 1] == 0
+    assert 126 <= mapped[0, 2] <= 129
+    assert mapped[0, 3] == 255 and mapped[0, 4] == 255
+
+
+def test_float_volume_without_table():
+    lut = WindowLUT(np.float32, center=1.0, width=1)
+    assert lut.apply(np.array([0.2, 0.7], dtype=np.float32), 1.0, 0.0).tolist() == [0, 255]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_progressive_fill_survives_corrupt_slice(tmp_path, capsys, workers):
+    from pydicom.data import get_testdata_file
+    from volume_utils import ProgressiveVolume
+    corrupt = tmp_path / "IM2"
+    corrupt.write_bytes(b"\0" * 200)
+    paths = [get_testdata_file("CT_small.dcm"), str(corrupt), get_testdata_file("CT_small.dcm")]
+    data = np.zeros((3, 128, 128), dtype=np.int16)
+    ones = np.ones(3, dtype=np.float32)
+    volume = ProgressiveVolume(data, ones, ones * 0, paths=paths, workers=workers)
+    completed = []
+    volume.fill(completed.append)
+    assert volume.coverage() == 1.0
+    assert volume.failed == {1}
+    assert completed == [volume]
+    assert not data[1].any() and data[0].any()
+    assert "IM2" in capsys.readouterr().err
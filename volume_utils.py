@@ -0,0 +1,591 @@
+# volume_utils.py
+import os
+import sys
+import json
+import hashlib
+import multiprocessing
+from threading import Thread, Event
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pydicom as dicom
+from cache_utils import user_cache_dir
+from sniff_utils import sniff_stream
+
+# Tags lidas na primeira passada (só cabeçalho) para separar as séries, ordenar as fatias e alocar o volume
+VOLUME_TAGS = [
+    "SeriesInstanceUID", "SeriesNumber", "SeriesDescription", "Modality",
+    "ImagePositionPatient", "ImageOrientationPatient", "InstanceNumber", "Rows", "Columns", "SamplesPerPixel",
+    "BitsAllocated", "PixelRepresentation", "PixelSpacing", "SliceThickness",
+    "RescaleSlope", "RescaleIntercept", "WindowCenter", "WindowWidth",
+]
+
+# Presets de janela (centro, largura) em HU para a exibição
+WINDOW_PRESETS = {
+    "Pulmão": (-600, 1500),
+    "Osso": (400, 1800),
+    "Partes moles": (40, 400),
+    "Cérebro": (40, 80),
+}
+
+
+def read_slice_header(dicom_path):
+    return dicom.dcmread(dicom_path, force=True, stop_before_pixels=True, specific_tags=VOLUME_TAGS)
+
+
+def image_orientation(ds):
+    orientation = getattr(ds, "ImageOrientationPatient", None)
+    if orientation is None or len(orientation) != 6:
+        return (1.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+    return tuple(float(v) for v in orientation)
+
+
+class Series:
+    # Fatias de uma série da pasta (mesmo SeriesInstanceUID, orientação e tamanho de imagem),
+    # ordenadas ao longo da normal do plano de corte. Só cabeçalhos: nenhum pixel é decodificado
+    # até a série ser escolhida (load_volume).
+    def __init__(self, folder, uid, headers):
+        first = headers[0][1]
+        self.folder = folder
+        self.uid = uid
+        self.number = getattr(first, "SeriesNumber", None)
+        self.description = str(getattr(first, "SeriesDescription", ""))
+        self.modality = str(getattr(first, "Modality", ""))
+        self.orientation = image_orientation(first)
+        # A normal (linha x coluna) vale também para aquisições com gantry inclinado, em que
+        # ImagePositionPatient[2] não acompanha a ordem das fatias
+        self.normal = np.cross(self.orientation[:3], self.orientation[3:])
+        positions = [self.slice_location(ds) for _, ds in headers]
+        order = sorted(range(len(headers)), key=positions.__getitem__)
+        self.headers = [headers[i] for i in order]
+        self.positions = [positions[i] for i in order]
+        self.spacing = self.slice_spacing(float_value(first, "SliceThickness", 1.0))
+
+    def __len__(self):
+        return len(self.headers)
+
+    @property
+    def paths(self):
+        return [path for path, _ in self.headers]
+
+    def slice_location(self, ds):
+        position = getattr(ds, "ImagePositionPatient", None)
+        if position is not None and len(position) == 3:
+            return float(np.dot([float(v) for v in position], self.normal))
+        return float(getattr(ds, "InstanceNumber", 0) or 0)
+
+    def slice_spacing(self, default):
+        # Distância real entre fatias vizinhas ao longo da normal (mediana, ignorando posições repetidas)
+        steps = [b - a for a, b in zip(self.positions, self.positions[1:]) if b - a > 1e-4]
+        return float(np.median(steps)) if steps else default
+
+
+def group_series(path):
+    # Lê só os cabeçalhos da pasta e separa as imagens por série; maiores séries primeiro
+    groups = {}
+    for entry in os.scandir(path):
+        if not entry.is_file():
+            continue
+        try:
+            with open(entry.path, "rb") as stream:
+                # Arquivos que não são DICOM na mesma pasta são descartados pelos primeiros bytes
+                if not sniff_stream(stream):
+                    continue
+                ds = read_slice_header(stream)
+        except Exception:
+            continue
+        if "Rows" not in ds or "Columns" not in ds or int(getattr(ds, "SamplesPerPixel", 1)) != 1:
+            continue
+        # Localizadores e reconstruções em outro plano podem vir com o mesmo SeriesInstanceUID
+        key = (str(getattr(ds, "SeriesInstanceUID", "")), tuple(round(v, 3) for v in image_orientation(ds)),
+               int(ds.Rows), int(ds.Columns))
+        groups.setdefault(key, []).append((entry.path, ds))
+    series = [Series(path, key[0], headers) for key, headers in groups.items()]
+    series.sort(key=len, reverse=True)
+    return series
+
+
+def float_value(ds, name, default):
+    value = getattr(ds, name, None)
+    return default if value in (None, "") else float(value)
+
+
+def pixel_dtype(ds):
+    # Mesmo dtype que o pixel_array do pydicom devolve (int16 na maioria das TCs)
+    signed = int(getattr(ds, "PixelRepresentation", 0)) == 1
+    return np.dtype(f"{'i' if signed else 'u'}{max(1, int(ds.BitsAllocated) // 8)}")
+
+
+# Fatias decodificadas por tarefa do pool de processos
+DECODE_BATCH_SIZE = 8
+
+
+def decode_batch(jobs):
+    # Executada nos processos do pool: [(posição no volume, pixels)] para cada (posição, caminho)
+    return [(index, dicom.dcmread(dicom_path, force=True).pixel_array) for index, dicom_path in jobs]
+
+
+def decode_batch_or_errors(jobs):
+    # Como decode_batch, mas uma fatia com erro vem como (posição, None, erro) sem derrubar o lote
+    results = []
+    for index, dicom_path in jobs:
+        try:
+            results.append((index, dicom.dcmread(dicom_path, force=True).pixel_array, None))
+        except Exception as error:
+            # Só o nome e a mensagem: nem toda exceção sobrevive ao pickle de volta
+            results.append((index, None, f"{type(error).__name__}: {error}"))
+    return results
+
+
+def decode_into(data, paths, workers=1, batch_size=DECODE_BATCH_SIZE):
+    # Decodifica paths[i] em data[i]. Com workers > 1 a decodificação (JPEG, JPEG 2000, RLE...) roda
+    # em um pool de processos e cada fatia é copiada para a sua posição assim que o lote termina;
+    # no máximo workers * 2 lotes ficam em andamento, então a memória extra é limitada.
+    if workers <= 1 or len(paths) <= batch_size:
+        for index, dicom_path in enumerate(paths):
+            data[index] = dicom.dcmread(dicom_path, force=True).pixel_array
+        return
+
+    jobs = list(enumerate(paths))
+    # spawn evita herdar por fork as threads do Tk
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        running = set()
+        for start in range(0, len(jobs), batch_size):
+            if len(running) >= workers * 2:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for index, pixels in future.result():
+                        data[index] = pixels
+            running.add(executor.submit(decode_batch, jobs[start:start + batch_size]))
+        for future in wait(running).done:
+            for index, pixels in future.result():
+                data[index] = pixels
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Fatores de redução da pirâmide usada na rolagem rápida
+PYRAMID_LEVELS = (2, 4)
+
+
+class Volume:
+    # Voxels no dtype nativo, em um array contíguo (fatias, linhas, colunas). Slope/intercept ficam
+    # por fatia e só são aplicados nos cortes 2D pedidos para exibição.
+    def __init__(self, data, slopes, intercepts, pixel_spacing=(1.0, 1.0), slice_thickness=1.0,
+                 orientation=(1.0, 0.0, 0.0, 0.0, 1.0, 0.0), paths=(), window=None, slice_spacing=None,
+                 series_uid=None):
+        self.data = data
+        self.slopes = slopes
+        self.intercepts = intercepts
+        self.pixel_spacing = pixel_spacing
+        self.slice_thickness = slice_thickness
+        # Distância entre os centros das fatias, que pode diferir da espessura (sobreposição, lacunas)
+        self.slice_spacing = slice_spacing or slice_thickness
+        self.orientation = orientation
+        self.series_uid = series_uid
+        self.paths = list(paths)
+        self.window = window  # (centro, largura) de WindowCenter/WindowWidth, se a série tiver
+        self.identity = not np.any(slopes != 1) and not np.any(intercepts != 0)
+        self.levels = {}  # fator -> (voxels, slopes, intercepts) reduzidos, ver build_pyramid
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def coverage(self):
+        # Fração das fatias já decodificadas (ProgressiveVolume preenche aos poucos)
+        return 1.0
+
+    def rescale(self, pixels, slopes, intercepts):
+        if self.identity:
+            return pixels
+        return pixels * slopes + intercepts  # float32: só o corte exibido é convertido
+
+    def level(self, factor):
+        # Nível da pirâmide; enquanto ele não existe, a resolução original
+        if factor in self.levels:
+            return factor, self.levels[factor]
+        return 1, (self.data, self.slopes, self.intercepts)
+
+    def build_pyramid(self):
+        # Um voxel a cada fator em cada eixo: 2x ocupa 1/8 do volume e 4x 1/64
+        for factor in PYRAMID_LEVELS:
+            self.levels[factor] = (np.ascontiguousarray(self.data[::factor, ::factor, ::factor]),
+                                   self.slopes[::factor], self.intercepts[::factor])
+
+    def start_pyramid(self):
+        Thread(target=self.build_pyramid, daemon=True).start()
+
+    def cut(self, orientation, index, factor=1):
+        # Corte 2D com os voxels brutos e o slope/intercept de cada linha do corte.
+        # axial: (linhas, colunas); sagittal: (fatias, linhas); coronal: (fatias, colunas)
+        factor, (data, slopes, intercepts) = self.level(factor)
+        if orientation == 'axial':
+            index = min(index // factor, len(data) - 1)
+            return data[index], slopes[index], intercepts[index]
+        if orientation == 'sagittal':
+            return data[:, :, min(index // factor, data.shape[2] - 1)], slopes[:, None], intercepts[:, None]
+        return data[:, min(index // factor, data.shape[1] - 1), :], slopes[:, None], intercepts[:, None]
+
+    def axial(self, index, factor=1):
+        return self.rescale(*self.cut('axial', index, factor))
+
+    def sagittal(self, column, factor=1):
+        return self.rescale(*self.cut('sagittal', column, factor))
+
+    def coronal(self, row, factor=1):
+        return self.rescale(*self.cut('coronal', row, factor))
+
+
+class ProgressiveVolume(Volume):
+    # Volume preenchido em segundo plano. As fatias ainda não decodificadas continuam zeradas e
+    # aparecem como placeholder (o valor do intercept, ar na TC). A ordem de preenchimento segue a
+    # última fatia axial pedida, então a região que o usuário está vendo chega primeiro.
+    # Uma fatia que não pode ser decodificada fica em branco e conta como carregada (ver failed).
+    def __init__(self, *args, workers=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.workers = workers
+        self.loaded = np.zeros(len(self), dtype=bool)
+        self.pending = set()
+        self.failed = set()
+        self.focus = len(self) // 2
+        self.stop_event = Event()
+        self.pyramid_requested = False
+
+    def coverage(self):
+        return float(np.count_nonzero(self.loaded)) / len(self)
+
+    def cut(self, orientation, index, factor=1):
+        if orientation == 'axial':
+            self.focus = index
+        return super().cut(orientation, index, factor)
+
+    def start_pyramid(self):
+        # A pirâmide só é montada com o volume completo (ver fill)
+        self.pyramid_requested = True
+        if self.loaded.all():
+            super().start_pyramid()
+
+    def next_indices(self, count):
+        # As fatias não carregadas mais próximas do foco
+        indices = []
+        loaded, pending, total = self.loaded, self.pending, len(self)
+        focus = min(max(self.focus, 0), total - 1)
+        for distance in range(total):
+            for index in (focus - distance, focus + distance) if distance else (focus,):
+                if 0 <= index < total and not loaded[index] and index not in pending:
+                    indices.append(index)
+                    if len(indices) == count:
+                        return indices
+        return indices
+
+    def store(self, index, pixels):
+        self.data[index] = pixels
+        self.loaded[index] = True
+        self.pending.discard(index)
+
+    def fail(self, index, error):
+        print(f"Aviso: fatia {index} não decodificada, fica em branco: {self.paths[index]} ({error})",
+              file=sys.stderr)
+        self.failed.add(index)
+        self.loaded[index] = True
+        self.pending.discard(index)
+
+    def decode(self, index):
+        self.store(index, dicom.dcmread(self.paths[index], force=True).pixel_array)
+
+    def try_decode(self, index):
+        try:
+            self.decode(index)
+        except Exception as error:
+            self.fail(index, f"{type(error).__name__}: {error}")
+
+    def store_or_fail(self, index, pixels, error=None):
+        # Uma fatia de outro tamanho (arquivo truncado, série mal agrupada) também fica em branco
+        if error is None:
+            try:
+                self.store(index, pixels)
+                return
+            except ValueError as store_error:
+                error = f"ValueError: {store_error}"
+        self.fail(index, error)
+
+    def start(self, on_complete=None):
+        Thread(target=self.fill, args=(on_complete,), daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def fill(self, on_complete=None):
+        try:
+            self.fill_slices()
+        except Exception as error:
+            print(f"Aviso: carregamento do volume interrompido ({type(error).__name__}: {error})", file=sys.stderr)
+        finally:
+            # Sem um pedido de parada, o que não chegou fica em branco: a cobertura chega a 100% e a
+            # exibição deixa de esperar
+            if not self.stop_event.is_set():
+                for index in np.flatnonzero(~self.loaded):
+                    self.fail(int(index), "carregamento interrompido")
+            self.complete(on_complete)
+
+    def fill_slices(self):
+        if self.workers <= 1:
+            while not self.stop_event.is_set():
+                indices = self.next_indices(1)
+                if not indices:
+                    break
+                self.try_decode(indices[0])
+            return
+        # Mesmo esquema de decode_into, mas cada lote é escolhido na hora, perto do foco atual
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            running = set()
+            while not self.stop_event.is_set():
+                while len(running) < self.workers * 2:
+                    indices = self.next_indices(DECODE_BATCH_SIZE)
+                    if not indices:
+                        break
+                    self.pending.update(indices)
+                    running.add(executor.submit(decode_batch_or_errors, [(i, self.paths[i]) for i in indices]))
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for index, pixels, error in future.result():
+                        self.store_or_fail(index, pixels, error)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def complete(self, on_complete=None):
+        if not self.loaded.all():
+            return
+        if self.pyramid_requested:
+            self.build_pyramid()
+        if on_complete is not None:
+            on_complete(self)
+
+
+def volume_from_series(series, volume_class=Volume, **kwargs):
+    # Aloca o volume da série (ainda sem pixels) a partir dos cabeçalhos já ordenados
+    headers = series.headers
+    first = headers[0][1]
+    shape = (int(first.Rows), int(first.Columns))
+
+    # zeros: o sistema só reserva as páginas conforme as fatias são escritas
+    data = np.zeros((len(headers),) + shape, dtype=pixel_dtype(first))
+    slopes = np.array([float_value(ds, "RescaleSlope", 1.0) for _, ds in headers], dtype=np.float32)
+    intercepts = np.array([float_value(ds, "RescaleIntercept", 0.0) for _, ds in headers], dtype=np.float32)
+    pixel_spacing = tuple(float(v) for v in getattr(first, "PixelSpacing", (1.0, 1.0)))
+    slice_thickness = float_value(first, "SliceThickness", 1.0)
+    return volume_class(data, slopes, intercepts, pixel_spacing, slice_thickness, series.orientation,
+                        series.paths, window=series_window(first), slice_spacing=series.spacing,
+                        series_uid=series.uid, **kwargs)
+
+
+def series_window(ds):
+    # Primeiro valor de WindowCenter/WindowWidth (os dois podem ser multivalorados)
+    center, width = getattr(ds, "WindowCenter", None), getattr(ds, "WindowWidth", None)
+    if center is None or width is None:
+        return None
+    try:
+        center = float(center[0] if isinstance(center, dicom.multival.MultiValue) else center)
+        width = float(width[0] if isinstance(width, dicom.multival.MultiValue) else width)
+    except (TypeError, ValueError):
+        return None
+    return (center, width) if width > 0 else None
+
+
+class WindowLUT:
+    # Leva os voxels brutos direto para uint8 com uma tabela pré-calculada por (slope, intercept):
+    # um índice por valor possível do dtype (65536 entradas para int16), com a janela linear do
+    # DICOM já aplicada. Trocar de janela só refaz as tabelas; o volume não é tocado.
+    def __init__(self, dtype, center, width):
+        self.dtype = np.dtype(dtype)
+        # Valores de até 16 bits são lidos como índices sem sinal (view, sem cópia)
+        self.key_dtype = np.dtype(f"u{self.dtype.itemsize}") if self.dtype.itemsize <= 2 else None
+        self.set_window(center, width)
+
+    def set_window(self, center, width):
+        self.center, self.width = float(center), max(float(width), 1.0)
+        self.tables = {}
+
+    def map_values(self, values):
+        # Função de janela linear (DICOM PS3.3 C.11.2.1.2) levada para 0..255
+        if self.width <= 1:
+            # Largura 1 (válida no DICOM) é um degrau: acima de center - 0.5 é o máximo
+            return np.where(values > self.center - 0.5, 255, 0).astype(np.uint8)
+        scaled = ((values - (self.center - 0.5)) / (self.width - 1) + 0.5) * 255
+        return np.clip(scaled, 0, 255).astype(np.uint8)
+
+    def table(self, slope, intercept):
+        key = (float(slope), float(intercept))
+        table = self.tables.get(key)
+        if table is None:
+            raw = np.arange(2 ** (8 * self.dtype.itemsize), dtype=self.key_dtype).view(self.dtype)
+            table = self.tables[key] = self.map_values(raw * np.float32(slope) + np.float32(intercept))
+        return table
+
+    def apply(self, pixels, slopes, intercepts):
+        if self.key_dtype is None:
+            return self.map_values(pixels * slopes + intercepts)
+        slopes, intercepts = np.ravel(slopes), np.ravel(intercepts)
+        keys = pixels.view(self.key_dtype)
+        if np.all(slopes == slopes[0]) and np.all(intercepts == intercepts[0]):
+            return self.table(slopes[0], intercepts[0])[keys]
+        # Rescale diferente entre as fatias: uma tabela por linha do corte
+        output = np.empty(pixels.shape, dtype=np.uint8)
+        for row, (slope, intercept) in enumerate(zip(slopes, intercepts)):
+            output[row] = self.table(slope, intercept)[keys[row]]
+        return output
+
+
+def decode_workers(ds, workers):
+    # Sem compressão decodificar é só copiar bytes; o pool só compensa para sintaxes comprimidas
+    transfer_syntax = getattr(getattr(ds, "file_meta", None), "TransferSyntaxUID", None)
+    if transfer_syntax is None or not transfer_syntax.is_compressed:
+        return 1
+    return workers
+
+
+def load_volume(path, cache=None, workers=1, progressive=False, series_uid=None):
+    # Carrega uma série da pasta (series_uid, ou a maior). Ordena pelos cabeçalhos, aloca o volume
+    # uma vez e decodifica cada fatia direto na sua posição; só os pixels de uma fatia ficam em
+    # memória além do volume. Com progressive=True só a fatia do meio é decodificada antes de
+    # retornar; o resto é preenchido em segundo plano.
+    if cache is not None:
+        # Fotografa a pasta antes de decodificar: uma mudança durante a leitura invalida a entrada
+        sources = folder_sources(path)
+        if series_uid is not None:
+            volume = cache.get(path, sources, series_uid)
+            if volume is not None:
+                return volume
+    series = group_series(path)
+    if series_uid is not None:
+        series = [s for s in series if s.uid == series_uid]
+    if not series:
+        raise ValueError(f"Nenhuma imagem DICOM encontrada em {path}")
+    return load_series(series[0], cache, workers, progressive, sources if cache is not None else None)
+
+
+def load_series(series, cache=None, workers=1, progressive=False, sources=None):
+    if cache is not None:
+        sources = sources if sources is not None else folder_sources(series.folder)
+        volume = cache.get(series.folder, sources, series.uid)
+        if volume is not None:
+            return volume
+    workers = decode_workers(series.headers[0][1], workers)
+    store = None if cache is None else (lambda volume: cache.put(series.folder, volume, sources))
+
+    if progressive:
+        volume = volume_from_series(series, ProgressiveVolume, workers=workers)
+        volume.decode(volume.focus)
+        volume.start(store)
+        return volume
+
+    volume = volume_from_series(series)
+    decode_into(volume.data, volume.paths, workers)
+    if store is not None:
+        store(volume)
+    return volume
+
+
+def folder_sources(path):
+    # {nome: [tamanho, mtime_ns]} dos arquivos da pasta; só stat, nenhum DICOM é aberto
+    sources = {}
+    for entry in os.scandir(path):
+        if entry.is_file():
+            stat = entry.stat()
+            sources[entry.name] = [stat.st_size, stat.st_mtime_ns]
+    return sources
+
+
+# Espaço em disco ocupado pelos volumes em cache antes de descartar os menos usados
+VOLUME_CACHE_BUDGET = 4 * 1024 ** 3
+
+
+class VolumeCache:
+    # Volumes já decodificados e ordenados, gravados como .npy (dtype nativo) com um .json ao lado
+    # (espaçamento, espessura, orientação, rescale e a fotografia dos arquivos de origem).
+    # Cada série da pasta é uma entrada, que só vale enquanto os arquivos da pasta tiverem os mesmos tamanhos e mtimes;
+    # a leitura é um np.memmap, sem cópia. O mtime do .npy marca o último uso (LRU).
+
+    def __init__(self, path=None, max_bytes=VOLUME_CACHE_BUDGET):
+        self.path = path or os.path.join(user_cache_dir(), "volumes")
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, exist_ok=True)
+
+    def entry_paths(self, folder, series_uid=""):
+        name = os.path.abspath(folder) + "\0" + (series_uid or "")
+        key = hashlib.sha1(name.encode("utf-8", "surrogatepass")).hexdigest()
+        return os.path.join(self.path, key + ".npy"), os.path.join(self.path, key + ".json")
+
+    def get(self, folder, sources, series_uid=""):
+        data_path, meta_path = self.entry_paths(folder, series_uid)
+        try:
+            with open(meta_path, encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            if meta["sources"] != sources:
+                self.remove(folder, series_uid)
+                return None
+            data = np.load(data_path, mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+        os.utime(data_path)  # Marca o uso para o LRU
+        return Volume(data, np.array(meta["slopes"], dtype=np.float32), np.array(meta["intercepts"], dtype=np.float32),
+                      tuple(meta["pixel_spacing"]), meta["slice_thickness"], tuple(meta["orientation"]), meta["paths"],
+                      tuple(meta["window"]) if meta.get("window") else None, meta["slice_spacing"], meta["series_uid"])
+
+    def put(self, folder, volume, sources):
+        if volume.data.nbytes > self.max_bytes:
+            return
+        data_path, meta_path = self.entry_paths(folder, volume.series_uid)
+        meta = {
+            "folder": os.path.abspath(folder),
+            "series_uid": volume.series_uid,
+            "sources": sources,
+            "slopes": volume.slopes.tolist(),
+            "intercepts": volume.intercepts.tolist(),
+            "pixel_spacing": list(volume.pixel_spacing),
+            "slice_thickness": volume.slice_thickness,
+            "slice_spacing": volume.slice_spacing,
+            "orientation": list(volume.orientation),
+            "window": list(volume.window) if volume.window else None,
+            "paths": volume.paths,
+        }
+        self.evict(volume.data.nbytes)
+        # Grava em arquivos temporários e renomeia: uma entrada interrompida nunca parece válida
+        with open(data_path + ".tmp", "wb") as data_file:
+            np.save(data_file, np.ascontiguousarray(volume.data))
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as meta_file:
+            json.dump(meta, meta_file, ensure_ascii=False)
+        os.replace(data_path + ".tmp", data_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def remove(self, folder, series_uid=""):
+        for entry_path in self.entry_paths(folder, series_uid):
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self, incoming=0):
+        # Descarta os volumes usados há mais tempo até caber incoming bytes no orçamento
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".npy"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries) + incoming
+        for _, size, data_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for entry_path in (data_path, data_path[:-4] + ".json"):
+                try:
+                    os.remove(entry_path)
+                except FileNotFoundError:
+                    pass
+            total -= size